@@ -1,55 +1,116 @@
 # Define dependencias comunes para los endpoints, como autenticación.
 
-from typing import Generator
+from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core.config import settings
-from app.db.session import get_db  # Importa get_db directamente desde session.py
+from app.core.security import DOWNLOAD_SCOPE
+from app.db.session import get_async_db, get_db  # Importa get_db directamente desde session.py
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"/api/login/access-token"
 )
+# Para los endpoints que también aceptan un token de descarga en la URL
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"/api/login/access-token", auto_error=False
+)
 
 # Elimina o comenta la función get_db si ya existe
 # def get_db() -> Generator:
 #     return get_db_session()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def _decode_token(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=["HS256"]
         )
-        token_data = schemas.TokenPayload(**payload)
+        return schemas.TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No se pudieron validar las credenciales",
         )
-    user = crud.user.get(db, id=token_data.sub)
+
+async def _load_user(db: AsyncSession, token_data: schemas.TokenPayload) -> models.User:
+    user = await crud.user.aget(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    # Separado de la sesión asíncrona para que los endpoints síncronos puedan usarlo en la suya
+    db.expunge(user)
     return user
 
-def get_current_active_user(
+# Asíncrona: se ejecuta en cada petición y así no ocupa un hilo del threadpool
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    token_data = _decode_token(token)
+    # Un token de descarga no sirve como token de acceso
+    if token_data.scope is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No se pudieron validar las credenciales",
+        )
+    return await _load_user(db, token_data)
+
+async def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
-def get_current_active_agent(
+async def get_current_active_agent(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     if not current_user.is_agent:
         raise HTTPException(status_code=403, detail="El usuario no es un agente")
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Usuario de la cabecera Authorization o, si no la hay, del token de descarga de la URL
+# (?token=...), emitido para esta misma ruta. Así el navegador puede descargar con un
+# enlace normal, sin cargar el archivo entero en memoria para guardarlo después
+async def get_download_user(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    bearer: Optional[str] = Depends(optional_oauth2),
+    token: Optional[str] = Query(None, description="Token de descarga de POST /documents/download-token"),
+) -> models.User:
+    if bearer:
+        return await get_current_active_user(await get_current_user(db=db, token=bearer))
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token_data = _decode_token(token)
+    if token_data.scope != DOWNLOAD_SCOPE or token_data.path != request.url.path:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No se pudieron validar las credenciales",
+        )
+    return await get_current_active_user(await _load_user(db, token_data))
+
+# Documento de la ruta ({document_id}) con su siniestro, en una sola consulta, si el
+# usuario puede verlo. Comparte la sesión síncrona del endpoint (get_db se resuelve una
+# vez por petición), así que el documento se puede modificar después
+def get_authorized_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> models.Document:
+    document = crud.document.get_with_siniestro(db, id=document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    if not crud.user.is_agent(current_user) and (document.siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return document
@@ -1,155 +1,343 @@
 # Gestiona operaciones CRUD para documentos y maneja la carga de archivos.
 
-from typing import Any, List
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 import os
-import shutil
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
 from app import crud, models, schemas
-from app.api import deps
-from app.services.ocr.service import OCRService
+from app.api import deps, pagination
+from app.core import security
+from app.core.config import settings
+from app.crud.pagination import InvalidCursorError
+from app.services.ocr import cache as ocr_cache, metrics as ocr_metrics, processing
+from app.services.ocr.engine import OCRDisabledError, OCRTimeoutError, ocr_engine
+from app.services.storage.multipart import MultipartError, StreamingMultipartReader
+from app.services.storage import delivery, derivatives, export, ingest
+from app.services.storage.blobs import blob_store
+from app.services.storage.writer import UploadTooLargeError, max_upload_bytes
 
 router = APIRouter()
-ocr_service = OCRService()
 
 # Directorio para guardar documentos
-UPLOAD_DIRECTORY = "uploads"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+os.makedirs(settings.UPLOAD_DIRECTORY, exist_ok=True)
 
-@router.post("/upload/{siniestro_id}", response_model=schemas.Document)
+def _write_temp_file(contents: bytes) -> str:
+    with tempfile.NamedTemporaryFile(delete=False) as file:
+        file.write(contents)
+        return file.name
+
+async def _run_paged_ocr(document_type: str, contents: bytes, path: Optional[str]) -> Any:
+    # Los workers leen las páginas desde disco; si el archivo no está guardado se usa uno temporal
+    temp_path = None
+    if path is None:
+        path = temp_path = await run_in_threadpool(_write_temp_file, contents)
+    try:
+        return await ocr_engine.run_pages(
+            processing.normalize_document_type(document_type), path
+        )
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+async def _run_ocr_cached(
+    db: Session, document_type: str, contents: bytes, path: Optional[str] = None
+) -> Any:
+    # Resultado en caché si ya se procesó el mismo archivo con el mismo motor
+    # La caché usa la sesión síncrona (consultas y commits): va al threadpool como el hash
+    content_hash = await run_in_threadpool(ocr_cache.content_hash, contents)
+    result = await run_in_threadpool(
+        ocr_cache.lookup, db, content_hash=content_hash, document_type=document_type
+    )
+    if result is None:
+        if processing.is_paged(contents[:4]):
+            result = await _run_paged_ocr(document_type, contents, path)
+        else:
+            method = processing.ocr_method_for(document_type)
+            result = await ocr_engine.run(method, contents)
+        await run_in_threadpool(
+            ocr_cache.store, db, content_hash=content_hash, document_type=document_type, result=result
+        )
+    return result
+
+def _save_ocr_result(db: Session, document: models.Document, result: Any) -> None:
+    """Guarda el texto extraído y actualiza el siniestro con los datos reconocidos"""
+    siniestro = document.siniestro
+    crud.document.set_extracted_text(
+        db=db, db_obj=document, extracted_text=processing.searchable_text(result)
+    )
+    update_data = processing.siniestro_update_from_result(
+        document.document_type, result, siniestro
+    )
+    if update_data:
+        siniestro_update = schemas.SiniestroUpdate(**update_data)
+        crud.siniestro.update(db=db, db_obj=siniestro, obj_in=siniestro_update)
+
+def _authorized_siniestro(db: Session, siniestro_id: int, current_user: models.User) -> models.Siniestro:
+    siniestro = crud.siniestro.get(db=db, id=siniestro_id)
+    if not siniestro:
+        raise HTTPException(status_code=404, detail="Siniestro no encontrado")
+    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return siniestro
+
+def _create_document(
+    db: Session, siniestro_id: int, document_type: str, stored: Dict[str, Any]
+) -> models.Document:
+    document_in = schemas.DocumentCreate(
+        name=stored.pop("name"),
+        document_type=document_type,
+        siniestro_id=siniestro_id
+    )
+    document = crud.document.create_with_siniestro(
+        db=db,
+        obj_in=document_in,
+        siniestro_id=siniestro_id,
+        **stored,
+    )
+    derivatives.schedule_document(document)
+    return document
+
+@router.post(
+    "/upload/{siniestro_id}",
+    response_model=schemas.Document,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_document(
     *,
     db: Session = Depends(deps.get_db),
+    request: Request,
     siniestro_id: int,
     document_type: str,
-    file: UploadFile = File(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Upload a document for a siniestro.
     """
-    # Verificar que el siniestro existe
-    siniestro = crud.siniestro.get(db=db, id=siniestro_id)
-    if not siniestro:
-        raise HTTPException(status_code=404, detail="Siniestro no encontrado")
+    # Verificar que el siniestro existe y los permisos (la sesión síncrona, en el threadpool)
+    await run_in_threadpool(_authorized_siniestro, db, siniestro_id, current_user)
     
-    # Verificar permisos
-    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
-        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    # Rechazar antes de leer el cuerpo si el tamaño declarado ya supera el límite
+    # (con margen para las cabeceras del formulario)
+    max_bytes = max_upload_bytes(document_type)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+        raise HTTPException(status_code=413, detail=str(UploadTooLargeError(max_bytes)))
     
-    # Crear directorio específico para el siniestro si no existe
-    siniestro_dir = os.path.join(UPLOAD_DIRECTORY, str(siniestro_id))
-    os.makedirs(siniestro_dir, exist_ok=True)
+    # El archivo se escribe en su ubicación final a medida que llega
+    try:
+        reader = StreamingMultipartReader(request)
+        part = await reader.file("file")
+        filename = os.path.basename(part.filename.replace("\\", "/"))
+        if not filename:
+            raise HTTPException(status_code=400, detail="Nombre de archivo no válido")
+        # El archivo queda en un temporal hasta pasar por la etapa de ingesta
+        async with blob_store.writer(max_bytes=max_bytes, install=False) as writer:
+            async for chunk in part.chunks():
+                await writer.write(chunk)
+        await reader.drain()
+    except MultipartError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
-    # Guardar el archivo
-    file_path = os.path.join(siniestro_dir, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Recomprimir si es una foto y guardar por contenido (un archivo repetido no ocupa
+    # espacio otra vez)
+    stored = await ingest.store_upload(
+        writer.path, name=filename, document_type=document_type, sha256=writer.sha256, size=writer.size
+    )
     
     # Crear entrada en la base de datos
+    return await run_in_threadpool(_create_document, db, siniestro_id, document_type, stored)
+
+@router.post("/upload/{siniestro_id}/by-hash", response_model=schemas.Document)
+def upload_document_by_hash(
+    *,
+    db: Session = Depends(deps.get_db),
+    siniestro_id: int,
+    document_type: str,
+    name: str,
+    sha256: str = Query(..., pattern="^[0-9a-fA-F]{64}$"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Attach an already stored file (by SHA-256) to a siniestro without uploading it again.
+    """
+    _authorized_siniestro(db, siniestro_id, current_user)
+    
+    # El hash solo sirve si el usuario ya tiene acceso a un documento con ese contenido;
+    # si no, conocer un hash permitiría leer archivos ajenos
+    sha256 = sha256.lower()
+    existing = [
+        document for document in crud.document.get_by_sha256(db=db, sha256=sha256)
+        if crud.user.is_agent(current_user) or document.siniestro.owner_id == current_user.id
+    ]
+    # Si se subió recomprimido, el documento nuevo usa la misma copia
+    source = existing[0] if existing else None
+    if not source or not blob_store.exists(source.sha256):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
+    blob_store.touch(source.sha256)
+    
+    name = os.path.basename(name.replace("\\", "/")) or source.name
+    if source.original_sha256 == sha256:
+        original_name, name = name, os.path.splitext(name)[0] + os.path.splitext(source.name)[1]
+    else:
+        original_name = source.original_name
     document_in = schemas.DocumentCreate(
-        name=file.filename,
+        name=name,
         document_type=document_type,
         siniestro_id=siniestro_id
     )
     document = crud.document.create_with_siniestro(
-        db=db, obj_in=document_in, siniestro_id=siniestro_id, path=file_path
+        db=db,
+        obj_in=document_in,
+        siniestro_id=siniestro_id,
+        path=blob_store.path_for(source.sha256),
+        sha256=source.sha256,
+        size_bytes=source.size_bytes,
+        original_name=original_name,
+        original_sha256=source.original_sha256,
+        original_size_bytes=source.original_size_bytes,
+        original_path=source.original_path,
     )
-    
+    derivatives.schedule_document(document)
     return document
 
 @router.post("/ocr/{document_id}", response_model=dict)
 async def extract_text_from_document(
     *,
     db: Session = Depends(deps.get_db),
-    document_id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    document: models.Document = Depends(deps.get_authorized_document),
 ) -> Any:
     """
     Extract text from a document using OCR.
     """
-    # Obtener el documento
-    document = crud.document.get(db=db, id=document_id)
-    if not document:
-        raise HTTPException(status_code=404, detail="Documento no encontrado")
-    
-    # Verificar permisos
-    siniestro = crud.siniestro.get(db=db, id=document.siniestro_id)
-    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
-        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
-    
-    # Verificar que el archivo existe
-    if not os.path.exists(document.path):
-        raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
-    
     # Verificar extensión del archivo
-    file_extension = os.path.splitext(document.path)[1].lower()
-    if file_extension not in ['.jpg', '.jpeg', '.png', '.bmp', '.pdf', '.tif', '.tiff']:
+    if not processing.is_supported_file(document.name):
         raise HTTPException(status_code=400, detail="Formato de archivo no soportado para OCR")
     
+    # Leer el archivo (del disco o del almacén remoto)
+    try:
+        contents = await run_in_threadpool(blob_store.read_bytes, document.path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
+    
     # Ejecutar OCR dependiendo del tipo de documento
     try:
-        with open(document.path, "rb") as file:
-            contents = file.read()
-            
-        document_type = document.document_type.lower()
-        
-        if document_type == "ine":
-            result = ocr_service.extract_data_from_ine(contents)
-            
-            # Actualizar siniestro con datos extraídos si están disponibles
-            if result.get("nombre") and not siniestro.asegurado:
-                siniestro_update = schemas.SiniestroUpdate(asegurado=result["nombre"])
-                crud.siniestro.update(db=db, db_obj=siniestro, obj_in=siniestro_update)
-            
-            return {"data": result}
-        
-        elif document_type == "póliza" or document_type == "poliza":
-            result = ocr_service.extract_data_from_poliza(contents)
-            
-            # Actualizar siniestro con datos extraídos si están disponibles
-            update_data = {}
-            if result.get("numero_poliza") and not siniestro.numero_poliza:
-                update_data["numero_poliza"] = result["numero_poliza"]
-            if result.get("asegurado") and not siniestro.asegurado:
-                update_data["asegurado"] = result["asegurado"]
-                
-            if update_data:
-                siniestro_update = schemas.SiniestroUpdate(**update_data)
-                crud.siniestro.update(db=db, db_obj=siniestro, obj_in=siniestro_update)
-            
-            return {"data": result}
+        result = await _run_ocr_cached(
+            db, document.document_type, contents, blob_store.local_path(document.path)
+        )
+        # Actualizar siniestro con datos extraídos si están disponibles
+        await run_in_threadpool(_save_ocr_result, db, document, result)
         
-        else:
-            text = ocr_service.extract_text_from_image(contents)
-            return {"text": text}
+        return processing.format_result(document.document_type, result)
             
+    except OCRTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OCRDisabledError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en el procesamiento OCR: {str(e)}")
 
-@router.get("/by-siniestro/{siniestro_id}", response_model=List[schemas.Document])
-def read_documents_by_siniestro(
+@router.post("/ocr-jobs/{document_id}", response_model=schemas.OCRJob, status_code=202)
+def enqueue_ocr_job(
     *,
     db: Session = Depends(deps.get_db),
+    document: models.Document = Depends(deps.get_authorized_document),
+) -> Any:
+    """
+    Queue a document for background OCR and return the job right away.
+    """
+    if not processing.is_supported_file(document.name):
+        raise HTTPException(status_code=400, detail="Formato de archivo no soportado para OCR")
+    
+    return crud.ocr_job.enqueue(db=db, document_id=document.id)
+
+@router.get("/ocr-jobs/{job_id}", response_model=schemas.OCRJob)
+def read_ocr_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status and, when finished, the result of an OCR job.
+    """
+    job = crud.ocr_job.get(db=db, id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo de OCR no encontrado")
+    
+    document = crud.document.get_with_siniestro(db=db, id=job.document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    if not crud.user.is_agent(current_user) and (document.siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    
+    return job
+
+@router.get("/by-siniestro/{siniestro_id}", response_model=List[schemas.Document])
+async def read_documents_by_siniestro(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     siniestro_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get all documents for a specific siniestro.
+    Get the documents of a siniestro in upload order, a page at a time
+    (see X-Next-Cursor / X-Prev-Cursor).
     """
-    siniestro = crud.siniestro.get(db=db, id=siniestro_id)
+    siniestro = await crud.siniestro.aget(db=db, id=siniestro_id)
     if not siniestro:
         raise HTTPException(status_code=404, detail="Siniestro no encontrado")
     
     if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
         raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
     
-    documents = crud.document.get_multi_by_siniestro(
-        db=db, siniestro_id=siniestro_id
-    )
-    return documents
+    try:
+        page = await crud.document.aget_page_by_siniestro(
+            db=db, siniestro_id=siniestro_id, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise pagination.invalid_cursor(e)
+    pagination.set_cursor_headers(response, page)
+    return page.items
+
+@router.get("/search", response_model=List[schemas.DocumentSearchResult])
+def search_documents(
+    *,
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=2, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search the OCR text of documents, ranked by relevance, with highlighted snippets.
+    """
+    # Los agentes buscan en todos los siniestros; los usuarios solo en los suyos
+    owner_id = None if crud.user.is_agent(current_user) else current_user.id
+    return crud.document.search(db=db, query=q, owner_id=owner_id, skip=skip, limit=limit)
 
 @router.put("/{id}/validate", response_model=schemas.Document)
 def validate_document(
@@ -169,40 +357,163 @@ def validate_document(
     document = crud.document.update(db=db, db_obj=document, obj_in=document_update)
     return document
 
-@router.get("/download/{document_id}", response_class=FileResponse)
+@router.api_route("/download/{document_id}", methods=["GET", "HEAD"], response_class=FileResponse)
 async def download_document(
     *,
-    db: Session = Depends(deps.get_db),
-    document_id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    request: Request,
+    inline: bool = False,
+    original: bool = False,
+    document: models.Document = Depends(deps.get_authorized_document),
 ) -> Any:
     """
-    Download a document.
+    Download a document (or the original upload, if it was kept). Supports byte ranges and conditional requests (ETag).
     """
-    # Get the document
-    document = crud.document.get(db=db, id=document_id)
-    if not document:
-        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    location, filename, sha256, size = document.path, document.name, document.sha256, document.size_bytes
+    if original and document.original_sha256:
+        if not document.original_kept:
+            raise HTTPException(status_code=404, detail="El archivo original no se conservó")
+        location, filename = document.original_path, document.original_name
+        sha256, size = document.original_sha256, document.original_size_bytes
     
-    # Check permissions
-    siniestro = crud.siniestro.get(db=db, id=document.siniestro_id)
-    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
-        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    # Return the file (o solo los bytes pedidos, o 304 si el cliente ya lo tiene)
+    conditions = dict(
+        filename=filename,
+        sha256=sha256,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+        if_none_match=request.headers.get("if-none-match"),
+        method=request.method,
+        inline=inline,
+    )
+    try:
+        local_path = blob_store.local_path(location)
+        if local_path is None:
+            # En S3: URL firmada o reenvío desde el bucket
+            return await delivery.stored_response(location, size=size, **conditions)
+        return await run_in_threadpool(delivery.file_response, local_path, **conditions)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
+
+@router.get("/preview/{document_id}", response_class=FileResponse)
+async def preview_document(
+    *,
+    request: Request,
+    size: str = Query("thumb", pattern="^(thumb|preview)$"),
+    document: models.Document = Depends(deps.get_authorized_document),
+) -> Any:
+    """
+    Get a JPEG thumbnail or web-sized preview of a document (first page for PDFs).
+    """
+    if not processing.is_supported_file(document.name):
+        raise HTTPException(status_code=404, detail="Vista previa no disponible para este formato")
     
-    # Check if the file exists
-    if not os.path.exists(document.path):
+    # El contenido de un documento no cambia: la respuesta se puede guardar sin revalidar
+    key = derivatives.document_key(document)
+    headers = {
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": f'"{key}-{size}-v{derivatives.DERIVATIVE_VERSION}"',
+    }
+    if delivery.not_modified(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        path = await run_in_threadpool(derivatives.derivative_cache.get, key, document.path, size)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
+    except derivatives.DerivativeUnavailableError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     
-    # Return the file
-    return FileResponse(
-        path=document.path,
-        filename=document.name,
-        media_type="application/octet-stream"
+    return FileResponse(path=path, media_type="image/jpeg", headers=headers)
+
+def _export_response(siniestro_ids: List[int], filename: str) -> StreamingResponse:
+    # Sin espera: si ya hay EXPORT_MAX_CONCURRENT exportaciones en curso se rechaza
+    if not export.export_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=429,
+            detail="Hay demasiadas exportaciones en curso, inténtelo más tarde",
+            headers={"Retry-After": "30"},
+        )
+    stream = export.stream_zip(siniestro_ids)
+    next(stream)
+    return StreamingResponse(
+        stream,
+        media_type="application/zip",
+        headers={"Content-Disposition": delivery.content_disposition(filename)},
+    )
+
+@router.post("/download-token", response_model=schemas.DownloadToken)
+def create_download_token(
+    *,
+    token_in: schemas.DownloadTokenRequest,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Issue a short-lived token to download an export with a plain link (?token=...).
+    """
+    # Solo las exportaciones aceptan el token en la URL; los permisos se comprueban al descargar
+    if token_in.path != "/api/documents/export" and not token_in.path.startswith("/api/documents/export/"):
+        raise HTTPException(status_code=400, detail="Ruta de descarga no válida")
+    return {
+        "token": security.create_download_token(current_user.id, token_in.path),
+        "expires_in": settings.DOWNLOAD_TOKEN_EXPIRE_SECONDS,
+    }
+
+@router.get("/export/{siniestro_id}", response_class=StreamingResponse)
+def export_siniestro_documents(
+    *,
+    db: Session = Depends(deps.get_db),
+    siniestro_id: int,
+    current_user: models.User = Depends(deps.get_download_user),
+) -> Any:
+    """
+    Download a ZIP with every document of a siniestro and a manifest with its OCR data.
+    """
+    siniestro = crud.siniestro.get(db=db, id=siniestro_id)
+    if not siniestro:
+        raise HTTPException(status_code=404, detail="Siniestro no encontrado")
+    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return _export_response([siniestro_id], f"siniestro-{siniestro_id}.zip")
+
+@router.get("/export", response_class=StreamingResponse)
+def export_documents(
+    *,
+    db: Session = Depends(deps.get_db),
+    siniestro_id: Optional[List[int]] = Query(None),
+    estado: Optional[str] = None,
+    tipo_siniestro: Optional[str] = None,
+    fecha_desde: Optional[datetime] = None,
+    fecha_hasta: Optional[datetime] = None,
+    current_user: models.User = Depends(deps.get_download_user),
+) -> Any:
+    """
+    Download a ZIP with the documents of the siniestros matching the filters.
+    """
+    # Un usuario que no es agente solo exporta sus propios siniestros
+    owner_id = None if crud.user.is_agent(current_user) else current_user.id
+    siniestro_ids = crud.siniestro.get_ids_filtered(
+        db=db,
+        ids=siniestro_id,
+        owner_id=owner_id,
+        estado=estado,
+        tipo_siniestro=tipo_siniestro,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        limit=settings.EXPORT_MAX_SINIESTROS + 1,
     )
+    if not siniestro_ids:
+        raise HTTPException(status_code=404, detail="No hay siniestros que exportar")
+    if len(siniestro_ids) > settings.EXPORT_MAX_SINIESTROS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Se pueden exportar como máximo {settings.EXPORT_MAX_SINIESTROS} siniestros; acote el filtro",
+        )
+    return _export_response(siniestro_ids, "siniestros.zip")
 
 @router.post("/ocr-direct", response_model=dict)
 async def extract_text_direct(
     *,
+    db: Session = Depends(deps.get_db),
     file: UploadFile = File(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -211,7 +522,7 @@ async def extract_text_direct(
     """
     # Verificar tipo de archivo
     filename = file.filename.lower()
-    if not any(filename.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.bmp', '.pdf', '.tif', '.tiff']):
+    if not processing.is_supported_file(filename):
         raise HTTPException(status_code=400, detail="Formato de archivo no soportado para OCR")
     
     try:
@@ -226,18 +537,61 @@ async def extract_text_direct(
             document_type = "poliza"
         
         # Ejecutar OCR según el tipo de documento
-        if document_type == "ine":
-            result = ocr_service.extract_data_from_ine(contents)
-            return {"data": result}
-        elif document_type == "poliza":
-            result = ocr_service.extract_data_from_poliza(contents)
-            return {"data": result}
-        else:
-            text = ocr_service.extract_text_from_image(contents)
-            return {"text": text}
+        result = await _run_ocr_cached(db, document_type, contents)
+        return processing.format_result(document_type, result)
             
+    except OCRTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except OCRDisabledError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en el procesamiento OCR: {str(e)}")
     finally:
         # Asegurar que el archivo se cierre
-        await file.close()
\ No newline at end of file
+        await file.close()
+
+@router.delete("/ocr-cache/{content_hash}", response_model=dict)
+def invalidate_ocr_cache_entry(
+    *,
+    db: Session = Depends(deps.get_db),
+    content_hash: str,
+    current_user: models.User = Depends(deps.get_current_active_agent),
+) -> Any:
+    """
+    Remove the cached OCR results of a file (SHA-256 of its contents).
+    """
+    deleted = crud.ocr_cache.invalidate(db=db, content_hash=content_hash.lower())
+    return {"deleted": deleted}
+
+@router.delete("/ocr-cache", response_model=dict)
+def clear_ocr_cache(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_agent),
+) -> Any:
+    """
+    Remove every cached OCR result.
+    """
+    deleted = crud.ocr_cache.invalidate(db=db)
+    return {"deleted": deleted}
+
+@router.get("/storage-savings", response_model=dict)
+def read_storage_savings(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_agent),
+) -> Any:
+    """
+    Bytes saved by recompressing uploaded images.
+    """
+    return crud.document.storage_savings(db=db)
+
+@router.get("/ocr-metrics", response_model=dict)
+def read_ocr_metrics(
+    *,
+    current_user: models.User = Depends(deps.get_current_active_agent),
+) -> Any:
+    """
+    Count how many documents each OCR engine path handled since the server started.
+    """
+    return ocr_metrics.snapshot()
@@ -1,32 +1,89 @@
 # Gestiona operaciones CRUD para siniestros.
 
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
-from app.api import deps
+from app.api import deps, pagination
+from app.crud.crud_siniestro import SORT_PATTERN, SiniestroFilters
+from app.crud.pagination import InvalidCursorError
+from app.services import stats
 
 router = APIRouter()
 
+
+def _owner_scope(current_user: models.User, owner_id: Optional[int]) -> Optional[int]:
+    # Un usuario que no es agente solo ve sus propios siniestros
+    if crud.user.is_agent(current_user):
+        return owner_id
+    if owner_id is not None and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return current_user.id
+
 @router.get("/", response_model=List[schemas.Siniestro])
-def read_siniestros(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+async def read_siniestros(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    estado: Optional[str] = None,
+    prioridad: Optional[str] = None,
+    tipo_siniestro: Optional[str] = None,
+    fecha_siniestro_desde: Optional[datetime] = None,
+    fecha_siniestro_hasta: Optional[datetime] = None,
+    fecha_reporte_desde: Optional[datetime] = None,
+    fecha_reporte_hasta: Optional[datetime] = None,
+    owner_id: Optional[int] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    sort: str = Query("-id", pattern=SORT_PATTERN),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    skip: int = Query(0, ge=0, deprecated=True),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve siniestros.
+    Retrieve siniestros matching the filters, newest first unless `sort` says otherwise
+    (`id`, `fecha_reporte` or `fecha_siniestro`, prefixed with `-` for descending).
+
+    Pages are linked through the X-Next-Cursor and X-Prev-Cursor response headers:
+    send one back as `cursor`, with the same filters and sort, to get that page.
     """
-    if crud.user.is_agent(current_user):
-        siniestros = crud.siniestro.get_multi(db, skip=skip, limit=limit)
-    else:
-        siniestros = crud.siniestro.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+    filters = SiniestroFilters(
+        owner_id=_owner_scope(current_user, owner_id),
+        estado=estado,
+        prioridad=prioridad,
+        tipo_siniestro=tipo_siniestro,
+        fecha_siniestro_desde=fecha_siniestro_desde,
+        fecha_siniestro_hasta=fecha_siniestro_hasta,
+        fecha_reporte_desde=fecha_reporte_desde,
+        fecha_reporte_hasta=fecha_reporte_hasta,
+        q=q,
+    )
+    if skip:
+        # Paginación por desplazamiento, solo para clientes antiguos (orden por id)
+        return await crud.siniestro.aget_multi_filtered(db, filters=filters, skip=skip, limit=limit)
+    try:
+        page = await crud.siniestro.aget_page(
+            db, filters=filters, sort=sort, cursor=cursor, limit=limit
         )
-    return siniestros
+    except InvalidCursorError as e:
+        raise pagination.invalid_cursor(e)
+    pagination.set_cursor_headers(response, page)
+    return page.items
+
+@router.get("/stats", response_model=schemas.SiniestroStats)
+async def read_siniestro_stats(
+    db: AsyncSession = Depends(deps.get_async_db),
+    owner_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Count siniestros by estado and by prioridad: all of them for agents (or those of
+    `owner_id`), the user's own otherwise. Cached for a few seconds.
+    """
+    return await stats.siniestro_stats(db, owner_id=_owner_scope(current_user, owner_id))
 
 @router.post("/", response_model=schemas.Siniestro)
 def create_siniestro(
@@ -41,6 +98,7 @@ def create_siniestro(
     siniestro = crud.siniestro.create_with_owner(
         db=db, obj_in=siniestro_in, owner_id=current_user.id
     )
+    stats.invalidate(current_user.id)
     return siniestro
 
 @router.put("/{id}", response_model=schemas.Siniestro)
@@ -60,19 +118,37 @@ def update_siniestro(
     if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
         raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
     siniestro = crud.siniestro.update(db=db, db_obj=siniestro, obj_in=siniestro_in)
+    stats.invalidate(siniestro.owner_id)
     return siniestro
 
 @router.get("/{id}", response_model=schemas.Siniestro)
-def read_siniestro(
+async def read_siniestro(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get siniestro by ID.
     """
-    siniestro = crud.siniestro.get(db=db, id=id)
+    siniestro = await crud.siniestro.aget(db=db, id=id)
+    if not siniestro:
+        raise HTTPException(status_code=404, detail="Siniestro no encontrado")
+    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return siniestro
+
+@router.get("/{id}/detail", response_model=schemas.SiniestroDetail)
+async def read_siniestro_detail(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a siniestro together with all its documents, in upload order.
+    """
+    siniestro = await crud.siniestro.aget_with_documents(db=db, id=id)
     if not siniestro:
         raise HTTPException(status_code=404, detail="Siniestro no encontrado")
     if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
@@ -93,4 +169,5 @@ def delete_siniestro(
     if not siniestro:
         raise HTTPException(status_code=404, detail="Siniestro no encontrado")
     siniestro = crud.siniestro.remove(db=db, id=id)
+    stats.invalidate(siniestro.owner_id)
     return siniestro
\ No newline at end of file
@@ -0,0 +1,221 @@
+# Subidas reanudables: se abre una sesión, se envían las partes por posición (en
+# cualquier orden y en paralelo), se consulta el progreso y se finaliza en un documento.
+
+from typing import Any, Dict, Tuple
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.core.config import settings
+from app.models.upload_session import ACTIVA, COMPLETADA
+from app.services.storage import derivatives, ingest, sessions
+from app.services.storage.blobs import blob_store
+from app.services.storage.writer import UploadTooLargeError, max_upload_bytes
+
+router = APIRouter()
+
+def _get_session(db: Session, session_id: str, current_user: models.User) -> models.UploadSession:
+    upload = crud.upload_session.get(db=db, id=session_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Sesión de subida no encontrada")
+    if not crud.user.is_agent(current_user) and (upload.user_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+    return upload
+
+def _with_progress(db: Session, upload: models.UploadSession) -> schemas.UploadSession:
+    response = schemas.UploadSession.model_validate(upload)
+    if upload.status == COMPLETADA:
+        response.received_bytes = upload.size_bytes
+        return response
+    ranges = crud.upload_session.received_ranges(db=db, session_id=upload.id)
+    response.received_bytes = sum(end - start for start, end in ranges)
+    missing = []
+    position = 0
+    for start, end in ranges:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < upload.size_bytes:
+        missing.append([position, upload.size_bytes])
+    response.missing_ranges = missing
+    return response
+
+@router.post("/", response_model=schemas.UploadSession, status_code=201)
+def create_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    upload_in: schemas.UploadSessionCreate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start a resumable upload for a siniestro.
+    """
+    siniestro = crud.siniestro.get(db=db, id=upload_in.siniestro_id)
+    if not siniestro:
+        raise HTTPException(status_code=404, detail="Siniestro no encontrado")
+    if not crud.user.is_agent(current_user) and (siniestro.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="No tiene permisos suficientes")
+
+    max_bytes = max_upload_bytes(upload_in.document_type)
+    if upload_in.size_bytes > max_bytes:
+        raise HTTPException(status_code=413, detail=str(UploadTooLargeError(max_bytes)))
+    upload_in.name = os.path.basename(upload_in.name.replace("\\", "/"))
+    if not upload_in.name:
+        raise HTTPException(status_code=400, detail="Nombre de archivo no válido")
+
+    sessions.maybe_cleanup(db)
+    upload = crud.upload_session.create_with_user(db=db, obj_in=upload_in, user_id=current_user.id)
+    sessions.create_file(upload.id, upload.size_bytes)
+    return _with_progress(db, upload)
+
+@router.get("/{session_id}", response_model=schemas.UploadSession)
+def read_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    session_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get upload progress: received bytes and the ranges still missing.
+    """
+    upload = _get_session(db, session_id, current_user)
+    return _with_progress(db, upload)
+
+@router.put(
+    "/{session_id}",
+    response_model=schemas.UploadSession,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def upload_chunk(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: Request,
+    session_id: str,
+    offset: int = Query(..., ge=0),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Upload the bytes of the request body at the given offset.
+    """
+    # Las consultas van al threadpool; solo la lectura del cuerpo es asíncrona
+    upload = await run_in_threadpool(_get_session, db, session_id, current_user)
+    if upload.status != ACTIVA:
+        raise HTTPException(status_code=409, detail="La sesión de subida ya está finalizada")
+    if offset >= upload.size_bytes:
+        raise HTTPException(status_code=416, detail="La posición excede el tamaño declarado")
+
+    end = min(upload.size_bytes, offset + settings.UPLOAD_CHUNK_MAX_BYTES)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and offset + int(content_length) > end:
+        raise HTTPException(status_code=416, detail="La parte excede el tamaño declarado o el máximo por parte")
+
+    try:
+        written = await sessions.write_range(upload.id, offset, request.stream(), end)
+    except sessions.ChunkOutOfRangeError as e:
+        raise HTTPException(status_code=416, detail=str(e))
+
+    return await run_in_threadpool(_record_chunk, db, upload, offset, written)
+
+def _record_chunk(db: Session, upload: models.UploadSession, offset: int, length: int) -> schemas.UploadSession:
+    if not crud.upload_session.add_chunk(db=db, session_id=upload.id, offset=offset, length=length):
+        raise HTTPException(status_code=409, detail="La sesión de subida ya está finalizada")
+    db.refresh(upload)
+    return _with_progress(db, upload)
+
+def _claim_completion(
+    db: Session, session_id: str, current_user: models.User
+) -> Tuple[models.UploadSession, bool]:
+    """Sesión y si esta petición la ha pasado a finalizando (False si ya estaba completada)"""
+    upload = _get_session(db, session_id, current_user)
+    if upload.status == COMPLETADA:
+        return upload, False
+    if not crud.upload_session.claim_for_completion(db=db, session_id=upload.id):
+        raise HTTPException(status_code=409, detail="La sesión de subida se está finalizando")
+    db.refresh(upload)
+    if _with_progress(db, upload).missing_ranges:
+        crud.upload_session.release(db=db, db_obj=upload)
+        raise HTTPException(status_code=409, detail="Faltan partes por subir")
+    return upload, True
+
+def _create_document(db: Session, upload: models.UploadSession, stored: Dict[str, Any]) -> schemas.UploadSession:
+    document_in = schemas.DocumentCreate(
+        name=stored.pop("name"),
+        document_type=upload.document_type,
+        siniestro_id=upload.siniestro_id
+    )
+    document = crud.document.create_with_siniestro(
+        db=db,
+        obj_in=document_in,
+        siniestro_id=upload.siniestro_id,
+        **stored,
+    )
+    derivatives.schedule_document(document)
+    upload = crud.upload_session.complete(db=db, db_obj=upload, document_id=document.id)
+    return _with_progress(db, upload)
+
+def _release_after_error(db: Session, upload: models.UploadSession) -> None:
+    # La finalización falló a medias: la sesión vuelve a estar activa para reintentarla.
+    # Si el archivo ya se movió al almacén hay que volver a enviar todas las partes
+    db.rollback()
+    reset_chunks = not os.path.exists(sessions.session_path(upload.id))
+    if reset_chunks:
+        sessions.create_file(upload.id, upload.size_bytes)
+    crud.upload_session.release(db=db, db_obj=upload, reset_chunks=reset_chunks)
+
+@router.post("/{session_id}/complete", response_model=schemas.UploadSession)
+async def complete_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    session_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Finish a resumable upload and create the document.
+    """
+    # Las consultas y el acceso a disco van al threadpool; solo la ingesta es asíncrona
+    upload, claimed = await run_in_threadpool(_claim_completion, db, session_id, current_user)
+    if not claimed:
+        return await run_in_threadpool(_with_progress, db, upload)
+
+    try:
+        path = sessions.session_path(upload.id)
+        sha256, size = await run_in_threadpool(blob_store.hash_file, path)
+        if upload.sha256 and sha256 != upload.sha256:
+            # No se sabe qué parte llegó mal: hay que volver a enviarlas todas
+            await run_in_threadpool(crud.upload_session.release, db=db, db_obj=upload, reset_chunks=True)
+            raise HTTPException(status_code=422, detail="El hash del archivo no coincide")
+        stored = await ingest.store_upload(
+            path, name=upload.name, document_type=upload.document_type, sha256=sha256, size=size
+        )
+        return await run_in_threadpool(_create_document, db, upload, stored)
+    except HTTPException:
+        raise
+    except Exception:
+        await run_in_threadpool(_release_after_error, db, upload)
+        raise
+
+@router.delete("/{session_id}", response_model=schemas.UploadSession)
+def cancel_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    session_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Cancel a resumable upload and discard the received data.
+    """
+    upload = _get_session(db, session_id, current_user)
+    if upload.status != ACTIVA:
+        raise HTTPException(status_code=409, detail="La sesión de subida ya está finalizada")
+    response = _with_progress(db, upload)
+    sessions.remove_file(upload.id)
+    crud.upload_session.remove_session(db=db, db_obj=upload)
+    return response
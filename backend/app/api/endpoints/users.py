@@ -85,8 +85,7 @@ def update_user_me(
     return user
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(
-    db: Session = Depends(deps.get_db),
+async def read_user_me(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -104,7 +103,8 @@ def read_user_by_id(
     Get a specific user by id.
     """
     user = crud.user.get(db, id=user_id)
-    if user == current_user:
+    # current_user viene de otra sesión: se compara por id
+    if user is not None and user.id == current_user.id:
         return user
     if not crud.user.is_agent(current_user):
         raise HTTPException(
@@ -0,0 +1,25 @@
+# Cabeceras de los listados paginados por cursor.
+#
+# El cuerpo sigue siendo la lista de elementos; los cursores de la página siguiente y
+# de la anterior van en X-Next-Cursor y X-Prev-Cursor (ausentes si no hay más páginas)
+# y se devuelven tal cual en el parámetro "cursor".
+
+from fastapi import HTTPException, Response
+
+from app.crud.pagination import InvalidCursorError, Page
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+# Expuestas por CORS para que el navegador las deje leer al frontend
+CURSOR_HEADERS = [NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER]
+
+
+def set_cursor_headers(response: Response, page: Page) -> None:
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = page.prev_cursor
+
+
+def invalid_cursor(error: InvalidCursorError) -> HTTPException:
+    return HTTPException(status_code=400, detail=str(error))
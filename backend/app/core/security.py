@@ -12,6 +12,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+# Alcance de los tokens de descarga: solo valen en la URL para la que se emitieron
+DOWNLOAD_SCOPE = "download"
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
 ) -> str:
@@ -25,6 +28,15 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_download_token(subject: Union[str, Any], path: str) -> str:
+    """
+    Token de corta duración para descargar path con un enlace normal del navegador,
+    que no puede enviar la cabecera Authorization
+    """
+    expire = datetime.utcnow() + timedelta(seconds=settings.DOWNLOAD_TOKEN_EXPIRE_SECONDS)
+    to_encode = {"exp": expire, "sub": str(subject), "scope": DOWNLOAD_SCOPE, "path": path}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -2,4 +2,7 @@
 
 from .crud_user import user
 from .crud_siniestro import siniestro
-from .crud_document import document
\ No newline at end of file
+from .crud_document import document
+from .crud_ocr_job import ocr_job
+from .crud_ocr_cache import ocr_cache
+from .crud_upload_session import upload_session
\ No newline at end of file
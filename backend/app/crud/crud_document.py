@@ -1,33 +1,292 @@
 # Implementa operaciones CRUD para documentos.
 
-from typing import List
+import html
+from typing import Any, Dict, List, Optional, Set
 
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.crud.pagination import Page, apaginate
 from app.models.document import Document
+from app.models.siniestro import Siniestro
 from app.schemas.document import DocumentCreate, DocumentUpdate
 
+# Búsqueda de texto completo por base de datos. Para que el tiempo no crezca con el
+# número de coincidencias, la relevancia se calcula solo sobre los documentos más
+# recientes que coinciden (como mucho SEARCH_MAX_CANDIDATES) y el fragmento
+# resaltado solo para la página de resultados devuelta.
+_SEARCH_POSTGRESQL = """
+WITH q AS (SELECT websearch_to_tsquery('spanish', :query) AS q),
+hits AS (
+    SELECT d.id, ts_rank_cd(d.extracted_tsv, q.q) AS rank
+    FROM documents d
+    JOIN siniestros s ON s.id = d.siniestro_id, q
+    WHERE d.extracted_tsv @@ q.q {owner_filter}
+    AND d.id >= (
+        SELECT coalesce(min(id), 0) FROM (
+            SELECT d.id FROM documents d JOIN siniestros s ON s.id = d.siniestro_id, q
+            WHERE d.extracted_tsv @@ q.q {owner_filter}
+            ORDER BY d.id DESC LIMIT :candidates
+        ) newest
+    )
+    ORDER BY rank DESC, d.id DESC
+    LIMIT :limit OFFSET :skip
+)
+SELECT d.id, d.name, d.document_type, d.siniestro_id, s.numero_poliza, s.asegurado, hits.rank,
+    ts_headline('spanish', d.extracted_text, q.q,
+        'StartSel="' || :start_sel || '", StopSel="' || :stop_sel || '", MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+FROM hits
+JOIN documents d ON d.id = hits.id
+JOIN siniestros s ON s.id = d.siniestro_id, q
+ORDER BY hits.rank DESC, d.id DESC
+"""
+
+_SEARCH_SQLITE = """
+SELECT d.id, d.name, d.document_type, d.siniestro_id, s.numero_poliza, s.asegurado,
+    -bm25(documents_fts) AS rank,
+    snippet(documents_fts, 0, :start_sel, :stop_sel, '…', 20) AS snippet
+FROM documents_fts
+JOIN documents d ON d.id = documents_fts.rowid
+JOIN siniestros s ON s.id = d.siniestro_id
+WHERE documents_fts MATCH :query {owner_filter}
+AND documents_fts.rowid >= (
+    SELECT coalesce(min(id), 0) FROM (
+        SELECT d.id FROM documents_fts
+        JOIN documents d ON d.id = documents_fts.rowid
+        JOIN siniestros s ON s.id = d.siniestro_id
+        WHERE documents_fts MATCH :query {owner_filter}
+        ORDER BY documents_fts.rowid DESC LIMIT :candidates
+    )
+)
+ORDER BY bm25(documents_fts), d.id DESC
+LIMIT :limit OFFSET :skip
+"""
+
+# La base de datos marca las coincidencias con caracteres de uso privado; el fragmento
+# se escapa como HTML y después se cambian por <mark>, de modo que el texto extraído
+# (que puede contener cualquier cosa) nunca llega como HTML al navegador
+_START_SEL = "\ue000"
+_STOP_SEL = "\ue001"
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+
+
+def _fts5_query(query: str) -> str:
+    # Cada término como frase entre comillas: "ABC-123" busca los tokens abc y 123
+    # seguidos, y los operadores de FTS5 que escriba el usuario no se interpretan
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
 class CRUDDocument(CRUDBase[Document, DocumentCreate, DocumentUpdate]):
     def create_with_siniestro(
-        self, db: Session, *, obj_in: DocumentCreate, siniestro_id: int, path: str
+        self,
+        db: Session,
+        *,
+        obj_in: DocumentCreate,
+        siniestro_id: int,
+        path: str,
+        sha256: Optional[str] = None,
+        size_bytes: Optional[int] = None,
+        original_name: Optional[str] = None,
+        original_sha256: Optional[str] = None,
+        original_size_bytes: Optional[int] = None,
+        original_path: Optional[str] = None,
     ) -> Document:
-        obj_in_data = obj_in.dict()
-        db_obj = Document(**obj_in_data, path=path, siniestro_id=siniestro_id)
+        obj_in_data = obj_in.dict(exclude={"siniestro_id"})
+        db_obj = Document(
+            **obj_in_data,
+            path=path,
+            siniestro_id=siniestro_id,
+            sha256=sha256,
+            size_bytes=size_bytes,
+            original_name=original_name,
+            original_sha256=original_sha256,
+            original_size_bytes=original_size_bytes,
+            original_path=original_path,
+        )
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def get_with_siniestro(self, db: Session, *, id: int) -> Optional[Document]:
+        """Documento con su siniestro ya cargado, en una sola consulta (JOIN)"""
+        return (
+            db.query(Document)
+            .join(Document.siniestro)
+            .options(contains_eager(Document.siniestro))
+            .filter(Document.id == id)
+            .first()
+        )
+
     def get_multi_by_siniestro(
         self, db: Session, *, siniestro_id: int, skip: int = 0, limit: int = 100
     ) -> List[Document]:
         return (
             db.query(self.model)
             .filter(Document.siniestro_id == siniestro_id)
+            .order_by(Document.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
-document = CRUDDocument(Document)
\ No newline at end of file
+    async def aget_page_by_siniestro(
+        self, db: AsyncSession, *, siniestro_id: int, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page:
+        """Página de documentos del siniestro en orden de subida (índice (siniestro_id, id))"""
+        stmt = select(Document).where(Document.siniestro_id == siniestro_id)
+        return await apaginate(db, stmt, [Document.id], cursor=cursor, limit=limit)
+
+    def get_export_batch(
+        self, db: Session, *, siniestro_ids: List[int], after_id: int = 0, limit: int = 100
+    ) -> List[Document]:
+        """Documentos de los siniestros en orden de id, por lotes (paginación por clave)"""
+        return (
+            db.query(Document)
+            .filter(Document.siniestro_id.in_(siniestro_ids), Document.id > after_id)
+            .order_by(Document.id)
+            .limit(limit)
+            .all()
+        )
+
+    def set_blob(
+        self, db: Session, *, db_obj: Document, path: str, sha256: str, size_bytes: int
+    ) -> Document:
+        db_obj.path = path
+        db_obj.sha256 = sha256
+        db_obj.size_bytes = size_bytes
+        db.add(db_obj)
+        db.commit()
+        return db_obj
+
+    def existing_hashes(self, db: Session, *, hashes: List[str]) -> Set[str]:
+        """Hashes de la lista a los que apunta al menos un documento (o su original conservado)"""
+        if not hashes:
+            return set()
+        rows = db.query(Document.sha256).filter(Document.sha256.in_(hashes)).distinct()
+        originals = (
+            db.query(Document.original_sha256)
+            .filter(Document.original_sha256.in_(hashes), Document.original_path.isnot(None))
+            .distinct()
+        )
+        return {sha256 for (sha256,) in rows} | {sha256 for (sha256,) in originals}
+
+    def get_by_sha256(self, db: Session, *, sha256: str) -> List[Document]:
+        """Documentos con ese contenido, guardado tal cual o como original de una copia recomprimida"""
+        return (
+            db.query(self.model)
+            .filter(or_(Document.sha256 == sha256, Document.original_sha256 == sha256))
+            .all()
+        )
+
+    def storage_savings(self, db: Session) -> Dict[str, int]:
+        """Bytes subidos y guardados de los documentos recomprimidos"""
+        kept = case((Document.original_path.isnot(None), Document.original_size_bytes), else_=0)
+        uploaded, stored, originals, count = db.query(
+            func.coalesce(func.sum(Document.original_size_bytes), 0),
+            func.coalesce(func.sum(Document.size_bytes), 0),
+            func.coalesce(func.sum(kept), 0),
+            func.count(Document.id),
+        ).filter(Document.original_size_bytes.isnot(None)).one()
+        return {
+            "documents": count,
+            "uploaded_bytes": int(uploaded),
+            "stored_bytes": int(stored),
+            # Lo que se ahorra en cada descarga o vista del documento
+            "saved_bytes": int(uploaded) - int(stored),
+            # Originales conservados por UPLOAD_KEEP_ORIGINAL_TYPES, que siguen ocupando espacio
+            "kept_original_bytes": int(originals),
+        }
+
+    def get_not_in_store(self, db: Session, *, store: Any) -> List[Document]:
+        """Documentos cuyo archivo aún no está en el almacén por contenido"""
+        return [
+            document
+            for document in db.query(self.model).order_by(Document.id)
+            if document.path and not store.contains(document.path)
+        ]
+
+    def set_extracted_text(
+        self, db: Session, *, db_obj: Document, extracted_text: Optional[str]
+    ) -> Document:
+        if db_obj.extracted_text != extracted_text:
+            db_obj.extracted_text = extracted_text
+            db.add(db_obj)
+            db.commit()
+            db.refresh(db_obj)
+        return db_obj
+
+    def search(
+        self,
+        db: Session,
+        *,
+        query: str,
+        owner_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Documentos cuyo texto extraído coincide con la consulta, ordenados por
+        relevancia, con un fragmento en HTML escapado y resaltado con <mark>. owner_id limita la
+        búsqueda a los siniestros de ese usuario.
+        """
+        params: Dict[str, Any] = {
+            "query": query,
+            "skip": skip,
+            "limit": limit,
+            "candidates": settings.SEARCH_MAX_CANDIDATES,
+            "start_sel": _START_SEL,
+            "stop_sel": _STOP_SEL,
+        }
+        owner_filter = ""
+        if owner_id is not None:
+            owner_filter = "AND s.owner_id = :owner_id"
+            params["owner_id"] = owner_id
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            sql = _SEARCH_POSTGRESQL
+        elif dialect == "sqlite":
+            sql = _SEARCH_SQLITE
+            params["query"] = _fts5_query(query)
+            if not params["query"]:
+                return []
+        else:
+            return self._search_like(db, query=query, owner_id=owner_id, skip=skip, limit=limit)
+        rows = db.execute(text(sql.format(owner_filter=owner_filter)), params).mappings()
+        return [{**row, "snippet": _highlight(row["snippet"])} for row in rows]
+
+    def _search_like(
+        self, db: Session, *, query: str, owner_id: Optional[int], skip: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        # Sin índice de texto completo: coincidencia simple, sin relevancia ni fragmento
+        q = (
+            db.query(Document, Siniestro)
+            .join(Siniestro, Siniestro.id == Document.siniestro_id)
+            .filter(Document.extracted_text.ilike(f"%{query}%"))
+        )
+        if owner_id is not None:
+            q = q.filter(Siniestro.owner_id == owner_id)
+        return [
+            {
+                "id": document.id,
+                "name": document.name,
+                "document_type": document.document_type,
+                "siniestro_id": document.siniestro_id,
+                "numero_poliza": siniestro.numero_poliza,
+                "asegurado": siniestro.asegurado,
+                "rank": 0.0,
+                "snippet": None,
+            }
+            for document, siniestro in q.order_by(Document.id.desc()).offset(skip).limit(limit)
+        ]
+
+document = CRUDDocument(Document)
@@ -0,0 +1,115 @@
+# Implementa operaciones sobre la caché de resultados de OCR.
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.ocr_cache import OCRCacheEntry
+
+class CRUDOCRCache(CRUDBase[OCRCacheEntry, BaseModel, BaseModel]):
+    def get_by_key(
+        self,
+        db: Session,
+        *,
+        content_hash: str,
+        document_type: str,
+        engine_version: str,
+        touch_after: timedelta = timedelta(0)
+    ) -> Optional[OCRCacheEntry]:
+        """
+        Busca la entrada y registra el acceso solo si el último registrado tiene más de
+        touch_after: la fecha sirve para la caducidad y el LRU, que no necesitan precisión
+        de segundos, y así la mayoría de aciertos no escriben en la base de datos.
+        """
+        entry = (
+            db.query(OCRCacheEntry)
+            .filter(
+                OCRCacheEntry.content_hash == content_hash,
+                OCRCacheEntry.document_type == document_type,
+                OCRCacheEntry.engine_version == engine_version,
+            )
+            .first()
+        )
+        now = datetime.utcnow()
+        if entry and (entry.last_accessed_at is None or entry.last_accessed_at <= now - touch_after):
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_accessed_at = now
+            db.add(entry)
+            db.commit()
+        return entry
+
+    def put(
+        self,
+        db: Session,
+        *,
+        content_hash: str,
+        document_type: str,
+        engine_version: str,
+        result: Any
+    ) -> None:
+        db_obj = OCRCacheEntry(
+            content_hash=content_hash,
+            document_type=document_type,
+            engine_version=engine_version,
+            result=result,
+            size_bytes=len(json.dumps(result, ensure_ascii=False).encode("utf-8")),
+        )
+        db.add(db_obj)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otra petición guardó el mismo resultado al mismo tiempo
+            db.rollback()
+
+    def evict(
+        self, db: Session, *, max_entries: int, max_bytes: int, ttl_days: int
+    ) -> int:
+        """
+        Elimina entradas caducadas y, si se superan los límites, las menos usadas
+        recientemente. Devuelve cuántas entradas se eliminaron.
+        """
+        deleted = (
+            db.query(OCRCacheEntry)
+            .filter(OCRCacheEntry.last_accessed_at < datetime.utcnow() - timedelta(days=ttl_days))
+            .delete(synchronize_session=False)
+        )
+        count, total_bytes = db.query(
+            func.count(OCRCacheEntry.id), func.coalesce(func.sum(OCRCacheEntry.size_bytes), 0)
+        ).one()
+        if count > max_entries or total_bytes > max_bytes:
+            oldest = (
+                db.query(OCRCacheEntry.id, OCRCacheEntry.size_bytes)
+                .order_by(OCRCacheEntry.last_accessed_at)
+                .yield_per(500)
+            )
+            to_delete = []
+            for entry_id, size_bytes in oldest:
+                if count <= max_entries and total_bytes <= max_bytes:
+                    break
+                to_delete.append(entry_id)
+                count -= 1
+                total_bytes -= size_bytes or 0
+            if to_delete:
+                deleted += (
+                    db.query(OCRCacheEntry)
+                    .filter(OCRCacheEntry.id.in_(to_delete))
+                    .delete(synchronize_session=False)
+                )
+        db.commit()
+        return deleted
+
+    def invalidate(self, db: Session, *, content_hash: Optional[str] = None) -> int:
+        query = db.query(OCRCacheEntry)
+        if content_hash is not None:
+            query = query.filter(OCRCacheEntry.content_hash == content_hash)
+        deleted = query.delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+ocr_cache = CRUDOCRCache(OCRCacheEntry)
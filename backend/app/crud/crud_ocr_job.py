@@ -0,0 +1,154 @@
+# Implementa la cola de trabajos de OCR sobre la base de datos (sin broker externo).
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.ocr_job import OCRJob, PENDIENTE, EN_PROCESO, COMPLETADO, FALLIDO
+
+class CRUDOCRJob(CRUDBase[OCRJob, BaseModel, BaseModel]):
+    def enqueue(self, db: Session, *, document_id: int) -> OCRJob:
+        # Si el documento ya tiene un trabajo activo se reutiliza
+        active = (
+            db.query(OCRJob)
+            .filter(
+                OCRJob.document_id == document_id,
+                OCRJob.status.in_([PENDIENTE, EN_PROCESO]),
+            )
+            .first()
+        )
+        if active:
+            return active
+        db_obj = OCRJob(
+            document_id=document_id,
+            status=PENDIENTE,
+            max_attempts=settings.OCR_JOB_MAX_ATTEMPTS,
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def claim_next(self, db: Session, *, worker_id: str) -> Optional[OCRJob]:
+        """
+        Reserva el siguiente trabajo disponible. La reserva es un UPDATE condicionado
+        al estado, así dos workers nunca se quedan con el mismo trabajo, tanto en
+        PostgreSQL como en SQLite.
+        """
+        now = datetime.utcnow()
+        candidates = (
+            db.query(OCRJob.id)
+            .filter(OCRJob.status == PENDIENTE, OCRJob.available_at <= now)
+            .order_by(OCRJob.available_at, OCRJob.id)
+            .limit(10)
+            .all()
+        )
+        for (job_id,) in candidates:
+            claimed = (
+                db.query(OCRJob)
+                .filter(OCRJob.id == job_id, OCRJob.status == PENDIENTE)
+                .update(
+                    {
+                        OCRJob.status: EN_PROCESO,
+                        OCRJob.locked_by: worker_id,
+                        OCRJob.locked_at: now,
+                        OCRJob.attempts: OCRJob.attempts + 1,
+                        OCRJob.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed:
+                return self.get(db, id=job_id)
+        return None
+
+    def _finish(self, db: Session, *, job: OCRJob, attempts: int, values: Dict[Any, Any]) -> Optional[OCRJob]:
+        """
+        Cierra el trabajo solo si sigue siendo la reserva attempts de este worker. Si
+        requeue_stale lo devolvió a la cola y otro worker lo reservó, la fila ya no
+        coincide y la escritura se descarta (devuelve None).
+        """
+        updated = (
+            db.query(OCRJob)
+            .filter(OCRJob.id == job.id, OCRJob.status == EN_PROCESO, OCRJob.attempts == attempts)
+            .update(
+                {
+                    **values,
+                    OCRJob.locked_by: None,
+                    OCRJob.locked_at: None,
+                    OCRJob.updated_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not updated:
+            return None
+        db.refresh(job)
+        return job
+
+    def mark_done(self, db: Session, *, job: OCRJob, attempts: int, result: Any) -> Optional[OCRJob]:
+        """attempts: valor de job.attempts al reservarlo (identifica la reserva)"""
+        return self._finish(
+            db, job=job, attempts=attempts,
+            values={OCRJob.status: COMPLETADO, OCRJob.result: result, OCRJob.error: None},
+        )
+
+    def mark_failed(self, db: Session, *, job: OCRJob, attempts: int, error: str) -> Optional[OCRJob]:
+        # Reintento con backoff exponencial mientras queden intentos
+        if attempts < job.max_attempts:
+            delay = settings.OCR_JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            values = {
+                OCRJob.status: PENDIENTE,
+                OCRJob.available_at: datetime.utcnow() + timedelta(seconds=delay),
+            }
+        else:
+            values = {OCRJob.status: FALLIDO}
+        return self._finish(db, job=job, attempts=attempts, values={**values, OCRJob.error: error})
+
+    def requeue_stale(self, db: Session, *, lease_seconds: int) -> int:
+        """
+        Recupera trabajos reservados por workers que murieron sin terminarlos.
+        Devuelve cuántos trabajos se recuperaron.
+        """
+        now = datetime.utcnow()
+        stale = (
+            db.query(OCRJob)
+            .filter(
+                OCRJob.status == EN_PROCESO,
+                OCRJob.locked_at < now - timedelta(seconds=lease_seconds),
+            )
+            .all()
+        )
+        for job in stale:
+            if job.attempts < job.max_attempts:
+                job.status = PENDIENTE
+                job.available_at = now
+            else:
+                job.status = FALLIDO
+            job.error = f"Trabajo abandonado por el worker {job.locked_by}"
+            job.locked_by = None
+            job.locked_at = None
+            db.add(job)
+        db.commit()
+        return len(stale)
+
+    def latest_results(self, db: Session, *, document_ids: List[int]) -> Dict[int, Any]:
+        """Resultado del último trabajo completado de cada documento"""
+        if not document_ids:
+            return {}
+        jobs = (
+            db.query(OCRJob.document_id, OCRJob.result)
+            .filter(OCRJob.document_id.in_(document_ids), OCRJob.status == COMPLETADO)
+            .order_by(OCRJob.id)
+            .all()
+        )
+        # En orden de id: el último de cada documento sobrescribe a los anteriores
+        return {document_id: result for document_id, result in jobs}
+
+ocr_job = CRUDOCRJob(OCRJob)
\ No newline at end of file
@@ -1,13 +1,76 @@
 # Implementa operaciones CRUD para siniestros.
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import Page, apaginate
 from app.models.siniestro import Siniestro
 from app.schemas.siniestro import SiniestroCreate, SiniestroUpdate
 
+# Órdenes del listado ("-" delante para descendente) y su clave de paginación, que
+# siempre termina en el id. Cada una tiene su índice en Siniestro.__table_args__
+SORT_KEYS = {
+    "id": [Siniestro.id],
+    "fecha_reporte": [Siniestro.fecha_reporte, Siniestro.id],
+    "fecha_siniestro": [Siniestro.fecha_siniestro, Siniestro.id],
+}
+SORT_PATTERN = "^-?(" + "|".join(SORT_KEYS) + ")$"
+
+
+def sort_keys(sort: str) -> Tuple[List[Any], bool]:
+    """Clave de paginación de un orden como "-fecha_reporte" y si es descendente"""
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+    if name not in SORT_KEYS:
+        raise ValueError(f"Orden no válido: {sort}")
+    return SORT_KEYS[name], descending
+
+
+class SiniestroFilters(NamedTuple):
+    """Filtros del listado de siniestros; los que son None no se aplican"""
+    owner_id: Optional[int] = None
+    estado: Optional[str] = None
+    prioridad: Optional[str] = None
+    tipo_siniestro: Optional[str] = None
+    fecha_siniestro_desde: Optional[datetime] = None
+    fecha_siniestro_hasta: Optional[datetime] = None
+    fecha_reporte_desde: Optional[datetime] = None
+    fecha_reporte_hasta: Optional[datetime] = None
+    # Texto en la póliza, el asegurado o el tipo. No usa índice: recorre las filas que
+    # dejan los demás filtros, así que conviene combinarlo con ellos
+    q: Optional[str] = None
+
+    def apply(self, query: Any) -> Any:
+        """Añade los filtros a un select() o a un db.query()"""
+        if self.owner_id is not None:
+            query = query.filter(Siniestro.owner_id == self.owner_id)
+        if self.estado:
+            query = query.filter(Siniestro.estado == self.estado)
+        if self.prioridad:
+            query = query.filter(Siniestro.prioridad == self.prioridad)
+        if self.tipo_siniestro:
+            query = query.filter(Siniestro.tipo_siniestro == self.tipo_siniestro)
+        if self.fecha_siniestro_desde:
+            query = query.filter(Siniestro.fecha_siniestro >= self.fecha_siniestro_desde)
+        if self.fecha_siniestro_hasta:
+            query = query.filter(Siniestro.fecha_siniestro <= self.fecha_siniestro_hasta)
+        if self.fecha_reporte_desde:
+            query = query.filter(Siniestro.fecha_reporte >= self.fecha_reporte_desde)
+        if self.fecha_reporte_hasta:
+            query = query.filter(Siniestro.fecha_reporte <= self.fecha_reporte_hasta)
+        if self.q:
+            query = query.filter(or_(
+                Siniestro.numero_poliza.icontains(self.q, autoescape=True),
+                Siniestro.asegurado.icontains(self.q, autoescape=True),
+                Siniestro.tipo_siniestro.icontains(self.q, autoescape=True),
+            ))
+        return query
+
 class CRUDSiniestro(CRUDBase[Siniestro, SiniestroCreate, SiniestroUpdate]):
     def create_with_owner(
         self, db: Session, *, obj_in: SiniestroCreate, owner_id: int
@@ -25,14 +88,86 @@ class CRUDSiniestro(CRUDBase[Siniestro, SiniestroCreate, SiniestroUpdate]):
         return (
             db.query(self.model)
             .filter(Siniestro.owner_id == owner_id)
+            .order_by(Siniestro.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
+
+    async def aget_with_documents(self, db: AsyncSession, *, id: int) -> Optional[Siniestro]:
+        """Siniestro con sus documentos: dos consultas (la segunda, SELECT ... IN) en total"""
+        return await db.scalar(
+            select(Siniestro).options(selectinload(Siniestro.documentos)).where(Siniestro.id == id)
+        )
+
+    def filtered(self, filters: Optional[SiniestroFilters] = None) -> Select:
+        return (filters or SiniestroFilters()).apply(select(Siniestro))
+
+    async def aget_multi_filtered(
+        self, db: AsyncSession, *, filters: Optional[SiniestroFilters] = None,
+        skip: int = 0, limit: int = 100,
+    ) -> List[Siniestro]:
+        result = await db.scalars(
+            self.filtered(filters).order_by(Siniestro.id).offset(skip).limit(limit)
+        )
+        return list(result)
+
+    async def aget_page(
+        self, db: AsyncSession, *, filters: Optional[SiniestroFilters] = None,
+        sort: str = "-id", cursor: Optional[str] = None, limit: int = 100,
+    ) -> Page:
+        """
+        Página de siniestros filtrada y ordenada según sort (por defecto los más
+        recientes primero). El cursor solo vale para el mismo orden.
+        """
+        keys, descending = sort_keys(sort)
+        return await apaginate(
+            db, self.filtered(filters), keys, cursor=cursor, limit=limit, descending=descending
+        )
     
+    async def acount_by_estado_prioridad(
+        self, db: AsyncSession, *, owner_id: Optional[int] = None
+    ) -> List[Tuple[Optional[str], Optional[str], int]]:
+        """
+        Número de siniestros por (estado, prioridad) en una sola consulta agrupada. Sin
+        owner_id se resuelve solo con el índice (estado, prioridad, id).
+        """
+        stmt = select(Siniestro.estado, Siniestro.prioridad, func.count()).group_by(
+            Siniestro.estado, Siniestro.prioridad
+        )
+        if owner_id is not None:
+            stmt = stmt.where(Siniestro.owner_id == owner_id)
+        return [(estado, prioridad, count) for estado, prioridad, count in await db.execute(stmt)]
+
     def get_by_numero_poliza(
         self, db: Session, *, numero_poliza: str
     ) -> Optional[Siniestro]:
         return db.query(Siniestro).filter(Siniestro.numero_poliza == numero_poliza).first()
 
+    def get_multi_by_ids(self, db: Session, *, ids: List[int]) -> List[Siniestro]:
+        return db.query(Siniestro).filter(Siniestro.id.in_(ids)).all()
+
+    def get_ids_filtered(
+        self,
+        db: Session,
+        *,
+        ids: Optional[List[int]] = None,
+        owner_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        tipo_siniestro: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[int]:
+        query = SiniestroFilters(
+            owner_id=owner_id,
+            estado=estado,
+            tipo_siniestro=tipo_siniestro,
+            fecha_siniestro_desde=fecha_desde,
+            fecha_siniestro_hasta=fecha_hasta,
+        ).apply(db.query(Siniestro.id))
+        if ids:
+            query = query.filter(Siniestro.id.in_(ids))
+        return [row.id for row in query.order_by(Siniestro.id).limit(limit).all()]
+
 siniestro = CRUDSiniestro(Siniestro)
\ No newline at end of file
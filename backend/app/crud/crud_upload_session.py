@@ -0,0 +1,128 @@
+# Implementa operaciones sobre las sesiones de subida reanudable y sus partes.
+
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.upload_session import UploadSession, UploadChunk, ACTIVA, FINALIZANDO, COMPLETADA
+from app.schemas.upload_session import UploadSessionCreate
+
+class CRUDUploadSession(CRUDBase[UploadSession, UploadSessionCreate, BaseModel]):
+    def _expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+    def create_with_user(
+        self, db: Session, *, obj_in: UploadSessionCreate, user_id: int
+    ) -> UploadSession:
+        db_obj = UploadSession(
+            id=uuid.uuid4().hex,
+            name=obj_in.name,
+            document_type=obj_in.document_type,
+            size_bytes=obj_in.size_bytes,
+            sha256=obj_in.sha256.lower() if obj_in.sha256 else None,
+            siniestro_id=obj_in.siniestro_id,
+            user_id=user_id,
+            status=ACTIVA,
+            expires_at=self._expiry(),
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def add_chunk(self, db: Session, *, session_id: str, offset: int, length: int) -> bool:
+        """
+        Registra la parte solo si la sesión sigue activa, en la misma transacción que
+        renueva su caducidad. El UPDATE condicionado bloquea la fila de la sesión hasta
+        el commit, así que la parte no puede colarse en una sesión que se está
+        finalizando o ya finalizada. Devuelve False si no se registró.
+        """
+        renewed = db.query(UploadSession).filter(
+            UploadSession.id == session_id, UploadSession.status == ACTIVA
+        ).update({UploadSession.expires_at: self._expiry()}, synchronize_session=False)
+        if not renewed:
+            db.rollback()
+            return False
+        db.add(UploadChunk(session_id=session_id, offset=offset, length=length))
+        db.commit()
+        return True
+
+    def received_ranges(self, db: Session, *, session_id: str) -> List[Tuple[int, int]]:
+        """Rangos [inicio, fin) recibidos, unidos y ordenados"""
+        rows = (
+            db.query(UploadChunk.offset, UploadChunk.length)
+            .filter(UploadChunk.session_id == session_id)
+            .order_by(UploadChunk.offset)
+            .all()
+        )
+        ranges: List[Tuple[int, int]] = []
+        for offset, length in rows:
+            end = offset + length
+            if ranges and offset <= ranges[-1][1]:
+                if end > ranges[-1][1]:
+                    ranges[-1] = (ranges[-1][0], end)
+            elif length > 0:
+                ranges.append((offset, end))
+        return ranges
+
+    def claim_for_completion(self, db: Session, *, session_id: str) -> bool:
+        """
+        Pasa la sesión de activa a finalizando con un UPDATE condicionado, así dos
+        peticiones de finalizar nunca crean dos documentos.
+        """
+        claimed = (
+            db.query(UploadSession)
+            .filter(UploadSession.id == session_id, UploadSession.status == ACTIVA)
+            .update({UploadSession.status: FINALIZANDO}, synchronize_session=False)
+        )
+        db.commit()
+        return claimed == 1
+
+    def release(
+        self, db: Session, *, db_obj: UploadSession, reset_chunks: bool = False
+    ) -> UploadSession:
+        # La finalización falló: se puede volver a intentar (por ejemplo, reenviando partes)
+        if reset_chunks:
+            db.query(UploadChunk).filter(UploadChunk.session_id == db_obj.id).delete(
+                synchronize_session=False
+            )
+        db_obj.status = ACTIVA
+        db_obj.expires_at = self._expiry()
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def complete(self, db: Session, *, db_obj: UploadSession, document_id: int) -> UploadSession:
+        db_obj.status = COMPLETADA
+        db_obj.document_id = document_id
+        db.query(UploadChunk).filter(UploadChunk.session_id == db_obj.id).delete(
+            synchronize_session=False
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_expired(self, db: Session, *, limit: int = 100) -> List[UploadSession]:
+        return (
+            db.query(UploadSession)
+            .filter(UploadSession.expires_at < datetime.utcnow())
+            .order_by(UploadSession.expires_at)
+            .limit(limit)
+            .all()
+        )
+
+    def remove_session(self, db: Session, *, db_obj: UploadSession) -> None:
+        db.query(UploadChunk).filter(UploadChunk.session_id == db_obj.id).delete(
+            synchronize_session=False
+        )
+        db.delete(db_obj)
+        db.commit()
+
+upload_session = CRUDUploadSession(UploadSession)
@@ -0,0 +1,121 @@
+# Paginación por cursor (keyset) para los listados.
+#
+# En lugar de OFFSET, cada página continúa desde la clave de la última fila de la
+# anterior (WHERE clave > :ultima ORDER BY clave LIMIT n), así que con un índice que
+# cubra el filtro y el orden la página N cuesta lo mismo que la primera y las filas
+# insertadas o borradas entre peticiones no desplazan los resultados. La clave debe ser
+# única (o terminar en el id) y sus columnas no nulas. El cursor es opaco para el
+# cliente: base64 de la clave, la dirección y el orden con que se generó.
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def _order_signature(keys: Sequence[Any], descending: bool) -> str:
+    return ",".join(key.key for key in keys) + (":desc" if descending else ":asc")
+
+
+def _dump_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _load_value(key: Any, value: Any) -> Any:
+    if isinstance(value, str) and key.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(keys: Sequence[Any], item: Any, direction: str, descending: bool) -> str:
+    payload = {
+        "o": _order_signature(keys, descending),
+        "d": direction,
+        "k": [_dump_value(getattr(item, key.key)) for key in keys],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any], descending: bool) -> Tuple[str, List[Any]]:
+    """Dirección ("next" o "prev") y valores de la clave del cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction, values = payload["d"], payload["k"]
+        order = payload["o"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Cursor no válido")
+    if order != _order_signature(keys, descending) or direction not in ("next", "prev") \
+            or not isinstance(values, list) or len(values) != len(keys):
+        # Cursor de otro listado u otro orden
+        raise InvalidCursorError("Cursor no válido para este listado")
+    try:
+        return direction, [_load_value(key, value) for key, value in zip(keys, values)]
+    except ValueError:
+        raise InvalidCursorError("Cursor no válido")
+
+
+def keyset_query(
+    stmt: Select, keys: Sequence[Any], values: Optional[List[Any]], *, reverse: bool, limit: int
+) -> Select:
+    """stmt a partir de la clave values (excluida), en orden descendente si reverse"""
+    if values is not None:
+        if len(keys) == 1:
+            row, bound = keys[0], values[0]
+        else:
+            # Comparación de filas: (a, b) > (x, y), resuelta por el índice compuesto
+            row, bound = tuple_(*keys), tuple_(*values)
+        stmt = stmt.where(row < bound if reverse else row > bound)
+    return stmt.order_by(*[key.desc() if reverse else key.asc() for key in keys]).limit(limit)
+
+
+async def apaginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[Any],
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = False,
+) -> Page:
+    """
+    Página de stmt ordenada por keys. Con un cursor "prev" se lee hacia atrás (orden
+    invertido) y se devuelve la página en el orden normal.
+    """
+    direction, values = ("next", None) if not cursor else decode_cursor(cursor, keys, descending)
+    backwards = direction == "prev"
+    # Una fila de más indica si hay otra página en el sentido de la lectura
+    result = await db.scalars(
+        keyset_query(stmt, keys, values, reverse=descending != backwards, limit=limit + 1)
+    )
+    items = list(result)
+    more = len(items) > limit
+    items = items[:limit]
+    if backwards:
+        items.reverse()
+    if not items:
+        return Page(items, None, None)
+
+    # Al avanzar siempre hay página anterior si se vino de un cursor, y al retroceder siempre siguiente
+    has_next = more if not backwards else True
+    has_prev = more if backwards else values is not None
+    return Page(
+        items,
+        encode_cursor(keys, items[-1], "next", descending) if has_next else None,
+        encode_cursor(keys, items[0], "prev", descending) if has_prev else None,
+    )
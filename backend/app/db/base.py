@@ -5,4 +5,7 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.siniestro import Siniestro  # noqa
-from app.models.document import Document  # noqa
\ No newline at end of file
+from app.models.document import Document  # noqa
+from app.models.ocr_job import OCRJob  # noqa
+from app.models.ocr_cache import OCRCacheEntry  # noqa
+from app.models.upload_session import UploadSession, UploadChunk  # noqa
\ No newline at end of file
@@ -1,5 +1,9 @@
 # Inicializa la base de datos con datos necesarios, como el primer usuario administrador.
 
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
@@ -9,12 +13,55 @@ from app.db.base_class import Base
 from sqlalchemy import create_engine
 
 from app.db.session import engine
+from app.models.document import FULLTEXT_DDL
+
+logger = logging.getLogger(__name__)
+
+def upgrade_schema(bind: Engine = engine) -> None:
+    """
+    Lleva las tablas existentes al esquema de los modelos sin Alembic: create_all no
+    modifica tablas ya creadas, así que se añaden las columnas (todas admiten nulos)
+    y los índices que falten, y el índice de texto completo de los documentos. Se
+    puede ejecutar las veces que haga falta.
+    """
+    Base.metadata.create_all(bind=bind)
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logger.warning("No se puede añadir %s.%s: no admite nulos", table.name, column.name)
+                    continue
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+                ))
+                logger.info("Columna añadida: %s.%s", table.name, column.name)
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+        dialect = bind.dialect.name
+        if dialect == "sqlite" and not inspector.has_table("documents_fts"):
+            for statement in FULLTEXT_DDL["sqlite"]:
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')"))
+            logger.info("Índice de texto completo de documentos creado")
+        elif dialect == "postgresql" and "extracted_tsv" not in {
+            column["name"] for column in inspector.get_columns("documents")
+        }:
+            for statement in FULLTEXT_DDL["postgresql"]:
+                connection.execute(text(statement))
+            logger.info("Índice de texto completo de documentos creado")
 
 # create first superuser
 def init_db(db: Session) -> None:
     # Tables should be created with Alembic migrations
-    # But for simplicity in this MVP, create tables directly
-    Base.metadata.create_all(bind=engine)
+    # But for simplicity in this MVP, create tables directly (and upgrade old ones)
+    upgrade_schema(engine)
     
     # Crear usuario administrador
     admin_user = crud.user.get_by_email(db, email="admin@example.com")
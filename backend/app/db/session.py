@@ -1,18 +1,110 @@
 # Configura la conexión a la base de datos y proporciona una función para obtener una sesión.
+#
+# Hay dos motores sobre la misma base de datos: el síncrono (psycopg2 / sqlite3), que
+# usan los endpoints "def", los workers y los scripts, y el asíncrono (asyncpg /
+# aiosqlite) para los endpoints "async def" más frecuentes, que así no ocupan un hilo
+# del threadpool mientras esperan a la base de datos. El asíncrono se crea en el
+# primer uso para que los procesos que no lo necesitan no requieran su driver.
+
+import asyncio
+from typing import Any, AsyncGenerator, Dict, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Driver asíncrono para cada base de datos
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _pool_options(url: str) -> Dict[str, Any]:
+    parsed = make_url(url)
+    options: Dict[str, Any] = {}
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            # SQLite en memoria: una sola conexión compartida, sin pool que configurar
+            return options
+        if parsed.get_driver_name() == "aiosqlite":
+            # Por defecto aiosqlite abre una conexión (con su hilo) por sesión y la cierra
+            # al terminar. Con pool, esos hilos viven hasta dispose_async_engine
+            if not settings.DB_SQLITE_ASYNC_POOL:
+                return options
+            options["poolclass"] = AsyncAdaptedQueuePool
+    return {
+        **options,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url() -> str:
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    url = make_url(settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No hay driver asíncrono para {backend}; defina DATABASE_ASYNC_URL")
+    return url.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.DATABASE_URL, **_pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_session_factory, _async_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _async_engine is not None and loop is not _async_loop:
+        # Las conexiones del pool pertenecen al event loop que las abrió (TestClient y
+        # anyio.run crean uno nuevo): se abandonan sin cerrarlas desde este
+        _async_engine.sync_engine.dispose(close=False)
+        _async_engine = None
+    if _async_engine is None:
+        _async_loop = loop
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **_pool_options(url))
+        # Sin expirar al confirmar: los objetos se siguen leyendo tras el commit sin otra consulta
+        _async_session_factory = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None and _async_loop is asyncio.get_running_loop():
+        await _async_engine.dispose()
+        _async_engine = _async_session_factory = None
+
 # Función para obtener una sesión de DB
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Sesión asíncrona para los endpoints "async def"
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
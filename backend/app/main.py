@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api import api_router
+from app.api.pagination import CURSOR_HEADERS
 from app.core.config import settings
+from app.db.session import dispose_async_engine
+from app.services.ocr.engine import ocr_engine
+from app.services.storage.blobs import blob_store
 
 app = FastAPI(
     title="Siniestros API",
@@ -18,10 +22,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=CURSOR_HEADERS,
 )
 
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+def start_ocr_engine():
+    ocr_engine.start()
+
+@app.on_event("shutdown")
+def stop_ocr_engine():
+    ocr_engine.shutdown()
+
+@app.on_event("shutdown")
+async def close_storage():
+    # Cierra las conexiones abiertas con S3
+    await blob_store.aclose()
+
+@app.on_event("shutdown")
+async def close_database():
+    # Cierra las conexiones del pool asíncrono
+    await dispose_async_engine()
+
 @app.get("/")
 def read_root():
     return {"message": "Bienvenido a la API de Gestión de Siniestros"}
@@ -2,4 +2,7 @@
 
 from .user import User
 from .siniestro import Siniestro
-from .document import Document
\ No newline at end of file
+from .document import Document
+from .ocr_job import OCRJob
+from .ocr_cache import OCRCacheEntry
+from .upload_session import UploadSession, UploadChunk
\ No newline at end of file
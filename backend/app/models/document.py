@@ -1,12 +1,16 @@
 # Define el modelo SQLAlchemy para documentos asociados a siniestros.
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import BigInteger, Column, DDL, Index, Integer, String, DateTime, ForeignKey, Text, Boolean, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Documentos de un siniestro, paginados por cursor
+        Index("ix_documents_siniestro_id_id", "siniestro_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -14,7 +18,57 @@ class Document(Base):
     upload_date = Column(DateTime, default=datetime.utcnow)
     document_type = Column(String, index=True)
     validated = Column(Boolean, default=False)
+    # Calculados al recibir el archivo
+    sha256 = Column(String(64), index=True, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    # Archivo tal como se subió, si se guardó una copia recomprimida (original_path
+    # solo si se conserva)
+    original_name = Column(String, nullable=True)
+    original_sha256 = Column(String(64), index=True, nullable=True)
+    original_size_bytes = Column(BigInteger, nullable=True)
+    original_path = Column(String, nullable=True)
+    # Texto obtenido por OCR, indexado para la búsqueda de texto completo
+    extracted_text = Column(Text, nullable=True)
     
     # Relaciones
     siniestro_id = Column(Integer, ForeignKey("siniestros.id"))
-    siniestro = relationship("Siniestro", back_populates="documentos")
\ No newline at end of file
+    siniestro = relationship("Siniestro", back_populates="documentos")
+    ocr_jobs = relationship("OCRJob", back_populates="document")
+
+    @property
+    def original_kept(self) -> bool:
+        return self.original_path is not None
+
+
+# Índices de texto completo, creados junto con la tabla según la base de datos
+# (app.db.init_db.upgrade_schema los añade a las tablas creadas antes de existir).
+FULLTEXT_DDL = {
+    # PostgreSQL: columna tsvector generada (no se recalcula al ordenar por relevancia) con GIN
+    "postgresql": [
+        "ALTER TABLE documents ADD COLUMN extracted_tsv tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('spanish', coalesce(extracted_text, ''))) STORED",
+        "CREATE INDEX ix_documents_extracted_tsv ON documents USING GIN (extracted_tsv)",
+    ],
+    # SQLite: tabla FTS5 con el contenido en documents, sincronizada con triggers
+    "sqlite": [
+        "CREATE VIRTUAL TABLE documents_fts USING fts5("
+        "extracted_text, content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER documents_fts_insert AFTER INSERT ON documents BEGIN "
+        "INSERT INTO documents_fts(rowid, extracted_text) VALUES (new.id, new.extracted_text); END",
+        "CREATE TRIGGER documents_fts_delete AFTER DELETE ON documents BEGIN "
+        "INSERT INTO documents_fts(documents_fts, rowid, extracted_text) "
+        "VALUES ('delete', old.id, old.extracted_text); END",
+        "CREATE TRIGGER documents_fts_update AFTER UPDATE OF extracted_text ON documents BEGIN "
+        "INSERT INTO documents_fts(documents_fts, rowid, extracted_text) "
+        "VALUES ('delete', old.id, old.extracted_text); "
+        "INSERT INTO documents_fts(rowid, extracted_text) VALUES (new.id, new.extracted_text); END",
+    ],
+}
+for dialect, statements in FULLTEXT_DDL.items():
+    for statement in statements:
+        event.listen(Document.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+event.listen(
+    Document.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS documents_fts").execute_if(dialect="sqlite"),
+)
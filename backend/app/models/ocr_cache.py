@@ -0,0 +1,24 @@
+# Define el modelo SQLAlchemy para la caché de resultados de OCR.
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from datetime import datetime
+from app.db.base_class import Base
+
+class OCRCacheEntry(Base):
+    __tablename__ = "ocr_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "content_hash", "document_type", "engine_version",
+            name="uq_ocr_cache_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), index=True, nullable=False)  # SHA-256 del archivo
+    document_type = Column(String, nullable=False)
+    engine_version = Column(String, nullable=False)
+    result = Column(JSON)
+    size_bytes = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,35 @@
+# Define el modelo SQLAlchemy para trabajos de OCR en segundo plano.
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base_class import Base
+
+# Estados de un trabajo
+PENDIENTE = "pendiente"
+EN_PROCESO = "en_proceso"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+
+class OCRJob(Base):
+    __tablename__ = "ocr_jobs"
+    __table_args__ = (
+        # Índice para que los workers encuentren rápido el siguiente trabajo disponible
+        Index("ix_ocr_jobs_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, index=True, default=PENDIENTE)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relaciones
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True)
+    document = relationship("Document", back_populates="ocr_jobs")
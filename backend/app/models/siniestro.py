@@ -1,12 +1,23 @@
 # Define el modelo SQLAlchemy para siniestros.
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
 
 class Siniestro(Base):
     __tablename__ = "siniestros"
+    __table_args__ = (
+        # Listado paginado por cursor de los siniestros de un usuario
+        Index("ix_siniestros_owner_id_id", "owner_id", "id"),
+        # Sus siniestros por fecha de reporte (orden y rango de fechas)
+        Index("ix_siniestros_owner_id_fecha_reporte", "owner_id", "fecha_reporte", "id"),
+        # Listado de agentes ordenado o acotado por fechas
+        Index("ix_siniestros_fecha_reporte_id", "fecha_reporte", "id"),
+        Index("ix_siniestros_fecha_siniestro_id", "fecha_siniestro", "id"),
+        # Bandeja de agentes filtrada por estado y prioridad
+        Index("ix_siniestros_estado_prioridad", "estado", "prioridad", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     numero_poliza = Column(String, index=True)
@@ -21,4 +32,4 @@ class Siniestro(Base):
     # Relaciones
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="siniestros")
-    documentos = relationship("Document", back_populates="siniestro")
\ No newline at end of file
+    documentos = relationship("Document", back_populates="siniestro", order_by="Document.id")
\ No newline at end of file
@@ -0,0 +1,44 @@
+# Define los modelos SQLAlchemy para subidas reanudables por partes.
+
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base_class import Base
+
+# Estados de una sesión
+ACTIVA = "activa"
+FINALIZANDO = "finalizando"
+COMPLETADA = "completada"
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # Identificador aleatorio: la URL de la sesión no se puede adivinar
+    id = Column(String(32), primary_key=True, index=True)
+    name = Column(String)
+    document_type = Column(String)
+    size_bytes = Column(BigInteger)
+    # Hash esperado, opcional; se comprueba al finalizar
+    sha256 = Column(String(64), nullable=True)
+    status = Column(String, index=True, default=ACTIVA)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Se prolonga con cada parte recibida
+    expires_at = Column(DateTime, index=True)
+    
+    # Relaciones
+    siniestro_id = Column(Integer, ForeignKey("siniestros.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    chunks = relationship("UploadChunk", cascade="all, delete-orphan", passive_deletes=True)
+
+class UploadChunk(Base):
+    """Rango de bytes ya escrito en el archivo de la sesión"""
+    __tablename__ = "upload_chunks"
+    __table_args__ = (
+        Index("ix_upload_chunks_session_offset", "session_id", "offset"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(32), ForeignKey("upload_sessions.id", ondelete="CASCADE"))
+    offset = Column(BigInteger)
+    length = Column(BigInteger)
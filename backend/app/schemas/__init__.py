@@ -1,6 +1,8 @@
 # Exporta todos los esquemas para fácil importación.
 
-from .token import Token, TokenPayload
+from .token import DownloadToken, DownloadTokenRequest, Token, TokenPayload
 from .user import User, UserCreate, UserUpdate
-from .siniestro import Siniestro, SiniestroCreate, SiniestroUpdate
-from .document import Document, DocumentCreate, DocumentUpdate
\ No newline at end of file
+from .siniestro import Siniestro, SiniestroCreate, SiniestroUpdate, SiniestroStats, SiniestroDetail
+from .document import Document, DocumentCreate, DocumentUpdate, DocumentSearchResult
+from .ocr_job import OCRJob
+from .upload_session import UploadSession, UploadSessionCreate
\ No newline at end of file
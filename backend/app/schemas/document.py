@@ -26,10 +26,27 @@ class DocumentInDBBase(DocumentBase):
     upload_date: datetime
     validated: bool
     siniestro_id: int
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
+    original_name: Optional[str] = None
+    original_size_bytes: Optional[int] = None
+    original_kept: bool = False
 
     class Config:
         from_attributes = True
 
 # Return schema
 class Document(DocumentInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+# Resultado de la búsqueda de texto completo
+class DocumentSearchResult(BaseModel):
+    id: int
+    name: Optional[str] = None
+    document_type: Optional[str] = None
+    siniestro_id: int
+    numero_poliza: Optional[str] = None
+    asegurado: Optional[str] = None
+    rank: float
+    # HTML escapado con los términos encontrados entre <mark> y </mark>
+    snippet: Optional[str] = None
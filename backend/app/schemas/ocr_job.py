@@ -0,0 +1,19 @@
+# Define esquemas para consultar el estado de los trabajos de OCR.
+
+from typing import Any, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+# Return schema
+class OCRJob(BaseModel):
+    id: int
+    document_id: int
+    status: str
+    attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,9 +1,11 @@
 # Define esquemas para validación y serialización de siniestros.
 
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from pydantic import BaseModel
 
+from .document import Document
+
 # Base schema
 class SiniestroBase(BaseModel):
     numero_poliza: Optional[str] = None
@@ -35,4 +37,14 @@ class SiniestroInDBBase(SiniestroBase):
 
 # Return schema
 class Siniestro(SiniestroInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+# Siniestro con sus documentos
+class SiniestroDetail(Siniestro):
+    documentos: List[Document] = []
+
+# Estadísticas del dashboard
+class SiniestroStats(BaseModel):
+    total: int
+    por_estado: Dict[str, int]
+    por_prioridad: Dict[str, int]
@@ -8,4 +8,13 @@ class Token(BaseModel):
     token_type: str
 
 class TokenPayload(BaseModel):
-    sub: Optional[int] = None
\ No newline at end of file
+    sub: Optional[int] = None
+    scope: Optional[str] = None
+    path: Optional[str] = None
+
+class DownloadTokenRequest(BaseModel):
+    path: str
+
+class DownloadToken(BaseModel):
+    token: str
+    expires_in: int
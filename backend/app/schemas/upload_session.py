@@ -0,0 +1,31 @@
+# Define esquemas para las subidas reanudables por partes.
+
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+# Create schema
+class UploadSessionCreate(BaseModel):
+    siniestro_id: int
+    document_type: str
+    name: str
+    size_bytes: int = Field(..., gt=0)
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+# Return schema
+class UploadSession(BaseModel):
+    id: str
+    siniestro_id: int
+    document_type: str
+    name: str
+    size_bytes: int
+    status: str
+    created_at: datetime
+    expires_at: datetime
+    document_id: Optional[int] = None
+    # Progreso: bytes recibidos y rangos [inicio, fin) que faltan por enviar
+    received_bytes: int = 0
+    missing_ranges: List[List[int]] = []
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,81 @@
+# Caché de resultados de OCR indexada por SHA-256 del archivo, tipo de documento y versión del motor.
+
+import hashlib
+import threading
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.ocr import processing
+
+# Se incrementa cada vez que cambia la forma de extraer el texto o los datos,
+# para que los resultados guardados con la versión anterior dejen de usarse.
+# 7: Tesseract se ejecuta con una instancia persistente por proceso (otra configuración
+# de llamada que puede variar el texto reconocido respecto a las invocaciones sueltas)
+ENGINE_VERSION = "7"
+
+# Resultados guardados por este proceso desde la última limpieza. La limpieza cuenta y
+# suma toda la tabla, así que no se lanza en cada fallo de caché sino cada
+# OCR_CACHE_EVICT_EVERY resultados: los límites pueden superarse en ese margen por proceso
+_stored_since_evict = 0
+_evict_lock = threading.Lock()
+
+
+def content_hash(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+
+def _cache_type(document_type: Optional[str]) -> str:
+    return processing.normalize_document_type(document_type) or "texto"
+
+
+def lookup(db: Session, *, content_hash: str, document_type: Optional[str]) -> Optional[Any]:
+    """Devuelve el resultado guardado del OCR o None si no está en caché"""
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    entry = crud.ocr_cache.get_by_key(
+        db,
+        content_hash=content_hash,
+        document_type=_cache_type(document_type),
+        engine_version=ENGINE_VERSION,
+        touch_after=timedelta(minutes=settings.OCR_CACHE_TOUCH_MINUTES),
+    )
+    return entry.result if entry else None
+
+
+def store(db: Session, *, content_hash: str, document_type: Optional[str], result: Any) -> None:
+    # Los errores no se guardan para que se reintente el OCR en la siguiente petición
+    if not settings.OCR_CACHE_ENABLED or processing.is_error_result(result):
+        return
+    crud.ocr_cache.put(
+        db,
+        content_hash=content_hash,
+        document_type=_cache_type(document_type),
+        engine_version=ENGINE_VERSION,
+        result=result,
+    )
+    if _should_evict():
+        evict(db)
+
+
+def _should_evict() -> bool:
+    global _stored_since_evict
+    with _evict_lock:
+        _stored_since_evict += 1
+        if _stored_since_evict < settings.OCR_CACHE_EVICT_EVERY:
+            return False
+        _stored_since_evict = 0
+        return True
+
+
+def evict(db: Session) -> int:
+    """Aplica la caducidad y los límites de tamaño; devuelve las entradas eliminadas"""
+    return crud.ocr_cache.evict(
+        db,
+        max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+        max_bytes=settings.OCR_CACHE_MAX_BYTES,
+        ttl_days=settings.OCR_CACHE_TTL_DAYS,
+    )
@@ -0,0 +1,149 @@
+# Ejecuta las llamadas a OCRService en un pool de procesos para no bloquear el event loop.
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ocr import metrics
+
+logger = logging.getLogger(__name__)
+
+# Métodos de OCRService que se pueden invocar desde el pool
+ALLOWED_METHODS = {
+    "extract_text_from_image",
+    "extract_data_from_ine",
+    "extract_data_from_poliza",
+    "page_count",
+    "read_page",
+    "merge_pages",
+}
+
+# Cada proceso del pool mantiene su propia instancia "caliente" de OCRService
+_worker_service = None
+
+
+def _init_worker() -> None:
+    global _worker_service
+    from app.services.ocr.service import OCRService
+
+    _worker_service = OCRService()
+    if settings.OCR_WARMUP:
+        _worker_service.warm_up()
+
+
+def _ping() -> bool:
+    return True
+
+
+def _call_service(method: str, *args: Any) -> Tuple[Any, Dict[str, int]]:
+    # Los contadores de la cascada viajan con el resultado para sumarlos en la API
+    result = getattr(_worker_service, method)(*args)
+    return result, metrics.drain()
+
+
+class OCRTimeoutError(Exception):
+    pass
+
+
+class OCRDisabledError(Exception):
+    pass
+
+
+class OCREngine:
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_workers = max_workers or settings.OCR_WORKERS
+        self.timeout = timeout or settings.OCR_TIMEOUT_SECONDS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._executor is not None or not settings.OCR_ENABLED:
+            return
+        # "spawn" evita heredar el estado del servidor (hilos, conexiones) en los workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        logger.info("Pool de OCR iniciado con %s procesos", self.max_workers)
+        if settings.OCR_WARMUP:
+            # Los procesos se crean al recibir trabajo; se les envía uno vacío para
+            # que arranquen y carguen los modelos antes de la primera petición
+            for _ in range(self.max_workers):
+                self._executor.submit(_ping)
+
+    def shutdown(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    async def run(self, method: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Ejecuta un método de OCRService en el pool y espera el resultado sin bloquear.
+        Si se agota el tiempo o se cancela la petición, la tarea se cancela en el pool
+        cuando aún no ha empezado; si ya está corriendo, su resultado se descarta.
+        """
+        if not settings.OCR_ENABLED:
+            raise OCRDisabledError("El OCR está deshabilitado en este servidor")
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f"Método OCR no permitido: {method}")
+        if self._executor is None:
+            self.start()
+
+        future = self._executor.submit(_call_service, method, *args)
+        try:
+            result, counts = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise OCRTimeoutError(
+                f"El procesamiento OCR excedió {timeout or self.timeout} segundos"
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            # Un worker murió (p. ej. por falta de memoria); se recrea el pool
+            logger.error("El pool de OCR se rompió, reiniciando")
+            self.shutdown()
+            self.start()
+            raise
+        metrics.merge(counts)
+        return result
+
+    async def run_pages(
+        self, document_type: Optional[str], path: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        OCR de un PDF o TIFF multipágina repartiendo las páginas entre los procesos.
+        Los workers abren el archivo desde disco y rasterizan una página cada vez, y
+        como mucho hay dos páginas por proceso en vuelo, así la memoria no crece con
+        el número de páginas. El timeout se aplica a cada página.
+        """
+        total = await self.run("page_count", path, timeout=timeout)
+        semaphore = asyncio.Semaphore(self.max_workers * 2)
+
+        async def read(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.run("read_page", path, index, document_type, timeout=timeout)
+
+        tasks = [asyncio.ensure_future(read(index)) for index in range(total)]
+        try:
+            page_results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        merged = await self.run("merge_pages", document_type, page_results, timeout=timeout)
+        return {
+            "pages": [{"page": p["page"], "text": p["text"]} for p in page_results],
+            "result": merged,
+        }
+
+
+ocr_engine = OCREngine()
@@ -0,0 +1,118 @@
+# Extrae campos del texto de OCR con una única pasada por tipo de documento.
+#
+# Cada tipo de documento declara sus campos como pares (etiqueta, valor). Todas las
+# expresiones se compilan una sola vez en una alternancia y el texto se recorre con
+# un solo finditer. El valor se captura dentro de un lookahead,
+# así la coincidencia solo consume la etiqueta y un valor largo (una línea entera)
+# no impide encontrar otra etiqueta dentro de él.
+#
+# Para un tipo nuevo (factura, acta...) basta con registrar otro FieldExtractor:
+#
+#     register(FieldExtractor("factura", [
+#         FieldPattern("rfc", r"R\.?F\.?C\.?[\s:]*", r"[A-Z&Ñ]{3,4}[0-9]{6}[A-Z0-9]{3}"),
+#     ]))
+
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class FieldPattern(NamedTuple):
+    field: str
+    label: str  # Expresión que se consume (etiqueta o ancla), en mayúsculas y sin grupos
+    value: str  # Expresión del valor, se captura sin consumirla
+    priority: int = 0  # Si varias expresiones dan el mismo campo gana la de menor prioridad
+
+
+class FieldExtractor:
+    """
+    El texto se pasa a mayúsculas una vez y la alternancia no usa IGNORECASE ni
+    grupos alrededor de cada rama: así cada rama empieza por un literal y el motor
+    de re salta directamente a las posiciones donde puede empezar una etiqueta.
+    La rama que coincidió se identifica por el índice de su grupo de valor.
+    """
+
+    def __init__(
+        self,
+        document_type: str,
+        patterns: List[FieldPattern],
+        flags: int = re.MULTILINE,
+        clean: Callable[[str], str] = str.strip,
+    ):
+        self.document_type = document_type
+        self.fields = list(dict.fromkeys(p.field for p in patterns))
+        self.clean = clean
+        # Índice del grupo de valor -> expresión a la que pertenece
+        self._patterns: Dict[int, FieldPattern] = {}
+
+        alternatives = []
+        group_index = 0
+        for pattern in patterns:
+            if re.compile(pattern.label).groups:
+                raise ValueError(f"La etiqueta de {pattern.field} no puede tener grupos")
+            alternatives.append(f"{pattern.label}(?=({pattern.value}))")
+            group_index += 1
+            self._patterns[group_index] = pattern
+            group_index += re.compile(pattern.value).groups
+        self.regex = re.compile("|".join(alternatives), flags)
+        self._best_priority = min(p.priority for p in patterns)
+
+    def extract(self, text: str) -> Dict[str, Optional[str]]:
+        data: Dict[str, Optional[str]] = dict.fromkeys(self.fields)
+        priorities: Dict[str, int] = {}
+        upper = text.upper()
+        # Si las mayúsculas cambian la longitud (p. ej. "ß") no se pueden usar las
+        # posiciones sobre el texto original y los valores salen en mayúsculas
+        source = text if len(upper) == len(text) else upper
+        for match in self.regex.finditer(upper):
+            index = match.lastindex
+            pattern = self._patterns[index]
+            if pattern.field in priorities and priorities[pattern.field] <= pattern.priority:
+                continue
+            value = self.clean(source[match.start(index):match.end(index)])
+            if not value:
+                continue
+            data[pattern.field] = value
+            priorities[pattern.field] = pattern.priority
+            if len(priorities) == len(self.fields) and all(
+                priority == self._best_priority for priority in priorities.values()
+            ):
+                break
+        return data
+
+
+EXTRACTORS: Dict[str, FieldExtractor] = {}
+
+
+def register(extractor: FieldExtractor) -> FieldExtractor:
+    EXTRACTORS[extractor.document_type] = extractor
+    return extractor
+
+
+def extract(document_type: str, text: str) -> Dict[str, Optional[str]]:
+    return EXTRACTORS[document_type].extract(text)
+
+
+register(FieldExtractor("poliza", [
+    # El número debe contener al menos un dígito para no tomar "PÓLIZA DE SEGURO"
+    FieldPattern(
+        "numero_poliza",
+        r"P[OÓ]LIZA[\s#:.]*(?:(?:N[OÚ]M(?:ERO)?|NO)\.?[\s#:.]*)?",
+        r"(?=[A-Z/-]*[0-9])[A-Z0-9/-]+",
+    ),
+    FieldPattern("asegurado", r"ASEGURADO[\s:]*", r"[^\n\r]+"),
+    FieldPattern("asegurado", r"NOMBRE[\s:]*", r"[^\n\r]+", priority=1),
+    FieldPattern("vigencia", r"VIGENCIA[\s:]*", r"[^\n\r]+"),
+    FieldPattern("suma_asegurada", r"SUMA\s*ASEGURADA[\s:]*\$?", r"[0-9,.]+"),
+    FieldPattern("prima", r"PRIMA[\s:]*\$?", r"[0-9,.]+"),
+]))
+
+# Una detección de EasyOCR por línea; el texto empieza con "\n" para que las
+# expresiones de línea completa también empiecen por un literal
+register(FieldExtractor("ine", [
+    FieldPattern("nombre", r"NOMBRES?[ \t]*", r"[^\n]{3,}"),
+    FieldPattern("domicilio", r"DOMICILIO[ \t]*", r"[^\n]{3,}"),
+    FieldPattern("clave_elector", r"CLAVE[^\n:;]*ELECTOR[^\n:;]*[:;][ \t]*", r"[^\n]*\S[^\n]*"),
+    # La CURP va antes que la clave sin etiqueta: en una línea de 18 caracteres gana la CURP
+    FieldPattern("curp", r"\n", r"[A-Z]{4}[0-9]{6}[HMX][A-Z]{5}[0-9A-Z]{2}$"),
+    FieldPattern("clave_elector", r"\n", r"[A-Z0-9]{18}$", priority=1),
+]))
@@ -0,0 +1,158 @@
+# OCR por regiones de interés para credenciales INE.
+#
+# La credencial tiene un diseño fijo: se normaliza la orientación y el tamaño de la
+# tarjeta, se recortan solo las zonas de nombre, domicilio, clave de elector y CURP y
+# se apilan en una única imagen para leerlas con una sola llamada al motor de OCR.
+# Cada detección se asigna al campo de la franja en la que cae su centro.
+
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+# Tamaño normalizado de la tarjeta (proporción ID-1: 85.6 x 54 mm)
+TEMPLATE_SIZE = (1012, 638)
+
+# Regiones del anverso como fracciones (izquierda, arriba, derecha, abajo) de la tarjeta
+REGIONS: Dict[str, Tuple[float, float, float, float]] = {
+    "nombre": (0.28, 0.22, 0.72, 0.44),
+    "domicilio": (0.28, 0.43, 0.80, 0.63),
+    "clave_elector": (0.28, 0.62, 0.80, 0.70),
+    "curp": (0.28, 0.69, 0.70, 0.77),
+}
+
+# Separación en píxeles entre franjas para que una detección no abarque dos regiones
+REGION_GAP = 24
+
+# Diferencia mínima con el color de fondo para considerar que un píxel es tarjeta
+_BACKGROUND_THRESHOLD = 40
+
+_CURP = re.compile(r"[A-Z]{4}[0-9]{6}[HMX][A-Z]{5}[0-9A-Z]{2}")
+_CLAVE_ELECTOR = re.compile(r"[A-Z]{6}[0-9]{8}[HMX][0-9]{3}")
+_LABELS = re.compile(r"\b(NOMBRES?|DOMICILIO|CLAVE DE ELECTOR|CURP)\b[:;]?")
+
+
+def _card_bbox(gray: Image.Image) -> Tuple[int, int, int, int]:
+    """Recuadro de la tarjeta dentro de la foto, comparando con el color del borde"""
+    sample = gray.copy()
+    sample.thumbnail((400, 400))
+    scale = gray.width / sample.width
+    width, height = sample.size
+    border = (
+        list(sample.crop((0, 0, width, 2)).getdata())
+        + list(sample.crop((0, height - 2, width, height)).getdata())
+    )
+    background = sorted(border)[len(border) // 2]
+    difference = ImageChops.difference(sample, Image.new("L", sample.size, background))
+    bbox = difference.point(lambda v: 255 if v > _BACKGROUND_THRESHOLD else 0).getbbox()
+    # Si no se distingue un recuadro claro se asume que la foto ya es solo la tarjeta
+    if not bbox or (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) < 0.1 * width * height:
+        return (0, 0, gray.width, gray.height)
+    left, top, right, bottom = (round(value * scale) for value in bbox)
+    return (left, top, min(right, gray.width), min(bottom, gray.height))
+
+
+def normalize_card(gray: Image.Image) -> Image.Image:
+    """Recorta la tarjeta, la pone en horizontal y la lleva al tamaño de la plantilla"""
+    gray = gray.crop(_card_bbox(gray))
+    if gray.height > gray.width:
+        gray = gray.rotate(90, expand=True)
+    card = gray.resize(TEMPLATE_SIZE, Image.LANCZOS)
+    # La fotografía del titular (la zona más oscura) va a la izquierda del anverso;
+    # si está a la derecha la tarjeta está de cabeza
+    band = round(REGIONS["nombre"][0] * card.width)
+    left = ImageStat.Stat(card.crop((0, 0, band, card.height))).mean[0]
+    right = ImageStat.Stat(card.crop((card.width - band, 0, card.width, card.height))).mean[0]
+    if right < left:
+        card = card.rotate(180)
+    return card
+
+
+def build_strip(card: Image.Image) -> Tuple[Image.Image, List[Tuple[str, int, int]]]:
+    """
+    Apila las regiones de la tarjeta en una sola imagen. Devuelve la imagen y, para
+    cada campo, la franja vertical (arriba, abajo) que ocupa.
+    """
+    crops = []
+    for field, (left, top, right, bottom) in REGIONS.items():
+        box = (
+            round(left * card.width),
+            round(top * card.height),
+            round(right * card.width),
+            round(bottom * card.height),
+        )
+        crops.append((field, card.crop(box)))
+
+    width = max(crop.width for _, crop in crops)
+    height = sum(crop.height for _, crop in crops) + REGION_GAP * (len(crops) + 1)
+    strip = Image.new("L", (width, height), 255)
+    bands = []
+    top = REGION_GAP
+    for field, crop in crops:
+        strip.paste(crop, (0, top))
+        bands.append((field, top, top + crop.height))
+        top += crop.height + REGION_GAP
+    return strip, bands
+
+
+def select_bands(
+    strip: Image.Image, bands: List[Tuple[str, int, int]], fields: Sequence[str]
+) -> Tuple[Image.Image, List[Tuple[str, int, int]]]:
+    """Franja reducida solo con los campos indicados, para releerlos con otro motor"""
+    selected = [(field, top, bottom) for field, top, bottom in bands if field in fields]
+    height = sum(bottom - top for _, top, bottom in selected) + REGION_GAP * (len(selected) + 1)
+    result = Image.new("L", (strip.width, height), 255)
+    new_bands = []
+    offset = REGION_GAP
+    for field, top, bottom in selected:
+        result.paste(strip.crop((0, top, strip.width, bottom)), (0, offset))
+        new_bands.append((field, offset, offset + bottom - top))
+        offset += bottom - top + REGION_GAP
+    return result, new_bands
+
+
+def assign(
+    detections: Sequence[Tuple[Any, str, float]], bands: List[Tuple[str, int, int]]
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Agrupa las detecciones (caja, texto, confianza) por campo, en orden de lectura.
+    Las cajas vienen como lista de cuatro puntos (formato de EasyOCR).
+    """
+    placed: Dict[str, List[Tuple[float, float, str, float]]] = {field: [] for field, _, _ in bands}
+    for box, text, confidence in detections:
+        xs = [point[0] for point in box]
+        ys = [point[1] for point in box]
+        center_y = (min(ys) + max(ys)) / 2
+        for field, top, bottom in bands:
+            if top <= center_y <= bottom:
+                placed[field].append((min(ys), min(xs), text, confidence))
+                break
+    return {
+        field: [(text, confidence) for _, _, text, confidence in sorted(items)]
+        for field, items in placed.items()
+    }
+
+
+def region_confidence(items: List[Tuple[str, float]]) -> float:
+    """Confianza media de las palabras de una región, ponderada por su longitud"""
+    total = sum(len(text) for text, _ in items)
+    if not total:
+        return 0.0
+    return sum(len(text) * confidence for text, confidence in items) / total
+
+
+def parse_regions(regions: Dict[str, List[Tuple[str, float]]]) -> Dict[str, Any]:
+    def joined(field: str) -> str:
+        text = " ".join(text for text, _ in regions.get(field, [])).upper()
+        return " ".join(_LABELS.sub(" ", text).split())
+
+    compact_curp = joined("curp").replace(" ", "")
+    compact_clave = joined("clave_elector").replace(" ", "")
+    curp = _CURP.search(compact_curp)
+    clave = _CLAVE_ELECTOR.search(compact_clave)
+    return {
+        "nombre": joined("nombre") or None,
+        "domicilio": joined("domicilio") or None,
+        "clave_elector": clave.group(0) if clave else None,
+        "curp": curp.group(0) if curp else None,
+    }
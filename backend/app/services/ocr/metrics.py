@@ -0,0 +1,66 @@
+# Contadores de la cascada de motores de OCR: cuántos documentos se resuelven solo con
+# Tesseract y cuántos se escalan a EasyOCR (y por qué campos).
+#
+# Cada proceso acumula sus propios contadores. Los procesos del pool devuelven los
+# acumulados (drain) junto con cada resultado y la API los suma (merge) a los suyos,
+# así snapshot() en la API refleja todo el OCR hecho por sus workers.
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable
+
+_counts: Counter = Counter()
+_lock = threading.Lock()
+
+_ESCALATED_FIELDS = "campos_escalados"
+
+
+def record(document_type: str, path: str, escalated_fields: Iterable[str] = ()) -> None:
+    with _lock:
+        _counts[f"{document_type}.{path}"] += 1
+        for field in escalated_fields:
+            _counts[f"{document_type}.{_ESCALATED_FIELDS}.{field}"] += 1
+
+
+def drain() -> Dict[str, int]:
+    """Devuelve los contadores acumulados desde la última llamada y los pone a cero"""
+    with _lock:
+        delta = dict(_counts)
+        _counts.clear()
+    return delta
+
+
+def merge(delta: Dict[str, int]) -> None:
+    if not delta:
+        return
+    with _lock:
+        _counts.update(delta)
+
+
+def reset() -> None:
+    with _lock:
+        _counts.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Contadores agrupados por tipo de documento, con el porcentaje de documentos que
+    necesitaron EasyOCR (los caminos cuyo nombre empieza por "easyocr").
+    """
+    with _lock:
+        counts = dict(_counts)
+    report: Dict[str, Any] = {}
+    for key, value in sorted(counts.items()):
+        document_type, _, rest = key.partition(".")
+        entry = report.setdefault(
+            document_type, {"total": 0, "caminos": {}, _ESCALATED_FIELDS: {}}
+        )
+        if rest.startswith(f"{_ESCALATED_FIELDS}."):
+            entry[_ESCALATED_FIELDS][rest.split(".", 1)[1]] = value
+        else:
+            entry["caminos"][rest] = value
+            entry["total"] += value
+    for entry in report.values():
+        escalated = sum(v for path, v in entry["caminos"].items() if path.startswith("easyocr"))
+        entry["tasa_escalado"] = escalated / entry["total"] if entry["total"] else 0.0
+    return report
@@ -0,0 +1,75 @@
+# Lectura página a página de documentos con varias páginas (PDF y TIFF multipágina).
+
+import io
+from typing import Optional, Union
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.ocr.processing import PDF_MAGIC
+
+Source = Union[str, bytes]
+
+
+def _open_pdf(source: Source):
+    try:
+        import pypdfium2
+    except ImportError:
+        raise RuntimeError("pypdfium2 no está instalado; no se pueden procesar archivos PDF")
+    return pypdfium2.PdfDocument(source)
+
+
+def _open_image(source: Source) -> Image.Image:
+    if isinstance(source, bytes):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+
+def _header(source: Source) -> bytes:
+    if isinstance(source, bytes):
+        return source[:4]
+    with open(source, "rb") as file:
+        return file.read(4)
+
+
+def page_count(source: Source) -> int:
+    if _header(source).startswith(PDF_MAGIC):
+        pdf = _open_pdf(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    with _open_image(source) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def render_page(source: Source, index: int, max_side: Optional[int] = None) -> Image.Image:
+    """
+    Rasteriza una sola página. Solo esa página queda en memoria, de modo que el
+    consumo no depende del número de páginas del documento.
+
+    Con max_side la página se obtiene ya reducida (para vistas previas): los PDF se
+    rasterizan a la escala justa y los JPEG se decodifican a menor resolución.
+    """
+    if _header(source).startswith(PDF_MAGIC):
+        pdf = _open_pdf(source)
+        try:
+            page = pdf[index]
+            try:
+                scale = settings.OCR_PDF_DPI / 72
+                if max_side:
+                    scale = max_side / max(page.get_size())
+                bitmap = page.render(scale=scale)
+                return bitmap.to_pil()
+            finally:
+                page.close()
+        finally:
+            pdf.close()
+    with _open_image(source) as image:
+        image.seek(index)
+        if max_side:
+            # draft necesita el tamaño mínimo de ambos lados, no la caja donde debe caber
+            scale = max_side / max(image.size)
+            if scale < 1:
+                image.draft("RGB", (round(image.width * scale), round(image.height * scale)))
+        return image.copy()
@@ -0,0 +1,106 @@
+# Reglas compartidas para procesar un documento con OCR (endpoints y workers de trabajos).
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+SUPPORTED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.webp', '.pdf', '.tif', '.tiff']
+
+PDF_MAGIC = b"%PDF"
+TIFF_MAGIC = (b"II*\x00", b"MM\x00*")
+
+
+def is_supported_file(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def is_paged(header: bytes) -> bool:
+    """
+    Los PDF y TIFF se procesan página a página. Basta con los primeros bytes del
+    archivo, así la API decide sin abrir la imagen.
+    """
+    return header.startswith(PDF_MAGIC) or header.startswith(TIFF_MAGIC)
+
+
+def normalize_document_type(document_type: Optional[str]) -> Optional[str]:
+    """Devuelve "ine", "poliza" o None para cualquier otro tipo de documento"""
+    if not document_type:
+        return None
+    document_type = document_type.lower()
+    if document_type == "ine":
+        return "ine"
+    if document_type in ("póliza", "poliza"):
+        return "poliza"
+    return None
+
+
+def ocr_method_for(document_type: Optional[str]) -> str:
+    """Nombre del método de OCRService que corresponde al tipo de documento"""
+    document_type = normalize_document_type(document_type)
+    if document_type == "ine":
+        return "extract_data_from_ine"
+    if document_type == "poliza":
+        return "extract_data_from_poliza"
+    return "extract_text_from_image"
+
+
+def split_paged_result(result: Any) -> Tuple[Any, Optional[List[Dict[str, Any]]]]:
+    """
+    Los documentos por páginas guardan {"pages": [...], "result": ...}; devuelve el
+    resultado combinado y la lista de páginas (None para imágenes sueltas).
+    """
+    if isinstance(result, dict) and "pages" in result and "result" in result:
+        return result["result"], result["pages"]
+    return result, None
+
+
+def is_error_result(result: Any) -> bool:
+    """OCRService devuelve los errores como resultado en lugar de lanzar excepciones"""
+    result, _ = split_paged_result(result)
+    if isinstance(result, dict):
+        return "error" in result
+    return result == "Error al procesar la imagen"
+
+
+def searchable_text(result: Any) -> Optional[str]:
+    """
+    Texto que se guarda en el documento para la búsqueda: el de todas las páginas
+    en PDF/TIFF y, en imágenes sueltas, el texto o los valores de los campos.
+    """
+    if is_error_result(result):
+        return None
+    result, pages = split_paged_result(result)
+    if pages:
+        return "\f".join(page["text"] for page in pages)
+    if isinstance(result, dict):
+        return "\n".join(str(value) for value in result.values() if value) or None
+    return result or None
+
+
+def format_result(document_type: Optional[str], result: Any) -> Dict[str, Any]:
+    """Da al resultado del OCR la forma que devuelve la API"""
+    result, pages = split_paged_result(result)
+    if normalize_document_type(document_type) is None:
+        payload = {"text": result}
+    else:
+        payload = {"data": result}
+    if pages is not None:
+        payload["pages"] = pages
+    return payload
+
+
+def siniestro_update_from_result(
+    document_type: Optional[str], result: Any, siniestro: Any
+) -> Dict[str, Any]:
+    """Campos del siniestro que se pueden completar con los datos extraídos"""
+    document_type = normalize_document_type(document_type)
+    result, _ = split_paged_result(result)
+    update_data = {}
+    if document_type == "ine":
+        if result.get("nombre") and not siniestro.asegurado:
+            update_data["asegurado"] = result["nombre"]
+    elif document_type == "poliza":
+        if result.get("numero_poliza") and not siniestro.numero_poliza:
+            update_data["numero_poliza"] = result["numero_poliza"]
+        if result.get("asegurado") and not siniestro.asegurado:
+            update_data["asegurado"] = result["asegurado"]
+    return update_data
@@ -1,94 +1,95 @@
-import pytesseract
 from PIL import Image
+from contextlib import contextmanager
+import importlib.util
 import io
-import numpy as np
-import os
-import re
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple, Union
 
-# Configurar ruta a Tesseract basada en variables de entorno
-import os
-from dotenv import load_dotenv
+from app.core.config import settings
+from app.services.ocr import fields, ine_roi, metrics, pages, preprocessing
+from app.services.ocr.tesseract import get_tesseract
 
-load_dotenv()
+# numpy y easyocr (con torch) se importan en el primer uso, no al importar este
+# módulo. El lector de EasyOCR se comparte entre todas las instancias del proceso;
+# Tesseract se obtiene de app.services.ocr.tesseract.
+_easyocr_reader = None
+_easyocr_lock = threading.Lock()
 
-TESSERACT_PATH = os.getenv('TESSERACT_PATH', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+# Campos que deben salir del motor rápido para no escalar a EasyOCR
+REQUIRED_FIELDS = {
+    "ine": tuple(ine_roi.REGIONS),
+    "poliza": ("numero_poliza", "asegurado"),
+}
+
+def get_easyocr_reader():
+    global _easyocr_reader
+    if _easyocr_reader is None:
+        with _easyocr_lock:
+            if _easyocr_reader is None:
+                import easyocr
+                _easyocr_reader = easyocr.Reader(['es'])
+    return _easyocr_reader
 
 class OCRService:
     def __init__(self):
-        try:
-            # Importar EasyOCR solo si está instalado
-            import easyocr
-            self.reader = easyocr.Reader(['es'])
-            self.has_easyocr = True
-        except ImportError:
-            self.has_easyocr = False
+        # Solo se comprueba si EasyOCR está instalado; el modelo se carga al usarlo
+        self.has_easyocr = importlib.util.find_spec("easyocr") is not None
+        if not self.has_easyocr:
             print("EasyOCR no está instalado. Algunas funciones no estarán disponibles.")
+        # Milisegundos por etapa (preprocesado y motor) de la última imagen procesada
+        self.last_timings: Dict[str, float] = {}
+    
+    @property
+    def reader(self):
+        return get_easyocr_reader()
+    
+    def warm_up(self) -> None:
+        """Carga por adelantado los motores para que la primera petición no pague el coste"""
+        get_tesseract()
+        if self.has_easyocr:
+            self.reader
     
     def extract_text_from_image(self, image_bytes: bytes) -> str:
-        """Extrae texto de una imagen usando pytesseract"""
+        """Extrae texto de una imagen usando Tesseract"""
         try:
             image = Image.open(io.BytesIO(image_bytes))
-            text = pytesseract.image_to_string(image, lang='spa')
-            return text
+            return self._read_text(image)
         except Exception as e:
             print(f"Error al extraer texto: {str(e)}")
             return "Error al procesar la imagen"
     
     def extract_data_from_ine(self, image_bytes: bytes) -> Dict[str, Any]:
         """Extrae datos específicos de una INE (credencial de elector mexicana)"""
-        if not self.has_easyocr:
+        if not self.has_easyocr and not settings.OCR_CASCADE_ENABLED:
             return {"error": "EasyOCR no está instalado"}
         
         try:
             image = Image.open(io.BytesIO(image_bytes))
+            if settings.OCR_INE_MODE == "roi":
+                data, path, escalated = self._extract_ine_roi(image)
+                # Si la plantilla no encaja (foto muy recortada, reverso...) se lee la imagen
+                # completa; solo se cuenta el camino cuyo resultado se devuelve
+                if sum(value is not None for value in data.values()) >= 2:
+                    metrics.record("ine", path, escalated)
+                    return data
+            if not settings.OCR_CASCADE_ENABLED:
+                metrics.record("ine", "easyocr_completo")
+                return self.parse_ine_lines(self._read_easyocr_lines(image))
             
-            # Usar EasyOCR para mejor reconocimiento de datos de INE
-            result = self.reader.readtext(np.array(image))
-            
-            # Extraer información específica
-            data = {
-                "nombre": None,
-                "domicilio": None,
-                "clave_elector": None,
-                "curp": None,
-            }
-            
-            # Mejorar detección de nombre
-            for detection in result:
-                text = detection[1].upper()
-                
-                # Nombre normalmente después de "NOMBRE"
-                if "NOMBRE" in text:
-                    # Buscar texto después de "NOMBRE"
-                    name_match = re.search(r'NOMBRE[S]?\s*(.*)', text)
-                    if name_match and len(name_match.group(1)) > 2:
-                        data["nombre"] = name_match.group(1).strip()
-                
-                # Domicilio normalmente después de "DOMICILIO"
-                elif "DOMICILIO" in text:
-                    # Buscar texto después de "DOMICILIO"
-                    address_match = re.search(r'DOMICILIO\s*(.*)', text)
-                    if address_match and len(address_match.group(1)) > 2:
-                        data["domicilio"] = address_match.group(1).strip()
-                
-                # CURP es una cadena de 18 caracteres
-                elif len(text) == 18 and re.match(r'^[A-Z]{4}[0-9]{6}[A-Z]{8}[0-9A-Z]{2}$', text):
-                    data["curp"] = text
-                
-                # Clave de elector es una cadena de 18 caracteres alfanuméricos
-                elif len(text) == 18 and text.isalnum():
-                    # Si no es CURP, probablemente es clave de elector
-                    if not re.match(r'^[A-Z]{4}[0-9]{6}[A-Z]{8}[0-9A-Z]{2}$', text):
-                        data["clave_elector"] = text
-                
-                # Búsqueda explícita de "CLAVE DE ELECTOR"
-                elif "CLAVE" in text and "ELECTOR" in text:
-                    parts = re.split(r'[:;]', text, 1)
-                    if len(parts) > 1 and len(parts[1].strip()) > 0:
-                        data["clave_elector"] = parts[1].strip()
-            
+            # Cascada sobre la imagen completa: primero Tesseract y, si faltan campos
+            # obligatorios, se relee con EasyOCR y solo se completan esos
+            data = self.parse_ine_lines(self._read_text(image).splitlines())
+            missing = [field for field in REQUIRED_FIELDS["ine"] if data.get(field) is None]
+            if not (missing and self.has_easyocr):
+                metrics.record("ine", "tesseract_completo")
+                return data
+            timings = self.last_timings
+            retry = self.parse_ine_lines(self._read_easyocr_lines(image))
+            self.last_timings = self._add_timings(timings, self.last_timings)
+            escalated = [field for field in missing if retry.get(field) is not None]
+            data.update({field: retry[field] for field in escalated})
+            metrics.record("ine", "easyocr_campos", escalated)
             return data
             
         except Exception as e:
@@ -99,55 +100,140 @@ class OCRService:
         """Extrae datos específicos de una póliza de seguro"""
         try:
             image = Image.open(io.BytesIO(image_bytes))  # CORREGIDO: BytysIO → BytesIO
-            text = pytesseract.image_to_string(image, lang='spa')
+            data = self.parse_poliza_text(self._read_text(image))
+            missing = [field for field in REQUIRED_FIELDS["poliza"] if data[field] is None]
+            if not (missing and settings.OCR_CASCADE_ENABLED and self.has_easyocr):
+                metrics.record("poliza", "tesseract")
+                return data
             
-            # Detectar información de la póliza usando expresiones regulares
-            data = {
-                "numero_poliza": None,
-                "asegurado": None,
-                "vigencia": None,
-                "suma_asegurada": None,
-                "prima": None,
-            }
-            
-            # Buscar número de póliza
-            poliza_pattern = r'[pP][oóÓ][lL][iI][zZ][aA][\s#:.]*([A-Z0-9-/]+)'
-            poliza_match = re.search(poliza_pattern, text)
-            if poliza_match:
-                data["numero_poliza"] = poliza_match.group(1).strip()
-            
-            # Buscar nombre del asegurado
-            asegurado_patterns = [
-                r'[aA][sS][eE][gG][uU][rR][aA][dD][oO][\s:]*([^\n\r]+)',
-                r'[nN][oO][mM][bB][rR][eE][\s:]*([^\n\r]+)'
-            ]
-            
-            for pattern in asegurado_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    data["asegurado"] = match.group(1).strip()
-                    break
-            
-            # Buscar vigencia
-            vigencia_pattern = r'[vV][iI][gG][eE][nN][cC][iI][aA][\s:]*([^\n\r]+)'
-            vigencia_match = re.search(vigencia_pattern, text)
-            if vigencia_match:
-                data["vigencia"] = vigencia_match.group(1).strip()
-            
-            # Buscar suma asegurada
-            suma_pattern = r'[sS][uU][mM][aA][\s]*[aA][sS][eE][gG][uU][rR][aA][dD][aA][\s:]*\$?([0-9,.]+)'
-            suma_match = re.search(suma_pattern, text)
-            if suma_match:
-                data["suma_asegurada"] = suma_match.group(1).strip()
-            
-            # Buscar prima
-            prima_pattern = r'[pP][rR][iI][mM][aA][\s:]*\$?([0-9,.]+)'
-            prima_match = re.search(prima_pattern, text)
-            if prima_match:
-                data["prima"] = prima_match.group(1).strip()
-                
+            # Faltan campos obligatorios: se relee con EasyOCR y solo se completan esos
+            timings = self.last_timings
+            retry = self.parse_poliza_text("\n".join(self._read_easyocr_lines(image)))
+            self.last_timings = self._add_timings(timings, self.last_timings)
+            escalated = [field for field in missing if retry[field] is not None]
+            data.update({field: retry[field] for field in escalated})
+            metrics.record("poliza", "easyocr", escalated)
             return data
             
         except Exception as e:
             print(f"Error al extraer datos de póliza: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+    
+    def page_count(self, source: Union[str, bytes]) -> int:
+        return pages.page_count(source)
+    
+    def read_page(
+        self, source: Union[str, bytes], index: int, document_type: Optional[str]
+    ) -> Dict[str, Any]:
+        """Rasteriza y lee una página de un PDF o TIFF multipágina"""
+        image = pages.render_page(source, index)
+        try:
+            if document_type == "ine" and self.has_easyocr:
+                lines = self._read_easyocr_lines(image)
+                return {"page": index + 1, "text": "\n".join(lines), "lines": lines}
+            return {"page": index + 1, "text": self._read_text(image)}
+        finally:
+            image.close()
+    
+    def merge_pages(
+        self, document_type: Optional[str], page_results: List[Dict[str, Any]]
+    ) -> Any:
+        """Combina las páginas leídas en un único resultado del tipo de documento"""
+        if document_type == "ine":
+            if not self.has_easyocr and not settings.OCR_CASCADE_ENABLED:
+                return {"error": "EasyOCR no está instalado"}
+            # Sin EasyOCR las páginas se leyeron con Tesseract: una línea por renglón
+            lines = [
+                line for page in page_results
+                for line in page.get("lines", page["text"].splitlines())
+            ]
+            return self.parse_ine_lines(lines)
+        text = "\f".join(page["text"] for page in page_results)
+        if document_type == "poliza":
+            return self.parse_poliza_text(text)
+        return text
+    
+    def extract_from_pages(self, source: Union[str, bytes], document_type: Optional[str]) -> Dict[str, Any]:
+        """Procesa todas las páginas de forma secuencial (workers de trabajos en segundo plano)"""
+        page_results = [
+            self.read_page(source, index, document_type)
+            for index in range(self.page_count(source))
+        ]
+        return {
+            "pages": [{"page": p["page"], "text": p["text"]} for p in page_results],
+            "result": self.merge_pages(document_type, page_results),
+        }
+    
+    def _read_text(self, image: Image.Image) -> str:
+        image, self.last_timings = preprocessing.preprocess(image)
+        with self._timed("tesseract"):
+            return get_tesseract().image_to_string(image)
+    
+    def _read_easyocr_lines(self, image: Image.Image) -> List[str]:
+        # EasyOCR reconoce mejor sin binarizar
+        image, self.last_timings = preprocessing.preprocess(image, binarize_image=False)
+        
+        import numpy as np
+        with self._timed("easyocr"):
+            result = self.reader.readtext(np.array(image))
+        return [detection[1] for detection in result]
+    
+    def _extract_ine_roi(self, image: Image.Image) -> Tuple[Dict[str, Any], str, List[str]]:
+        """
+        Lee solo las regiones de la plantilla de la INE. Con la cascada activada se leen
+        primero con Tesseract y solo las regiones sin resultado o con confianza baja se
+        releen con EasyOCR; sin cascada se leen todas con EasyOCR en una única llamada.
+        Devuelve los datos, el camino seguido y los campos escalados a EasyOCR, para que
+        quien llama registre la métrica solo si usa este resultado.
+        """
+        self.last_timings = {}
+        with self._timed("normalize"):
+            gray = preprocessing.to_grayscale(preprocessing.fix_orientation(image))
+            strip, bands = ine_roi.build_strip(ine_roi.normalize_card(gray))
+        
+        import numpy as np
+        if not settings.OCR_CASCADE_ENABLED:
+            with self._timed("easyocr"):
+                detections = self.reader.readtext(np.array(strip))
+            return ine_roi.parse_regions(ine_roi.assign(detections, bands)), "easyocr_roi", []
+        
+        with self._timed("tesseract"):
+            regions = ine_roi.assign(get_tesseract().image_to_data(strip), bands)
+        data = ine_roi.parse_regions(regions)
+        weak = [
+            field for field in REQUIRED_FIELDS["ine"]
+            if data[field] is None
+            or ine_roi.region_confidence(regions[field]) < settings.OCR_CASCADE_MIN_CONFIDENCE
+        ]
+        if not weak or not self.has_easyocr:
+            return data, "tesseract", []
+        
+        retry_strip, retry_bands = ine_roi.select_bands(strip, bands, weak)
+        with self._timed("easyocr"):
+            detections = self.reader.readtext(np.array(retry_strip))
+        retry = ine_roi.parse_regions(ine_roi.assign(detections, retry_bands))
+        escalated = [field for field in weak if retry[field] is not None]
+        data.update({field: retry[field] for field in escalated})
+        return data, "easyocr_regiones", escalated
+    
+    @staticmethod
+    def _add_timings(first: Dict[str, float], second: Dict[str, float]) -> Dict[str, float]:
+        return {stage: first.get(stage, 0.0) + second.get(stage, 0.0) for stage in {**first, **second}}
+    
+    @contextmanager
+    def _timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.last_timings[stage] = (time.perf_counter() - start) * 1000
+    
+    @staticmethod
+    def parse_ine_lines(lines: List[str]) -> Dict[str, Any]:
+        # Cada detección de EasyOCR es una línea; se recorren todas en una sola pasada
+        return fields.extract("ine", "\n" + "\n".join(lines))
+    
+    @staticmethod
+    def parse_poliza_text(text: str) -> Dict[str, Any]:
+        # Detectar información de la póliza usando expresiones regulares
+        return fields.extract("poliza", text)
@@ -0,0 +1,144 @@
+# Backends de Tesseract para OCRService.
+#
+# pytesseract lanza un proceso "tesseract" y escribe archivos temporales en cada
+# llamada, así que en imágenes pequeñas domina el arranque del proceso y la carga del
+# modelo "spa". Con tesserocr (enlace a la API de libtesseract) cada proceso de OCR
+# mantiene una instancia con el modelo ya cargado y le pasa las imágenes en memoria.
+#
+# OCR_TESSERACT_BACKEND elige el backend: "api" (tesserocr), "subprocess" (pytesseract)
+# o "auto" (tesserocr si está instalado).
+
+import importlib.util
+import os
+import threading
+from typing import List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from PIL import Image
+
+from app.core.config import settings
+
+load_dotenv()
+
+TESSERACT_PATH = os.getenv('TESSERACT_PATH', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+LANG = "spa"
+
+BACKENDS = ("auto", "api", "subprocess")
+
+# Palabra detectada: (caja como cuatro puntos, texto, confianza de 0 a 1), el mismo
+# formato que devuelve EasyOCR para poder tratar ambos motores igual
+Detection = Tuple[List[Tuple[int, int]], str, float]
+
+_pytesseract = None
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_pytesseract():
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+        _pytesseract = pytesseract
+    return _pytesseract
+
+
+def _box(left: int, top: int, right: int, bottom: int) -> List[Tuple[int, int]]:
+    return [(left, top), (right, top), (right, bottom), (left, bottom)]
+
+
+class SubprocessTesseract:
+    """Un proceso de tesseract por imagen (pytesseract)"""
+
+    name = "subprocess"
+
+    def __init__(self, lang: str = LANG):
+        self.lang = lang
+        get_pytesseract()
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return get_pytesseract().image_to_string(image, lang=self.lang)
+
+    def image_to_data(self, image: Image.Image) -> List[Detection]:
+        pytesseract = get_pytesseract()
+        data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+        detections = []
+        for text, conf, left, top, width, height in zip(
+            data["text"], data["conf"], data["left"], data["top"], data["width"], data["height"]
+        ):
+            # Los bloques, párrafos y líneas vienen con confianza -1 y sin texto
+            if not str(text).strip() or float(conf) < 0:
+                continue
+            detections.append((_box(left, top, left + width, top + height), str(text), float(conf) / 100))
+        return detections
+
+    def close(self) -> None:
+        pass
+
+
+class APITesseract:
+    """
+    Instancia persistente de libtesseract (tesserocr). El modelo se carga una vez al
+    crearla; la API no admite llamadas concurrentes, por eso se serializan con un lock.
+    """
+
+    name = "api"
+
+    def __init__(self, lang: str = LANG, tessdata_path: Optional[str] = None):
+        import tesserocr
+
+        tessdata_path = tessdata_path or os.getenv("TESSDATA_PREFIX")
+        kwargs = {"path": tessdata_path} if tessdata_path else {}
+        # PSM AUTO es el modo por defecto de la línea de comandos, así el texto
+        # coincide con el de pytesseract
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.AUTO, **kwargs)
+        self._lock = threading.Lock()
+
+    def image_to_string(self, image: Image.Image) -> str:
+        with self._lock:
+            self._api.SetImage(image)
+            try:
+                return self._api.GetUTF8Text()
+            finally:
+                self._api.Clear()
+
+    def image_to_data(self, image: Image.Image) -> List[Detection]:
+        import tesserocr
+
+        level = tesserocr.RIL.WORD
+        detections = []
+        with self._lock:
+            self._api.SetImage(image)
+            try:
+                self._api.Recognize()
+                for word in tesserocr.iterate_level(self._api.GetIterator(), level):
+                    text = word.GetUTF8Text(level)
+                    if not text or not text.strip():
+                        continue
+                    detections.append((_box(*word.BoundingBox(level)), text, word.Confidence(level) / 100))
+            finally:
+                self._api.Clear()
+        return detections
+
+    def close(self) -> None:
+        self._api.End()
+
+
+def create_backend(name: str) -> Union["SubprocessTesseract", "APITesseract"]:
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de Tesseract desconocido: {name}")
+    if name == "auto":
+        name = "api" if importlib.util.find_spec("tesserocr") is not None else "subprocess"
+    if name == "api":
+        return APITesseract(tessdata_path=settings.OCR_TESSDATA_PATH)
+    return SubprocessTesseract()
+
+
+def get_tesseract():
+    """Backend del proceso actual, creado en el primer uso"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(settings.OCR_TESSERACT_BACKEND)
+    return _backend
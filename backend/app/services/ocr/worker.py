@@ -0,0 +1,134 @@
+# Procesa en segundo plano los trabajos de OCR encolados en la base de datos.
+#
+# Uso (desde el directorio backend):
+#     python -m app.services.ocr.worker --processes 2
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.ocr import cache as ocr_cache, processing
+from app.services.storage.blobs import blob_store
+
+logger = logging.getLogger(__name__)
+
+
+def process_job(db: Session, job: models.OCRJob, service: Any) -> Dict[str, Any]:
+    """Ejecuta el OCR del documento del trabajo y completa el siniestro"""
+    document = job.document
+    if document is None:
+        raise ValueError("Documento no encontrado")
+    if not processing.is_supported_file(document.name):
+        raise ValueError("Formato de archivo no soportado para OCR")
+
+    # Con S3 el archivo se descarga a un temporal mientras dura el OCR
+    try:
+        with blob_store.local_copy(document.path) as path:
+            with open(path, "rb") as file:
+                contents = file.read()
+
+            content_hash = ocr_cache.content_hash(contents)
+            result = ocr_cache.lookup(db, content_hash=content_hash, document_type=document.document_type)
+            if result is None:
+                if processing.is_paged(contents[:4]):
+                    result = service.extract_from_pages(
+                        path, processing.normalize_document_type(document.document_type)
+                    )
+                else:
+                    method = processing.ocr_method_for(document.document_type)
+                    result = getattr(service, method)(contents)
+                ocr_cache.store(
+                    db, content_hash=content_hash, document_type=document.document_type, result=result
+                )
+    except FileNotFoundError:
+        raise ValueError("Archivo no encontrado en el servidor")
+
+    crud.document.set_extracted_text(
+        db=db, db_obj=document, extracted_text=processing.searchable_text(result)
+    )
+    siniestro = document.siniestro
+    update_data = processing.siniestro_update_from_result(
+        document.document_type, result, siniestro
+    )
+    if update_data:
+        crud.siniestro.update(
+            db=db, db_obj=siniestro, obj_in=schemas.SiniestroUpdate(**update_data)
+        )
+    return processing.format_result(document.document_type, result)
+
+
+def run_worker(worker_id: str, max_jobs: Optional[int] = None) -> None:
+    from app.services.ocr.service import OCRService
+
+    service = OCRService()
+    if settings.OCR_WARMUP:
+        service.warm_up()
+    processed = 0
+    logger.info("Worker %s listo", worker_id)
+    while max_jobs is None or processed < max_jobs:
+        db = SessionLocal()
+        try:
+            recovered = crud.ocr_job.requeue_stale(
+                db, lease_seconds=settings.OCR_JOB_LEASE_SECONDS
+            )
+            if recovered:
+                logger.warning("Worker %s recuperó %s trabajos abandonados", worker_id, recovered)
+
+            job = crud.ocr_job.claim_next(db, worker_id=worker_id)
+            if job is None:
+                time.sleep(settings.OCR_JOB_POLL_SECONDS)
+                continue
+
+            # Identifica esta reserva: el trabajo puede volver a la cola si tarda más que el lease
+            job_id, attempts = job.id, job.attempts
+            logger.info("Worker %s procesando trabajo %s", worker_id, job_id)
+            try:
+                result = process_job(db, job, service)
+            except Exception as e:
+                db.rollback()
+                finished = crud.ocr_job.mark_failed(db, job=job, attempts=attempts, error=str(e))
+                if finished:
+                    logger.error("Trabajo %s falló (%s): %s", job_id, finished.status, e)
+            else:
+                finished = crud.ocr_job.mark_done(db, job=job, attempts=attempts, result=result)
+            if finished is None:
+                logger.warning(
+                    "Worker %s descarta el resultado del trabajo %s: lo reservó otro worker", worker_id, job_id
+                )
+            processed += 1
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Workers de OCR en segundo plano")
+    parser.add_argument("--processes", type=int, default=settings.OCR_JOB_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    host = socket.gethostname()
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(f"{host}:{os.getpid()}:{i}",))
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
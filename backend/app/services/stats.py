@@ -0,0 +1,70 @@
+# Estadísticas del dashboard: siniestros por estado y por prioridad.
+#
+# Salen de una única consulta agrupada (crud.siniestro.acount_by_estado_prioridad) y se
+# guardan en memoria STATS_CACHE_TTL_SECONDS por alcance: todos los siniestros (agentes)
+# o los de un usuario. Mientras la entrada está viva el dashboard no toca la base de
+# datos. Los cambios hechos desde la API de este proceso invalidan al momento el alcance
+# del dueño y el global; los de otros procesos se ven como mucho al caducar la entrada.
+
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.core.config import settings
+
+# Clave para los valores nulos (un diccionario JSON no admite None como clave)
+SIN_DEFINIR = "Sin definir"
+
+# owner_id (None para todos) -> (momento en que caduca, estadísticas)
+_cache: Dict[Optional[int], Tuple[float, Dict[str, Any]]] = {}
+_lock = threading.Lock()
+# Aumenta en cada invalidación: un resultado calculado antes no se guarda
+_generation = 0
+
+
+def _summarize(rows: Any) -> Dict[str, Any]:
+    por_estado: Counter = Counter()
+    por_prioridad: Counter = Counter()
+    for estado, prioridad, count in rows:
+        por_estado[estado or SIN_DEFINIR] += count
+        por_prioridad[prioridad or SIN_DEFINIR] += count
+    return {
+        "total": sum(por_estado.values()),
+        "por_estado": dict(por_estado),
+        "por_prioridad": dict(por_prioridad),
+    }
+
+
+async def siniestro_stats(db: AsyncSession, *, owner_id: Optional[int] = None) -> Dict[str, Any]:
+    """Estadísticas de los siniestros de owner_id (de todos si es None)"""
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(owner_id)
+        generation = _generation
+    if entry and entry[0] > now:
+        return entry[1]
+
+    stats = _summarize(await crud.siniestro.acount_by_estado_prioridad(db, owner_id=owner_id))
+    if settings.STATS_CACHE_TTL_SECONDS > 0:
+        with _lock:
+            if generation == _generation:
+                _cache[owner_id] = (now + settings.STATS_CACHE_TTL_SECONDS, stats)
+    return stats
+
+
+def invalidate(owner_id: Optional[int]) -> None:
+    """Tras crear, modificar o borrar un siniestro de owner_id"""
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.pop(owner_id, None)
+        _cache.pop(None, None)
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,248 @@
+# Dónde se guardan físicamente los blobs: disco local o un servicio compatible con S3.
+#
+# Los dos drivers reciben claves lógicas ("ab/cd/<sha256>") y ofrecen lo mismo: saber
+# si existe un objeto, guardarlo desde un archivo local, leerlo por rangos (en un hilo
+# o en el event loop), borrarlo y listarlo. Cada uno traduce la clave a la ubicación
+# que se guarda en Document.path: una ruta en disco o "s3://bucket/prefijo/clave".
+#
+# Con S3 todas las réplicas de la API ven los mismos documentos; con el driver local
+# deben compartir el directorio (NFS o similar).
+
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import anyio
+
+from app.core.config import settings
+
+_READ_BLOCK = 1024 * 1024
+
+
+class LocalBackend:
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+        # Los temporales viven dentro del almacén para que el rename final sea atómico
+        self.temp_directory = os.path.join(root, "tmp")
+
+    def location(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def owns(self, location: str) -> bool:
+        root = os.path.realpath(self.root)
+        return os.path.commonpath([root, os.path.realpath(location)]) == root
+
+    def key_of(self, location: str) -> str:
+        return os.path.relpath(location, self.root).replace(os.sep, "/")
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.location(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.location(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.location(key))
+
+    async def asize(self, key: str) -> int:
+        return await anyio.to_thread.run_sync(self.size, key)
+
+    def touch(self, key: str) -> None:
+        os.utime(self.location(key))
+
+    def put_file(self, key: str, source: str, move: bool = False) -> bool:
+        """Guarda source en key. Devuelve False si ya existía (y no se copia)"""
+        target = self.location(key)
+        if os.path.exists(target):
+            self.touch(key)
+            if move:
+                os.unlink(source)
+            return False
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.makedirs(self.temp_directory, exist_ok=True)
+        temp_path = os.path.join(self.temp_directory, f".{os.path.basename(key)}.part")
+        if move:
+            shutil.move(source, temp_path)
+        else:
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+        return True
+
+    async def aput_file(self, key: str, source: str, move: bool = False) -> bool:
+        return await anyio.to_thread.run_sync(self.put_file, key, source, move)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        return iter_file(self.location(key), start, end)
+
+    def aiter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        return aiter_file(self.location(key), start, end)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self.location(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self) -> Iterator[Tuple[str, int, float]]:
+        """(clave, tamaño, fecha de modificación) de cada objeto"""
+        temp_directory = os.path.abspath(self.temp_directory)
+        for directory, _, filenames in os.walk(self.root):
+            if os.path.abspath(directory).startswith(temp_directory):
+                continue
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield self.key_of(path), info.st_size, info.st_mtime
+
+    def presigned_url(self, key: str, response_headers: Dict[str, str]) -> Optional[str]:
+        return None
+
+    async def aclose(self) -> None:
+        pass
+
+
+class S3Backend:
+    name = "s3"
+
+    def __init__(self, client, prefix: str = "", presign_seconds: int = 300):
+        self.client = client
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.presign_seconds = presign_seconds
+        self._base = f"s3://{client.bucket}/{self.prefix}"
+
+    def _object(self, key: str) -> str:
+        return self.prefix + key
+
+    def location(self, key: str) -> str:
+        return self._base + key
+
+    def owns(self, location: str) -> bool:
+        return location.startswith(self._base)
+
+    def key_of(self, location: str) -> str:
+        return location[len(self._base):]
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def exists(self, key: str) -> bool:
+        return self.client.head(self._object(key)) is not None
+
+    def size(self, key: str) -> int:
+        info = self.client.head(self._object(key))
+        if info is None:
+            raise FileNotFoundError(self.location(key))
+        return info["size"]
+
+    async def asize(self, key: str) -> int:
+        info = await self.client.ahead(self._object(key))
+        if info is None:
+            raise FileNotFoundError(self.location(key))
+        return info["size"]
+
+    def touch(self, key: str) -> None:
+        # Copiarlo sobre sí mismo renueva la fecha sin volver a subir los datos
+        self.client.copy_in_place(self._object(key))
+
+    def put_file(self, key: str, source: str, move: bool = False) -> bool:
+        # La clave es el hash: si ya existe, el contenido es el mismo
+        new = not self.exists(key)
+        if new:
+            self.client.upload_file(self._object(key), source)
+        else:
+            self.touch(key)
+        if move:
+            os.unlink(source)
+        return new
+
+    async def aput_file(self, key: str, source: str, move: bool = False) -> bool:
+        new = await self.client.ahead(self._object(key)) is None
+        if new:
+            await self.client.aupload_file(self._object(key), source)
+        else:
+            await anyio.to_thread.run_sync(self.touch, key)
+        if move:
+            await anyio.to_thread.run_sync(os.unlink, source)
+        return new
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        return self.client.iter_object(self._object(key), start, end)
+
+    def aiter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        return self.client.aiter_object(self._object(key), start, end)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._object(key))
+
+    def list(self) -> Iterator[Tuple[str, int, float]]:
+        for item in self.client.list_objects(self.prefix):
+            # LastModified viene en UTC: "2024-05-01T10:20:30.000Z"
+            modified = datetime.strptime(item["last_modified"][:19], "%Y-%m-%dT%H:%M:%S")
+            yield item["key"][len(self.prefix):], item["size"], modified.replace(tzinfo=timezone.utc).timestamp()
+
+    def presigned_url(self, key: str, response_headers: Dict[str, str]) -> Optional[str]:
+        """URL firmada y temporal para que el cliente descargue directamente del bucket"""
+        return self.client.presigned_get(self._object(key), self.presign_seconds, response_headers)
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.client.aclose()
+
+
+def iter_file(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Bloques del archivo entre start y end (inclusive)"""
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            block = file.read(_READ_BLOCK if remaining is None else min(_READ_BLOCK, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+
+async def aiter_file(path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, mode="rb") as file:
+        await file.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            block = await file.read(_READ_BLOCK if remaining is None else min(_READ_BLOCK, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+
+def create_backend(local_root: str):
+    """Driver configurado en STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalBackend(local_root)
+    if settings.STORAGE_BACKEND != "s3":
+        raise RuntimeError(f"STORAGE_BACKEND no válido: {settings.STORAGE_BACKEND}")
+    if not settings.S3_BUCKET:
+        raise RuntimeError("STORAGE_BACKEND=s3 requiere S3_BUCKET")
+
+    from app.services.storage.s3 import S3Client
+
+    client = S3Client(
+        settings.S3_BUCKET,
+        access_key=settings.S3_ACCESS_KEY_ID or "",
+        secret_key=settings.S3_SECRET_ACCESS_KEY or "",
+        region=settings.S3_REGION,
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        path_style=settings.S3_PATH_STYLE,
+        max_connections=settings.S3_MAX_CONNECTIONS,
+        part_size=settings.S3_MULTIPART_CHUNK_BYTES,
+        part_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+    )
+    return S3Backend(client, prefix=settings.S3_PREFIX, presign_seconds=settings.S3_PRESIGN_SECONDS)
@@ -0,0 +1,317 @@
+# Almacén de archivos direccionado por contenido (SHA-256).
+#
+# Cada archivo se guarda una sola vez con la clave ab/cd/<sha256>, sin importar cuántos
+# documentos lo usen ni con qué nombre se subió. Dónde se guarda lo decide el driver
+# (STORAGE_BACKEND): en {STORAGE_BLOB_DIRECTORY} o en un bucket compatible con S3. Los
+# documentos guardan la ubicación del blob y su hash; las referencias a un blob son las
+# filas de Document con ese hash, y un blob sin ninguna es basura que elimina
+# collect_garbage.
+#
+# Para leer un documento se usan iter_content, aiter_content o local_copy con su
+# ubicación, que también aceptan las rutas anteriores al almacén.
+#
+# Uso (desde el directorio backend):
+#     python -m app.services.storage.blobs migrate --dry-run
+#     python -m app.services.storage.blobs migrate
+#     python -m app.services.storage.blobs gc
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from anyio import to_thread
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.storage.backends import LocalBackend, aiter_file, create_backend, iter_file
+from app.services.storage.writer import AtomicFileWriter
+
+logger = logging.getLogger(__name__)
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_READ_BLOCK = 1024 * 1024
+# Hashes que se consultan juntos en la base de datos durante la recolección
+_GC_BATCH = 1000
+
+
+class BlobStore:
+    def __init__(self, root: str, backend: Any = None):
+        # root es siempre local: temporales de subida y sesiones reanudables
+        self.root = root
+        self.temp_directory = os.path.join(root, "tmp")
+        self.backend = backend or LocalBackend(root)
+
+    @staticmethod
+    def key_for(sha256: str) -> str:
+        if not _SHA256.match(sha256):
+            raise ValueError(f"Hash SHA-256 no válido: {sha256}")
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def path_for(self, sha256: str) -> str:
+        """Ubicación que se guarda en Document.path"""
+        return self.backend.location(self.key_for(sha256))
+
+    def exists(self, sha256: str) -> bool:
+        return self.backend.exists(self.key_for(sha256))
+
+    def contains(self, path: str) -> bool:
+        return self.backend.owns(path)
+
+    def writer(self, max_bytes: Optional[int] = None, install: bool = True) -> "BlobWriter":
+        return BlobWriter(self, max_bytes=max_bytes, install=install)
+
+    def touch(self, sha256: str) -> None:
+        # Un blob reutilizado se marca como reciente para que la recolección no lo
+        # borre antes de que se guarde el documento que lo referencia
+        self.backend.touch(self.key_for(sha256))
+
+    def put_file(self, source: str, move: bool = False) -> Tuple[str, int, bool]:
+        """
+        Guarda un archivo existente en el almacén. Devuelve (sha256, tamaño, nuevo);
+        nuevo es False si el contenido ya estaba guardado.
+        """
+        sha256, size = self.hash_file(source)
+        return sha256, size, self.install_file(source, sha256, move=move)
+
+    def install_file(self, source: str, sha256: str, move: bool = False) -> bool:
+        """
+        Guarda un archivo cuyo hash ya se conoce. Devuelve False si el contenido ya
+        estaba guardado.
+        """
+        return self.backend.put_file(self.key_for(sha256), source, move=move)
+
+    async def ainstall_file(self, source: str, sha256: str, move: bool = False) -> bool:
+        """Como install_file, sin ocupar un hilo durante la subida a S3"""
+        return await self.backend.aput_file(self.key_for(sha256), source, move=move)
+
+    # Lectura de documentos por su ubicación
+
+    def _key_at(self, location: str) -> Optional[str]:
+        # None para las rutas locales anteriores al almacén
+        return self.backend.key_of(location) if self.backend.owns(location) else None
+
+    def local_path(self, location: str) -> Optional[str]:
+        """Ruta en disco del archivo, o None si solo está en un almacén remoto"""
+        key = self._key_at(location)
+        return location if key is None else self.backend.local_path(key)
+
+    def size(self, location: str) -> int:
+        key = self._key_at(location)
+        return os.path.getsize(location) if key is None else self.backend.size(key)
+
+    async def asize(self, location: str) -> int:
+        key = self._key_at(location)
+        if key is None:
+            return await to_thread.run_sync(os.path.getsize, location)
+        return await self.backend.asize(key)
+
+    def iter_content(self, location: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Bloques del archivo entre start y end (inclusive). FileNotFoundError si no existe"""
+        key = self._key_at(location)
+        if key is None:
+            return iter_file(location, start, end)
+        return self.backend.iter_range(key, start, end)
+
+    def aiter_content(self, location: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        key = self._key_at(location)
+        if key is None:
+            return aiter_file(location, start, end)
+        return self.backend.aiter_range(key, start, end)
+
+    def read_bytes(self, location: str) -> bytes:
+        return b"".join(self.iter_content(location))
+
+    @contextmanager
+    def local_copy(self, location: str) -> Iterator[str]:
+        """
+        Ruta en disco con el contenido del archivo, para las librerías que solo leen
+        archivos (pypdfium2, Pillow). Si está en un almacén remoto se descarga a un
+        temporal que se borra al salir.
+        """
+        path = self.local_path(location)
+        if path is not None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            yield path
+            return
+        os.makedirs(self.temp_directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_directory, prefix=".", suffix=".download")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for block in self.iter_content(location):
+                    file.write(block)
+            yield temp_path
+        finally:
+            os.unlink(temp_path)
+
+    def presigned_url(self, location: str, response_headers: Dict[str, str]) -> Optional[str]:
+        """URL de descarga directa del almacén, si el driver la ofrece"""
+        key = self._key_at(location)
+        return None if key is None else self.backend.presigned_url(key, response_headers)
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+    def iter_blobs(self) -> Iterator[Tuple[str, int, float]]:
+        """(sha256, tamaño, fecha de modificación) de cada blob guardado"""
+        for key, size, modified in self.backend.list():
+            sha256 = key.rsplit("/", 1)[-1]
+            if _SHA256.match(sha256) and key == self.key_for(sha256):
+                yield sha256, size, modified
+
+    def collect_garbage(
+        self, db: Session, *, grace_seconds: int, dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Elimina los blobs a los que no apunta ningún documento y los temporales de
+        subidas abandonadas. Se respetan los modificados hace menos de grace_seconds,
+        que pueden pertenecer a una subida cuyo documento aún no se ha guardado.
+        """
+        cutoff = time.time() - grace_seconds
+        stats = {"blobs": 0, "removed": 0, "removed_bytes": 0, "temp_removed": 0}
+
+        def sweep(batch: List[Tuple[str, int, float]]) -> None:
+            referenced = crud.document.existing_hashes(db, hashes=[sha for sha, _, _ in batch])
+            for sha256, size, modified in batch:
+                if sha256 in referenced or modified > cutoff:
+                    continue
+                stats["removed"] += 1
+                stats["removed_bytes"] += size
+                if not dry_run:
+                    self.backend.delete(self.key_for(sha256))
+
+        batch: List[Tuple[str, int, float]] = []
+        for blob in self.iter_blobs():
+            stats["blobs"] += 1
+            batch.append(blob)
+            if len(batch) >= _GC_BATCH:
+                sweep(batch)
+                batch = []
+        if batch:
+            sweep(batch)
+
+        if os.path.isdir(self.temp_directory):
+            for entry in os.scandir(self.temp_directory):
+                if entry.is_file() and entry.stat().st_mtime <= cutoff:
+                    stats["temp_removed"] += 1
+                    if not dry_run:
+                        os.unlink(entry.path)
+        return stats
+
+    def migrate_documents(self, db: Session, *, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Pasa al almacén los archivos de documentos guardados con el esquema anterior
+        (uploads/{siniestro_id}/{nombre}) y actualiza la ruta, el hash y el tamaño.
+        Con STORAGE_BACKEND=s3 sube también los blobs del almacén local.
+        """
+        stats = {"documents": 0, "migrated": 0, "missing": 0, "blobs_created": 0, "deduplicated_bytes": 0}
+        # Varias filas pueden apuntar al mismo archivo (subidas con el mismo nombre)
+        moved: Dict[str, Tuple[str, int]] = {}
+        for document in crud.document.get_not_in_store(db, store=self):
+            stats["documents"] += 1
+            legacy_path = document.path
+            if legacy_path not in moved:
+                if not os.path.exists(legacy_path):
+                    stats["missing"] += 1
+                    logger.warning("Documento %s: no existe %s", document.id, legacy_path)
+                    continue
+                if dry_run:
+                    sha256, size = self.hash_file(legacy_path)
+                    created = not self.exists(sha256) and all(sha256 != s for s, _ in moved.values())
+                else:
+                    sha256, size, created = self.put_file(legacy_path, move=True)
+                    _remove_empty_parent(legacy_path)
+                moved[legacy_path] = (sha256, size)
+                if created:
+                    stats["blobs_created"] += 1
+                else:
+                    stats["deduplicated_bytes"] += size
+            sha256, size = moved[legacy_path]
+            stats["migrated"] += 1
+            if not dry_run:
+                crud.document.set_blob(
+                    db, db_obj=document, path=self.path_for(sha256), sha256=sha256, size_bytes=size
+                )
+        return stats
+
+    @staticmethod
+    def hash_file(path: str) -> Tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(_READ_BLOCK), b""):
+                digest.update(block)
+                size += len(block)
+        return digest.hexdigest(), size
+
+
+class BlobWriter(AtomicFileWriter):
+    """
+    Escritor en streaming cuyo destino es el blob de su propio hash. Con install=False
+    el archivo completo se queda en el temporal (path) para procesarlo antes de guardarlo.
+    """
+
+    def __init__(self, store: BlobStore, max_bytes: Optional[int] = None, install: bool = True):
+        super().__init__("", max_bytes=max_bytes, temp_directory=store.temp_directory)
+        self.store = store
+        self.install = install
+        self.deduplicated = False
+
+    def _install(self, temp_path: str) -> None:
+        if not self.install:
+            self.path = temp_path
+            return
+        # Si el contenido ya estaba guardado se descarta la copia nueva
+        self.path = self.store.path_for(self.sha256)
+        self.deduplicated = not self.store.install_file(temp_path, self.sha256, move=True)
+
+
+def _remove_empty_parent(path: str) -> None:
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
+
+
+def _blob_directory() -> str:
+    return settings.STORAGE_BLOB_DIRECTORY or os.path.join(settings.UPLOAD_DIRECTORY, "blobs")
+
+
+blob_store = BlobStore(_blob_directory(), create_backend(_blob_directory()))
+
+
+def main() -> None:
+    from app.db.init_db import upgrade_schema
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Mantenimiento del almacén de documentos")
+    parser.add_argument("command", choices=["migrate", "gc"])
+    parser.add_argument("--dry-run", action="store_true", help="Solo informar, sin mover ni borrar")
+    parser.add_argument("--grace-seconds", type=int, default=settings.STORAGE_GC_GRACE_SECONDS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    # Las bases de datos anteriores a este almacén no tienen sus columnas en documents
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        if args.command == "migrate":
+            stats: Dict[str, Any] = blob_store.migrate_documents(db, dry_run=args.dry_run)
+        else:
+            stats = blob_store.collect_garbage(db, grace_seconds=args.grace_seconds, dry_run=args.dry_run)
+    finally:
+        db.close()
+    print(json.dumps({"command": args.command, "dry_run": args.dry_run, **stats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# Entrega de los archivos de documentos: rangos de bytes (HTTP Range), ETag a partir
+# del hash del contenido, respuestas 304 y, opcionalmente, delegar el envío al proxy
+# (X-Accel-Redirect de nginx o X-Sendfile de Apache) para que Python no lea el archivo.
+# Los archivos guardados en S3 se redirigen a una URL firmada o se reenvían en streaming.
+
+import mimetypes
+import os
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.storage.blobs import blob_store
+
+# Tipos que los navegadores no siempre conocen por la extensión
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/heic", ".heic")
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def media_type_for(filename: Optional[str]) -> str:
+    return mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+
+
+def etag_for(sha256: Optional[str], stat_result: Optional[os.stat_result] = None) -> Optional[str]:
+    """
+    ETag fuerte con el hash del contenido. Los documentos anteriores al almacén por
+    hash solo tienen uno débil (tamaño y fecha), que no sirve para If-Range.
+    """
+    if sha256:
+        return f'"{sha256}"'
+    if stat_result is not None:
+        return f'W/"{stat_result.st_size:x}-{int(stat_result.st_mtime):x}"'
+    return None
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    # If-None-Match usa comparación débil
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(tag.strip()) == _opaque(etag) for tag in if_none_match.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Rango [inicio, fin] (inclusive) pedido en la cabecera Range, o None para enviar el
+    archivo completo. Solo se atiende un rango; con varios se envía todo el archivo,
+    que el estándar permite.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    specs = header[len("bytes="):].split(",")
+    if len(specs) != 1:
+        return None
+    start_text, _, end_text = specs[0].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # "bytes=-N": los últimos N bytes
+            suffix = int(end_text)
+            if suffix == 0:
+                raise RangeNotSatisfiableError()
+            start, end = max(0, size - suffix), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiableError()
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(FileResponse):
+    """FileResponse que envía solo un rango del archivo (206 Partial Content)"""
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, byte_range: Tuple[int, int], stat_result: os.stat_result, **kwargs):
+        start, end = byte_range
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start, self.end = start, end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # El archivo se acortó mientras se enviaba
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def offload_response(path: str, headers: Dict[str, str], media_type: str) -> Response:
+    """
+    Respuesta vacía con la cabecera que indica al proxy qué archivo enviar; el proxy
+    atiende también los rangos. Con X-Accel-Redirect la ruta es la de una location
+    interna de nginx (DOWNLOAD_ACCEL_PREFIX) que apunta a DOWNLOAD_ACCEL_ROOT.
+    """
+    if settings.DOWNLOAD_OFFLOAD == "x-accel-redirect":
+        relative = os.path.relpath(path, settings.DOWNLOAD_ACCEL_ROOT or settings.UPLOAD_DIRECTORY)
+        headers["X-Accel-Redirect"] = settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(
+            relative.replace(os.sep, "/")
+        )
+    else:
+        headers["X-Sendfile"] = os.path.abspath(path)
+    return Response(headers=headers, media_type=media_type)
+
+
+def _download_headers(filename: str, inline: bool) -> Dict[str, str]:
+    return {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename, "inline" if inline else "attachment"),
+        # Se puede guardar, pero se revalida siempre: así se respeta un cambio de permisos
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def _requested_range(
+    range_header: Optional[str], if_range: Optional[str], etag: Optional[str], sha256: Optional[str], size: int
+) -> Optional[Tuple[int, int]]:
+    # If-Range: el rango solo vale si el archivo sigue siendo el mismo (ETag fuerte)
+    if not if_range or (sha256 and if_range.strip() == etag):
+        return parse_range(range_header, size)
+    return None
+
+
+def _range_not_satisfiable(headers: Dict[str, str], size: int) -> Response:
+    return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+
+def file_response(
+    path: str,
+    *,
+    filename: str,
+    sha256: Optional[str],
+    range_header: Optional[str],
+    if_range: Optional[str],
+    if_none_match: Optional[str],
+    method: str,
+    inline: bool = False,
+) -> Response:
+    """Respuesta para descargar un archivo: 200, 206, 304, 416 o delegada al proxy"""
+    media_type = media_type_for(filename)
+    headers = _download_headers(filename, inline)
+
+    if settings.DOWNLOAD_OFFLOAD and sha256:
+        # Sin tocar el disco: el ETag sale del hash y el proxy comprueba el archivo
+        headers["ETag"] = etag_for(sha256)
+        if not_modified(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return offload_response(path, headers, media_type)
+
+    # Un solo stat para comprobar que existe y conocer el tamaño
+    stat_result = os.stat(path)
+    etag = etag_for(sha256, stat_result)
+    headers["ETag"] = etag
+    if not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.DOWNLOAD_OFFLOAD:
+        return offload_response(path, headers, media_type)
+
+    try:
+        byte_range = _requested_range(range_header, if_range, etag, sha256, stat_result.st_size)
+    except RangeNotSatisfiableError:
+        return _range_not_satisfiable(headers, stat_result.st_size)
+    if byte_range is not None:
+        return FileRangeResponse(
+            path, byte_range, stat_result, headers=headers, media_type=media_type, method=method
+        )
+    return FileResponse(
+        path, headers=headers, media_type=media_type, stat_result=stat_result, method=method
+    )
+
+
+async def stored_response(
+    location: str,
+    *,
+    filename: str,
+    sha256: Optional[str],
+    size: Optional[int],
+    range_header: Optional[str],
+    if_range: Optional[str],
+    if_none_match: Optional[str],
+    method: str,
+    inline: bool = False,
+) -> Response:
+    """
+    Como file_response, para archivos que no están en el disco de esta réplica (S3).
+    Con S3_PRESIGNED_DOWNLOADS el cliente se redirige a una URL firmada y descarga
+    del bucket (que atiende los rangos); si no, la API reenvía los bytes sin tocar el disco.
+    """
+    media_type = media_type_for(filename)
+    headers = _download_headers(filename, inline)
+    etag = etag_for(sha256)
+    if etag:
+        headers["ETag"] = etag
+    if not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.S3_PRESIGNED_DOWNLOADS:
+        url = blob_store.presigned_url(location, {
+            "response-content-disposition": headers["Content-Disposition"],
+            "response-content-type": media_type,
+        })
+        if url:
+            # La URL caduca: la redirección no se guarda
+            return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+
+    if size is None:
+        size = await blob_store.asize(location)
+    try:
+        byte_range = _requested_range(range_header, if_range, etag, sha256, size)
+    except RangeNotSatisfiableError:
+        return _range_not_satisfiable(headers, size)
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    # Se pide el primer bloque antes de responder: si el objeto no existe se devuelve
+    # 404 en lugar de cortar una respuesta ya empezada
+    body = blob_store.aiter_content(location, start, end)
+    try:
+        first = await body.__anext__()
+    except StopAsyncIteration:
+        first = b""
+
+    async def content() -> AsyncIterator[bytes]:
+        yield first
+        async for block in body:
+            yield block
+
+    return StreamingResponse(content(), status_code=status_code, headers=headers, media_type=media_type)
@@ -0,0 +1,202 @@
+# Miniaturas y vistas previas de los documentos (primera página en PDF y TIFF).
+#
+# Se generan en segundo plano al subir un documento y, si alguien las pide antes, al
+# momento. Se guardan como JPEG en una caché en disco con tamaño máximo: al pasarlo se
+# borran las menos usadas (la fecha de modificación se actualiza en cada lectura). El
+# contenido de un documento no cambia, así que la clave es su hash y las derivadas no
+# caducan nunca; solo cambian si cambia DERIVATIVE_VERSION.
+
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.services.ocr.processing import is_supported_file
+from app.services.storage.blobs import blob_store
+
+logger = logging.getLogger(__name__)
+
+# Subir cuando cambie cómo se generan, para no servir las anteriores
+DERIVATIVE_VERSION = "1"
+
+VARIANTS = ("thumb", "preview")
+
+# Al pasar del máximo se borra hasta quedar en esta fracción, para no evictar en cada escritura
+_EVICT_TARGET = 0.9
+
+
+class DerivativeUnavailableError(Exception):
+    pass
+
+
+def _max_side(variant: str) -> int:
+    if variant == "thumb":
+        return settings.DERIVATIVE_THUMB_SIZE
+    return settings.DERIVATIVE_PREVIEW_SIZE
+
+
+class DerivativeCache:
+    def __init__(self, root: str, max_bytes: int, workers: int = 1):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Tamaño ocupado; se calcula recorriendo la caché la primera vez que hace falta
+        self._size: Optional[int] = None
+
+    def path_for(self, key: str, variant: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}-{variant}-v{DERIVATIVE_VERSION}.jpg")
+
+    def get(self, key: str, source: str, variant: str) -> str:
+        """
+        Ruta de la derivada, generándola si no existe. source es la ubicación del
+        documento (Document.path). Si ya se está generando en
+        segundo plano se espera a ese trabajo en lugar de repetirlo.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Variante no válida: {variant}")
+        path = self.path_for(key, variant)
+        if not os.path.exists(path):
+            self._submit(key, source).result()
+        try:
+            # Marca de uso para la evicción LRU
+            os.utime(path)
+        except FileNotFoundError:
+            # Evictada justo ahora: se vuelve a generar
+            self._generate(key, source)
+        return path
+
+    def schedule(self, key: str, source: str) -> None:
+        """Genera las derivadas en segundo plano si aún no están en la caché"""
+        if all(os.path.exists(self.path_for(key, variant)) for variant in VARIANTS):
+            return
+        self._submit(key, source)
+
+    def _submit(self, key: str, source: str) -> Future:
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._workers, thread_name_prefix="derivatives"
+                    )
+                future = self._executor.submit(self._generate, key, source)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _generate(self, key: str, source: str) -> None:
+        from PIL import Image, ImageOps
+
+        from app.services.ocr.pages import render_page
+
+        try:
+            # Una sola decodificación: la miniatura se saca de la vista previa
+            with blob_store.local_copy(source) as path:
+                image = render_page(path, 0, max_side=settings.DERIVATIVE_PREVIEW_SIZE)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            logger.warning("No se pudo generar la vista previa de %s: %s", key, e)
+            raise DerivativeUnavailableError("No se puede generar una vista previa de este documento")
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        for variant in ("preview", "thumb"):
+            side = _max_side(variant)
+            image.thumbnail((side, side), Image.LANCZOS)
+            self._store(self.path_for(key, variant), image)
+
+    def _store(self, path: str, image) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                image.save(file, "JPEG", quality=settings.DERIVATIVE_JPEG_QUALITY, optimize=True)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._account(os.path.getsize(path))
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += added
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _files(self) -> Iterator[str]:
+        """Derivadas guardadas; se omiten los temporales (.<nombre>.part) que aún se escriben"""
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith(".") or filename.endswith(".part"):
+                    continue
+                yield os.path.join(directory, filename)
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._files():
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return total
+
+    def evict(self) -> int:
+        """Borra las derivadas usadas hace más tiempo hasta bajar del máximo. Devuelve los bytes liberados"""
+        entries = []
+        for path in self._files():
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * _EVICT_TARGET)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= target:
+                break
+            try:
+                os.unlink(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size = total - freed
+        return freed
+
+
+def document_key(document) -> str:
+    # Los documentos anteriores al almacén por hash no tienen sha256
+    return document.sha256 or f"documento-{document.id}"
+
+
+def schedule_document(document) -> None:
+    """Encola las derivadas de un documento recién guardado"""
+    if settings.DERIVATIVE_PREGENERATE and is_supported_file(document.name or ""):
+        derivative_cache.schedule(document_key(document), document.path)
+
+
+def _cache_directory() -> str:
+    return settings.DERIVATIVE_CACHE_DIRECTORY or os.path.join(settings.UPLOAD_DIRECTORY, "derivatives")
+
+
+derivative_cache = DerivativeCache(
+    _cache_directory(), settings.DERIVATIVE_CACHE_MAX_BYTES, workers=settings.DERIVATIVE_WORKERS
+)
@@ -0,0 +1,195 @@
+# Exportación en ZIP de los documentos de uno o varios siniestros.
+#
+# El ZIP se genera mientras se envía: zipfile escribe en un objeto que solo acumula
+# bytes (sin seek, así usa descriptores de datos) y el generador los entrega en cuanto
+# los hay. La memoria no depende del tamaño del archivo ni del número de documentos
+# (salvo el índice central del ZIP, unos cien bytes por documento) y no se crea nada
+# en disco. Los documentos se leen de la base de datos por lotes y los archivos, del
+# disco o del bucket S3 según el driver de almacenamiento.
+#
+# Al final va manifest.json con los datos de cada siniestro y documento, incluido el
+# texto y el resultado del último OCR.
+
+import json
+import logging
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from app import crud, models
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.storage.blobs import blob_store
+
+logger = logging.getLogger(__name__)
+
+_BATCH = 100
+
+# Exportaciones a la vez en este proceso; cada una ocupa un hilo mientras se envía
+export_slots = threading.BoundedSemaphore(settings.EXPORT_MAX_CONCURRENT)
+
+_UNSAFE = re.compile(r"[^\w.\- ]+")
+
+
+class _Sink:
+    """Destino de zipfile: guarda lo escrito hasta que el generador lo recoge"""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _safe(name: str) -> str:
+    return _UNSAFE.sub("_", name).strip(" .") or "documento"
+
+
+def _folder(siniestro: models.Siniestro) -> str:
+    if siniestro.numero_poliza:
+        return f"siniestro-{siniestro.id}-{_safe(siniestro.numero_poliza)}"
+    return f"siniestro-{siniestro.id}"
+
+
+def _archive_name(document: models.Document, siniestro: models.Siniestro) -> str:
+    # El id evita choques entre documentos con el mismo nombre
+    return f"{_folder(siniestro)}/{document.id}-{_safe(os.path.basename(document.name or ''))}"
+
+
+def _zip_info(name: str, date: Optional[datetime], compress: bool) -> zipfile.ZipInfo:
+    date = date or datetime.utcnow()
+    info = zipfile.ZipInfo(name, date_time=(max(date.year, 1980),) + date.timetuple()[1:6])
+    # Imágenes y PDF ya están comprimidos: se guardan tal cual y no se gasta CPU
+    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _siniestro_entry(siniestro: models.Siniestro) -> Dict[str, Any]:
+    return {
+        "id": siniestro.id,
+        "carpeta": _folder(siniestro),
+        "numero_poliza": siniestro.numero_poliza,
+        "asegurado": siniestro.asegurado,
+        "tipo_siniestro": siniestro.tipo_siniestro,
+        "estado": siniestro.estado,
+        "prioridad": siniestro.prioridad,
+        "fecha_siniestro": _iso(siniestro.fecha_siniestro),
+        "fecha_reporte": _iso(siniestro.fecha_reporte),
+    }
+
+
+def _document_entry(
+    document: models.Document, archive_name: Optional[str], ocr_result: Any
+) -> Dict[str, Any]:
+    return {
+        "id": document.id,
+        "siniestro_id": document.siniestro_id,
+        # None si el archivo no estaba en el servidor
+        "archivo": archive_name,
+        "name": document.name,
+        "document_type": document.document_type,
+        "sha256": document.sha256,
+        "size_bytes": document.size_bytes,
+        "upload_date": _iso(document.upload_date),
+        "validated": document.validated,
+        "extracted_text": document.extracted_text,
+        "ocr": ocr_result,
+    }
+
+
+def stream_zip(siniestro_ids: List[int]) -> Iterator[bytes]:
+    """
+    Genera el ZIP por trozos. Debe llamarse con un hueco de export_slots ya
+    reservado; lo libera al terminar, también si el cliente se desconecta.
+    El primer trozo está vacío: consumirlo deja el generador iniciado, de modo que
+    el hueco se libera aunque la respuesta no llegue a enviarse.
+    """
+    try:
+        yield b""
+        sink = _Sink()
+        db = SessionLocal()
+        try:
+            siniestros = {s.id: s for s in crud.siniestro.get_multi_by_ids(db, ids=siniestro_ids)}
+            missing: Set[int] = set()
+            with zipfile.ZipFile(sink, "w") as archive:
+                after_id = 0
+                while True:
+                    batch = crud.document.get_export_batch(
+                        db, siniestro_ids=siniestro_ids, after_id=after_id, limit=_BATCH
+                    )
+                    if not batch:
+                        break
+                    after_id = batch[-1].id
+                    for document in batch:
+                        name = _archive_name(document, siniestros[document.siniestro_id])
+                        # El primer bloque se lee antes de abrir la entrada: si falta el
+                        # archivo no queda una entrada vacía en el ZIP
+                        blocks = blob_store.iter_content(document.path)
+                        try:
+                            first = next(blocks, b"")
+                        except OSError:
+                            logger.warning("Exportación: no existe el archivo del documento %s", document.id)
+                            missing.add(document.id)
+                            continue
+                        with archive.open(
+                            _zip_info(name, document.upload_date, compress=False), "w", force_zip64=True
+                        ) as entry:
+                            entry.write(first)
+                            yield sink.take()
+                            for block in blocks:
+                                entry.write(block)
+                                yield sink.take()
+                    db.expunge_all()
+
+                # El manifiesto se escribe por lotes, igual que los archivos
+                with archive.open(_zip_info("manifest.json", None, compress=True), "w") as entry:
+                    header = {
+                        "generado": datetime.utcnow().isoformat(),
+                        "siniestros": [_siniestro_entry(siniestros[i]) for i in sorted(siniestros)],
+                    }
+                    entry.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2].encode())
+                    entry.write(b',\n  "documentos": [')
+                    after_id = 0
+                    first = True
+                    while True:
+                        batch = crud.document.get_export_batch(
+                            db, siniestro_ids=siniestro_ids, after_id=after_id, limit=_BATCH
+                        )
+                        if not batch:
+                            break
+                        after_id = batch[-1].id
+                        results = crud.ocr_job.latest_results(db, document_ids=[d.id for d in batch])
+                        for document in batch:
+                            archive_name = None
+                            if document.id not in missing:
+                                archive_name = _archive_name(document, siniestros[document.siniestro_id])
+                            item = _document_entry(document, archive_name, results.get(document.id))
+                            entry.write(b"" if first else b",")
+                            entry.write(b"\n    " + json.dumps(item, ensure_ascii=False, default=str).encode())
+                            first = False
+                        db.expunge_all()
+                        yield sink.take()
+                    entry.write(b"\n  ]\n}\n")
+        finally:
+            db.close()
+        # Al cerrar el ZIP se escribe el índice central
+        yield sink.take()
+    finally:
+        export_slots.release()
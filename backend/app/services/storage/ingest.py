@@ -0,0 +1,149 @@
+# Última etapa de una subida: recomprimir las fotos y guardar el archivo en el almacén.
+#
+# Con UPLOAD_TRANSCODE_ENABLED, las imágenes (JPEG, PNG, BMP y TIFF de una página) se
+# giran según EXIF, se les quitan los metadatos, se reducen a UPLOAD_TRANSCODE_MAX_SIDE
+# y se guardan en JPEG o WebP. El lado mayor nunca baja de OCR_PREPROCESS_MAX_SIDE, así
+# que el OCR trabaja con los mismos píxeles que con el original. Si la copia no ahorra
+# al menos un 10 % se guarda el original. El original solo se conserva (como un blob
+# más, descargable aparte) para los tipos de UPLOAD_KEEP_ORIGINAL_TYPES.
+
+import logging
+import os
+import tempfile
+from typing import Any, Dict, NamedTuple, Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+from app.services.storage.blobs import BlobStore, blob_store
+
+logger = logging.getLogger(__name__)
+
+TRANSCODE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+# Ahorro mínimo para quedarse con la copia: por debajo no compensa la pérdida de calidad
+_MIN_SAVING = 0.1
+
+_FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+
+
+class Transcoded(NamedTuple):
+    path: str
+    name: str
+    sha256: str
+    size: int
+
+
+def should_transcode(name: str, size: int) -> bool:
+    return (
+        settings.UPLOAD_TRANSCODE_ENABLED
+        and size >= settings.UPLOAD_TRANSCODE_MIN_BYTES
+        and os.path.splitext(name)[1].lower() in TRANSCODE_EXTENSIONS
+    )
+
+
+def keeps_original(document_type: Optional[str]) -> bool:
+    key = (document_type or "").lower().replace("ó", "o")
+    return key in {t.lower() for t in settings.UPLOAD_KEEP_ORIGINAL_TYPES}
+
+
+def _prepare(image):
+    from PIL import Image, ImageOps
+
+    # Orientación aplicada a los píxeles: sin EXIF ya no se podría corregir después
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        # Transparencia sobre fondo blanco, como se vería impresa
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("L" if image.mode in ("1", "I", "I;16", "F") else "RGB")
+    return image
+
+
+def transcode_image(source: str, name: str, original_size: int) -> Optional[Transcoded]:
+    """
+    Copia recomprimida de la imagen en un temporal junto a source, o None si no se
+    puede leer, tiene varias páginas o no ahorra lo suficiente.
+    """
+    from PIL import Image
+
+    image_format, extension = _FORMATS.get(settings.UPLOAD_TRANSCODE_FORMAT.lower(), _FORMATS["jpeg"])
+    max_side = max(settings.UPLOAD_TRANSCODE_MAX_SIDE, settings.OCR_PREPROCESS_MAX_SIDE)
+    try:
+        with Image.open(source) as opened:
+            # Los TIFF de varias páginas se procesan página a página en el OCR
+            if getattr(opened, "n_frames", 1) > 1:
+                return None
+            scale = max_side / max(opened.size)
+            if scale < 1:
+                # JPEG: se decodifica directamente a un tamaño reducido
+                opened.draft(opened.mode, (round(opened.width * scale), round(opened.height * scale)))
+            image = _prepare(opened)
+            if max(image.size) > max_side:
+                image.thumbnail((max_side, max_side), Image.LANCZOS)
+            # El perfil de color solo vale si no ha cambiado el modo (CMYK -> RGB, por ejemplo)
+            icc_profile = opened.info.get("icc_profile") if image.mode == opened.mode else None
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.info("No se recomprime %s: %s", name, e)
+        return None
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(source), prefix=".", suffix=extension)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            options: Dict[str, Any] = {"quality": settings.UPLOAD_TRANSCODE_QUALITY}
+            if image_format == "JPEG":
+                options.update(optimize=True, progressive=True)
+            else:
+                options.update(method=4)
+            if icc_profile:
+                options["icc_profile"] = icc_profile
+            image.save(file, image_format, **options)
+        sha256, size = BlobStore.hash_file(temp_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    if size > original_size * (1 - _MIN_SAVING):
+        os.unlink(temp_path)
+        return None
+    return Transcoded(temp_path, os.path.splitext(name)[0] + extension, sha256, size)
+
+
+async def store_upload(
+    source: str, *, name: str, document_type: Optional[str], sha256: str, size: int
+) -> Dict[str, Any]:
+    """
+    Guarda en el almacén el archivo recibido en source (que se consume) y devuelve
+    los campos del documento: nombre, ubicación, hash, tamaño y datos del original
+    si se recomprimió.
+    """
+    transcoded = None
+    if should_transcode(name, size):
+        transcoded = await to_thread.run_sync(transcode_image, source, name, size)
+    if transcoded is None:
+        await blob_store.ainstall_file(source, sha256, move=True)
+        return {"name": name, "path": blob_store.path_for(sha256), "sha256": sha256, "size_bytes": size}
+
+    await blob_store.ainstall_file(transcoded.path, transcoded.sha256, move=True)
+    original_path = None
+    if keeps_original(document_type):
+        await blob_store.ainstall_file(source, sha256, move=True)
+        original_path = blob_store.path_for(sha256)
+    else:
+        await to_thread.run_sync(os.unlink, source)
+    logger.info(
+        "%s recomprimido: %d -> %d bytes (%.0f %% menos)",
+        name, size, transcoded.size, 100 * (1 - transcoded.size / size),
+    )
+    return {
+        "name": transcoded.name,
+        "path": blob_store.path_for(transcoded.sha256),
+        "sha256": transcoded.sha256,
+        "size_bytes": transcoded.size,
+        "original_name": name,
+        "original_sha256": sha256,
+        "original_size_bytes": size,
+        "original_path": original_path,
+    }
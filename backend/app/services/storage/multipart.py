@@ -0,0 +1,125 @@
+# Lee un archivo de un formulario multipart a medida que llega, sin guardarlo antes.
+#
+# Starlette (y UploadFile) reciben el cuerpo completo en un archivo temporal antes de
+# llamar al endpoint, así cada byte se escribe dos veces en disco. Aquí el cuerpo de
+# la petición se pasa al parser de python-multipart trozo a trozo y los datos del
+# archivo se entregan al llamador en cuanto se reciben.
+
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+# Eventos del parser: (tipo, datos). Los callbacks de python-multipart se ejecutan
+# durante write(), antes de procesar los eventos, por eso cada cabecera viaja en su
+# propio evento en lugar de guardarse en el lector
+_Event = Tuple[str, Any]
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class FilePart:
+    """Archivo del formulario: nombre, tipo de contenido y sus datos en trozos"""
+
+    def __init__(self, reader: "StreamingMultipartReader", filename: str, content_type: Optional[str]):
+        self._reader = reader
+        self.filename = filename
+        self.content_type = content_type
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            kind, data = await self._reader._next_event()
+            if kind == "data":
+                if data:
+                    yield data
+            elif kind in ("part_end", "end"):
+                return
+
+
+class StreamingMultipartReader:
+    def __init__(self, request: Request):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MultipartError("Se esperaba un formulario multipart/form-data")
+        self._stream = request.stream()
+        self._events: Deque[_Event] = deque()
+        self._finished = False
+        self._header_field = b""
+        self._header_value = b""
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": lambda: self._events.append(("part_begin", b"")),
+            "on_part_data": lambda data, start, end: self._events.append(("data", data[start:end])),
+            "on_part_end": lambda: self._events.append(("part_end", b"")),
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": lambda: self._events.append(("headers_finished", b"")),
+            "on_end": lambda: self._events.append(("end", b"")),
+        })
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._events.append(("header", (self._header_field.lower(), self._header_value)))
+        self._header_field = b""
+        self._header_value = b""
+
+    async def _next_event(self) -> _Event:
+        while not self._events:
+            if self._finished:
+                return ("end", b"")
+            try:
+                chunk = await self._stream.__anext__()
+            except StopAsyncIteration:
+                self._finished = True
+                self._feed(None)
+                continue
+            self._feed(chunk)
+        return self._events.popleft()
+
+    def _feed(self, chunk: Optional[bytes]) -> None:
+        # Un cuerpo mal formado (p. ej. con otro boundary) es un error del cliente
+        try:
+            if chunk is None:
+                self._parser.finalize()
+            else:
+                self._parser.write(chunk)
+        except MultipartParseError as e:
+            raise MultipartError(f"Formulario multipart mal formado: {e}") from e
+
+    async def file(self, field_name: str) -> FilePart:
+        """
+        Avanza hasta el archivo del campo indicado y lo devuelve. Las demás partes
+        del formulario que vengan antes se descartan.
+        """
+        headers: Dict[bytes, bytes] = {}
+        while True:
+            kind, data = await self._next_event()
+            if kind == "end":
+                raise MultipartError(f"Falta el archivo '{field_name}' en el formulario")
+            if kind == "part_begin":
+                headers = {}
+            elif kind == "header":
+                headers[data[0]] = data[1]
+            elif kind == "headers_finished":
+                _, options = parse_options_header(headers.get(b"content-disposition", b""))
+                if options.get(b"name") == field_name.encode() and b"filename" in options:
+                    content_type = headers.get(b"content-type")
+                    return FilePart(
+                        self,
+                        options[b"filename"].decode("utf-8", errors="replace"),
+                        content_type.decode("latin-1") if content_type else None,
+                    )
+
+    async def drain(self) -> None:
+        """Consume el resto del cuerpo para que la conexión quede lista para otra petición"""
+        while (await self._next_event())[0] != "end":
+            pass
@@ -0,0 +1,437 @@
+# Cliente mínimo para almacenamiento compatible con S3 (AWS S3, MinIO, Ceph, R2...).
+#
+# Solo cubre lo que usa el almacén de documentos: HEAD, GET por rangos en streaming,
+# PUT (multiparte para archivos grandes), DELETE, listado y URLs firmadas. Firma con
+# AWS Signature V4 sobre httpx, con un cliente síncrono (workers de OCR, scripts,
+# hilos) y otro asíncrono (endpoints), cada uno con su pool de conexiones.
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import os
+import threading
+import xml.etree.ElementTree as ElementTree
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import anyio
+import httpx
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+# S3 exige al menos 5 MB por parte salvo la última
+MIN_PART_BYTES = 5 * 1024 * 1024
+
+
+class S3Error(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"S3 respondió {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(params: Dict[str, str]) -> str:
+    return "&".join(
+        f"{_quote(key)}={_quote(str(value))}" for key, value in sorted(params.items())
+    )
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(element: ElementTree.Element, name: str) -> Optional[ElementTree.Element]:
+    for child in element:
+        if _local_name(child.tag) == name:
+            return child
+    return None
+
+
+def _text(element: ElementTree.Element, name: str) -> Optional[str]:
+    child = _find(element, name)
+    return child.text if child is not None else None
+
+
+class Signer:
+    """Firma AWS Signature V4 para el servicio s3"""
+
+    def __init__(self, access_key: str, secret_key: str, region: str):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+
+    def _scope(self, date: str) -> str:
+        return f"{date}/{self.region}/s3/aws4_request"
+
+    def _signature(self, amz_date: str, canonical_request: str) -> str:
+        date = amz_date[:8]
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            self._scope(date),
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        key = _hmac(("AWS4" + self.secret_key).encode(), date)
+        for part in (self.region, "s3", "aws4_request"):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def sign_headers(
+        self,
+        method: str,
+        url: str,
+        params: Dict[str, str],
+        headers: Dict[str, str],
+        payload_hash: str,
+        now: Optional[datetime.datetime] = None,
+    ) -> Dict[str, str]:
+        """Devuelve las cabeceras con Authorization, x-amz-date y x-amz-content-sha256"""
+        now = now or datetime.datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        parts = urlsplit(url)
+        signed = {key.lower(): value.strip() for key, value in headers.items()}
+        signed["host"] = parts.netloc
+        signed["x-amz-date"] = amz_date
+        signed["x-amz-content-sha256"] = payload_hash
+        names = sorted(signed)
+        canonical_request = "\n".join([
+            method,
+            _quote(parts.path or "/", safe="-_.~/"),
+            _canonical_query(params),
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            ";".join(names),
+            payload_hash,
+        ])
+        signature = self._signature(amz_date, canonical_request)
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{self._scope(amz_date[:8])}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        del signed["host"]
+        return signed
+
+    def presign(
+        self,
+        method: str,
+        url: str,
+        expires: int,
+        params: Optional[Dict[str, str]] = None,
+        now: Optional[datetime.datetime] = None,
+    ) -> str:
+        now = now or datetime.datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        parts = urlsplit(url)
+        query = dict(params or {})
+        query.update({
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{self._scope(amz_date[:8])}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires),
+            "X-Amz-SignedHeaders": "host",
+        })
+        canonical_request = "\n".join([
+            method,
+            _quote(parts.path or "/", safe="-_.~/"),
+            _canonical_query(query),
+            f"host:{parts.netloc}\n",
+            "host",
+            UNSIGNED_PAYLOAD,
+        ])
+        query["X-Amz-Signature"] = self._signature(amz_date, canonical_request)
+        return f"{parts.scheme}://{parts.netloc}{_quote(parts.path, safe='-_.~/')}?{_canonical_query(query)}"
+
+
+class S3Client:
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        endpoint_url: Optional[str] = None,
+        path_style: Optional[bool] = None,
+        max_connections: int = 20,
+        part_size: int = 8 * 1024 * 1024,
+        part_concurrency: int = 4,
+        timeout: float = 60,
+    ):
+        self.bucket = bucket
+        self.signer = Signer(access_key, secret_key, region)
+        # MinIO y la mayoría de compatibles usan rutas /bucket/clave; AWS, el bucket en el host
+        if path_style is None:
+            path_style = endpoint_url is not None
+        if endpoint_url:
+            endpoint = endpoint_url.rstrip("/")
+        else:
+            endpoint = f"https://s3.{region}.amazonaws.com"
+        if path_style:
+            self._base = f"{endpoint}/{bucket}"
+        else:
+            scheme, _, host = endpoint.partition("://")
+            self._base = f"{scheme}://{bucket}.{host}"
+        self.part_size = max(part_size, MIN_PART_BYTES)
+        self.part_concurrency = part_concurrency
+        self._limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self._timeout = httpx.Timeout(timeout)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    # Clientes HTTP: se crean al primer uso y mantienen las conexiones abiertas
+
+    @property
+    def client(self) -> httpx.Client:
+        # Lo comparten los hilos de la API y de las derivadas
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(limits=self._limits, timeout=self._timeout)
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Las conexiones pertenecen al event loop que las abrió; en la API hay uno solo,
+        # pero un script que llame varias veces a anyio.run necesita un pool nuevo
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+            self._async_loop = loop
+        return self._async_client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_client.aclose()
+        self._async_client = None
+
+    def url_for(self, key: str) -> str:
+        return f"{self._base}/{key}"
+
+    def _prepare(
+        self,
+        method: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        payload_hash: str = EMPTY_SHA256,
+    ) -> Tuple[str, Dict[str, str]]:
+        url = self.url_for(key)
+        params = params or {}
+        signed = self.signer.sign_headers(method, url, params, headers or {}, payload_hash)
+        # La URL se envía con la misma codificación que se firmó
+        full_url = self.url_for(_quote(key, safe="-_.~/"))
+        if params:
+            full_url += "?" + _canonical_query(params)
+        return full_url, signed
+
+    @staticmethod
+    def _check(response: httpx.Response, body: bytes = b"") -> None:
+        if response.status_code >= 300:
+            message = body.decode(errors="replace")[:300] or response.reason_phrase
+            if response.status_code == 404:
+                raise FileNotFoundError(message)
+            raise S3Error(response.status_code, message)
+
+    # Operaciones síncronas
+
+    def request(self, method: str, key: str, *, params=None, headers=None, content=None,
+                payload_hash: str = EMPTY_SHA256) -> httpx.Response:
+        url, signed = self._prepare(method, key, params, headers, payload_hash)
+        response = self.client.request(method, url, headers=signed, content=content)
+        self._check(response, response.content)
+        return response
+
+    def head(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.request("HEAD", key)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": int(response.headers.get("content-length", 0)),
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+        }
+
+    def iter_object(self, key: str, start: int = 0, end: Optional[int] = None,
+                    block_size: int = 1024 * 1024) -> Iterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        url, signed = self._prepare("GET", key, headers=headers)
+        with self.client.stream("GET", url, headers=signed) as response:
+            if response.status_code >= 300:
+                self._check(response, response.read())
+            yield from response.iter_bytes(block_size)
+
+    def download(self, key: str, destination: str) -> None:
+        with open(destination, "wb") as file:
+            for block in self.iter_object(key):
+                file.write(block)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.request("DELETE", key)
+        except FileNotFoundError:
+            pass
+
+    def copy_in_place(self, key: str) -> None:
+        """Copia el objeto sobre sí mismo (en el servidor) para renovar su fecha"""
+        self.request("PUT", key, headers={
+            "x-amz-copy-source": f"/{self.bucket}/{_quote(key, safe='-_.~/')}",
+            "x-amz-metadata-directive": "REPLACE",
+        })
+
+    def list_objects(self, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        """(clave, tamaño, fecha) de cada objeto bajo prefix, paginando con ListObjectsV2"""
+        token = None
+        while True:
+            params = {"list-type": "2", "prefix": prefix}
+            if token:
+                params["continuation-token"] = token
+            root = ElementTree.fromstring(self.request("GET", "", params=params).content)
+            for item in root:
+                if _local_name(item.tag) == "Contents":
+                    yield {
+                        "key": _text(item, "Key"),
+                        "size": int(_text(item, "Size") or 0),
+                        "last_modified": _text(item, "LastModified"),
+                    }
+            if _text(root, "IsTruncated") != "true":
+                return
+            token = _text(root, "NextContinuationToken")
+
+    def upload_file(self, key: str, path: str, content_type: str = "application/octet-stream") -> None:
+        size = os.path.getsize(path)
+        if size <= self.part_size:
+            with open(path, "rb") as file:
+                self.request("PUT", key, headers={"content-type": content_type},
+                             content=file.read(), payload_hash=UNSIGNED_PAYLOAD)
+            return
+        upload_id = self._create_multipart(self.request("POST", key, params={"uploads": ""},
+                                                        headers={"content-type": content_type}))
+        try:
+            parts = []
+            with open(path, "rb") as file:
+                number = 1
+                for block in iter(lambda: file.read(self.part_size), b""):
+                    response = self.request(
+                        "PUT", key, params={"partNumber": str(number), "uploadId": upload_id},
+                        content=block, payload_hash=UNSIGNED_PAYLOAD,
+                    )
+                    parts.append((number, response.headers["etag"]))
+                    number += 1
+            body = self._complete_body(parts)
+            self.request("POST", key, params={"uploadId": upload_id}, content=body,
+                         payload_hash=hashlib.sha256(body).hexdigest())
+        except BaseException:
+            self.request("DELETE", key, params={"uploadId": upload_id})
+            raise
+
+    # Operaciones asíncronas (endpoints)
+
+    async def arequest(self, method: str, key: str, *, params=None, headers=None, content=None,
+                       payload_hash: str = EMPTY_SHA256) -> httpx.Response:
+        url, signed = self._prepare(method, key, params, headers, payload_hash)
+        response = await self.async_client.request(method, url, headers=signed, content=content)
+        self._check(response, response.content)
+        return response
+
+    async def ahead(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.arequest("HEAD", key)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": int(response.headers.get("content-length", 0)),
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+        }
+
+    async def aiter_object(self, key: str, start: int = 0, end: Optional[int] = None,
+                           block_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        url, signed = self._prepare("GET", key, headers=headers)
+        async with self.async_client.stream("GET", url, headers=signed) as response:
+            if response.status_code >= 300:
+                self._check(response, await response.aread())
+            async for block in response.aiter_bytes(block_size):
+                yield block
+
+    async def aupload_file(self, key: str, path: str, content_type: str = "application/octet-stream") -> None:
+        """Sube un archivo local; los grandes en partes, varias a la vez"""
+        size = os.path.getsize(path)
+        if size <= self.part_size:
+            content = await anyio.to_thread.run_sync(_read_range, path, 0, size)
+            await self.arequest("PUT", key, headers={"content-type": content_type},
+                                content=content, payload_hash=UNSIGNED_PAYLOAD)
+            return
+        upload_id = self._create_multipart(await self.arequest(
+            "POST", key, params={"uploads": ""}, headers={"content-type": content_type}
+        ))
+        offsets = list(range(0, size, self.part_size))
+        etags: Dict[int, str] = {}
+        limiter = anyio.CapacityLimiter(self.part_concurrency)
+
+        async def send_part(number: int, offset: int) -> None:
+            async with limiter:
+                block = await anyio.to_thread.run_sync(_read_range, path, offset, self.part_size)
+                response = await self.arequest(
+                    "PUT", key, params={"partNumber": str(number), "uploadId": upload_id},
+                    content=block, payload_hash=UNSIGNED_PAYLOAD,
+                )
+                etags[number] = response.headers["etag"]
+
+        try:
+            async with anyio.create_task_group() as group:
+                for number, offset in enumerate(offsets, start=1):
+                    group.start_soon(send_part, number, offset)
+            body = self._complete_body(sorted(etags.items()))
+            await self.arequest("POST", key, params={"uploadId": upload_id}, content=body,
+                                payload_hash=hashlib.sha256(body).hexdigest())
+        except BaseException:
+            with anyio.CancelScope(shield=True):
+                await self.arequest("DELETE", key, params={"uploadId": upload_id})
+            raise
+
+    # Multiparte
+
+    @staticmethod
+    def _create_multipart(response: httpx.Response) -> str:
+        upload_id = _text(ElementTree.fromstring(response.content), "UploadId")
+        if not upload_id:
+            raise S3Error(response.status_code, "Respuesta sin UploadId")
+        return upload_id
+
+    @staticmethod
+    def _complete_body(parts: List[Tuple[int, str]]) -> bytes:
+        items = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in parts
+        )
+        return f"<CompleteMultipartUpload>{items}</CompleteMultipartUpload>".encode()
+
+    def presigned_get(self, key: str, expires: int, params: Optional[Dict[str, str]] = None) -> str:
+        return self.signer.presign("GET", self.url_for(key), expires, params)
+
+
+def _read_range(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as file:
+        file.seek(offset)
+        return file.read(length)
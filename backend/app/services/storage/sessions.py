@@ -0,0 +1,149 @@
+# Archivos de las subidas reanudables por partes.
+#
+# Cada sesión tiene un archivo del tamaño final creado al abrirla (disperso: no ocupa
+# disco hasta que llegan los datos). Cada parte se escribe en su posición con
+# os.pwrite desde su propio descriptor, así varias partes de la misma sesión se
+# escriben a la vez sin bloquearse. Al finalizar, el archivo se mueve al almacén de
+# blobs. Los archivos viven junto al almacén para que ese movimiento sea un rename
+# (con STORAGE_BACKEND=s3 se sube al bucket en partes). Son siempre locales: con
+# varias réplicas de la API, las peticiones de una sesión deben ir a la misma réplica
+# o el directorio debe estar compartido.
+#
+# Uso (desde el directorio backend), para limpiar desde cron en lugar de la API:
+#     python -m app.services.storage.sessions cleanup
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Dict, List
+
+from anyio import to_thread
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.storage.blobs import blob_store
+from app.services.storage.writer import WRITE_BUFFER_BYTES
+
+logger = logging.getLogger(__name__)
+
+sessions_directory = os.path.join(blob_store.root, "sessions")
+
+_last_cleanup = 0.0
+
+
+class ChunkOutOfRangeError(Exception):
+    pass
+
+
+def session_path(session_id: str) -> str:
+    return os.path.join(sessions_directory, f"{session_id}.part")
+
+
+def create_file(session_id: str, size: int) -> None:
+    os.makedirs(sessions_directory, exist_ok=True)
+    with open(session_path(session_id), "wb") as file:
+        file.truncate(size)
+
+
+def remove_file(session_id: str) -> None:
+    try:
+        os.unlink(session_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+async def write_range(session_id: str, offset: int, stream: AsyncIterator[bytes], end: int) -> int:
+    """
+    Escribe lo recibido en stream a partir de offset. Se corta con ChunkOutOfRangeError
+    si los datos pasarían de end. Devuelve los bytes escritos.
+    """
+    path = session_path(session_id)
+    try:
+        fd = await to_thread.run_sync(os.open, path, os.O_WRONLY)
+    except FileNotFoundError:
+        raise ChunkOutOfRangeError("La sesión de subida ya no existe")
+
+    position = offset
+    buffer: List[bytes] = []
+    buffered = 0
+
+    def flush(data: bytes, at: int) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, at)
+            view = view[written:]
+            at += written
+
+    try:
+        async for chunk in stream:
+            if position + buffered + len(chunk) > end:
+                raise ChunkOutOfRangeError("La parte excede el tamaño declarado")
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= WRITE_BUFFER_BYTES:
+                data, buffer, buffered = b"".join(buffer), [], 0
+                await to_thread.run_sync(flush, data, position)
+                position += len(data)
+        if buffer:
+            data = b"".join(buffer)
+            await to_thread.run_sync(flush, data, position)
+            position += len(data)
+        if settings.UPLOAD_FSYNC:
+            # La parte se registra como recibida solo cuando ya está en disco
+            await to_thread.run_sync(os.fsync, fd)
+    finally:
+        await to_thread.run_sync(os.close, fd)
+    return position - offset
+
+
+def cleanup_expired(db: Session) -> Dict[str, int]:
+    """Borra las sesiones caducadas, con su archivo si no llegaron a finalizarse"""
+    stats = {"sessions": 0, "removed_bytes": 0}
+    while True:
+        expired = crud.upload_session.get_expired(db)
+        if not expired:
+            break
+        for upload in expired:
+            path = session_path(upload.id)
+            if os.path.exists(path):
+                # Bloques realmente ocupados: el archivo es disperso
+                stats["removed_bytes"] += os.stat(path).st_blocks * 512
+                remove_file(upload.id)
+            crud.upload_session.remove_session(db, db_obj=upload)
+            stats["sessions"] += 1
+    return stats
+
+
+def maybe_cleanup(db: Session) -> None:
+    """Limpieza desde la API, como mucho una vez cada UPLOAD_SESSION_CLEANUP_INTERVAL_SECONDS"""
+    global _last_cleanup
+    now = time.monotonic()
+    if now - _last_cleanup < settings.UPLOAD_SESSION_CLEANUP_INTERVAL_SECONDS:
+        return
+    _last_cleanup = now
+    stats = cleanup_expired(db)
+    if stats["sessions"]:
+        logger.info("Sesiones de subida caducadas eliminadas: %s", stats)
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Limpieza de subidas reanudables caducadas")
+    parser.add_argument("command", choices=["cleanup"])
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        stats = cleanup_expired(db)
+    finally:
+        db.close()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Escribe un archivo recibido en trozos directamente en su ubicación final.
+#
+# Los datos van a un archivo temporal oculto en el mismo directorio y se renombran al
+# terminar (os.replace es atómico dentro de un sistema de archivos), así nunca se ve
+# un archivo a medio escribir. El SHA-256 y el tamaño se calculan mientras se escribe
+# y la escritura se hace en un hilo para no bloquear el event loop.
+
+import hashlib
+import os
+import tempfile
+from typing import List, Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB")
+        self.max_bytes = max_bytes
+
+
+def max_upload_bytes(document_type: Optional[str]) -> int:
+    """Límite de tamaño según el tipo de documento (UPLOAD_MAX_BYTES)"""
+    limits = settings.UPLOAD_MAX_BYTES
+    key = (document_type or "").lower().replace("ó", "o")
+    return limits.get(key, limits["default"])
+
+
+# Los trozos que llegan de la red son pequeños (~64 KB); se agrupan para escribir y
+# calcular el hash en bloques más grandes con un solo salto al hilo
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class AtomicFileWriter:
+    def __init__(self, path: str, max_bytes: Optional[int] = None, temp_directory: Optional[str] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        # El temporal debe estar en el mismo sistema de archivos que el destino
+        self._temp_directory = temp_directory
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._temp_path: Optional[str] = None
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def _open(self) -> None:
+        directory = self._temp_directory or os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def _write(self, chunks: List[bytes]) -> None:
+        for chunk in chunks:
+            self._hash.update(chunk)
+        self._file.write(b"".join(chunks))
+
+    def _commit(self) -> None:
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+        self._file.flush()
+        if settings.UPLOAD_FSYNC:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._install(self._temp_path)
+        self._temp_path = None
+
+    def _install(self, temp_path: str) -> None:
+        """Mueve el archivo completo a su destino"""
+        os.replace(temp_path, self.path)
+
+    def _abort(self) -> None:
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self._temp_path and os.path.exists(self._temp_path):
+            os.unlink(self._temp_path)
+        self._temp_path = None
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        # Se corta en cuanto se pasa del límite, sin esperar a recibir el resto
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= WRITE_BUFFER_BYTES:
+            chunks, self._buffer, self._buffered = self._buffer, [], 0
+            await to_thread.run_sync(self._write, chunks)
+
+    async def __aenter__(self) -> "AtomicFileWriter":
+        await to_thread.run_sync(self._open)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await to_thread.run_sync(self._commit)
+        else:
+            await to_thread.run_sync(self._abort)
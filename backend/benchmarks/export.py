@@ -0,0 +1,89 @@
+# Mide la exportación en ZIP de los documentos de un siniestro: velocidad y memoria.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.export --docs 200 --size-mb 5 --output export.json
+#
+# Crea un SQLite temporal con un siniestro y --docs documentos aleatorios de --size-mb,
+# recorre el generador del ZIP descartando los bytes (como un cliente rápido) y
+# comprueba que la memoria máxima del proceso no crece con el tamaño del ZIP.
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de exportación ZIP")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'export.db')}"
+
+    from sqlalchemy import insert
+
+    from app.db import base  # noqa: F401
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.document import Document
+    from app.models.siniestro import Siniestro
+    from app.services.storage import export
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        size = int(args.size_mb * 1024 * 1024)
+        db = SessionLocal()
+        db.execute(insert(Siniestro), [{"id": 1, "numero_poliza": "AU-1", "owner_id": 1}])
+        rows = []
+        for i in range(args.docs):
+            path = os.path.join(directory, f"doc{i}.bin")
+            with open(path, "wb") as file:
+                file.write(os.urandom(size))
+            rows.append({
+                "id": i + 1, "name": f"doc{i}.jpg", "path": path, "document_type": "otro",
+                "siniestro_id": 1, "extracted_text": "texto " * 200,
+            })
+        db.execute(insert(Document), rows)
+        db.commit()
+        db.close()
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        export.export_slots.acquire()
+        total = 0
+        chunks = 0
+        start = time.perf_counter()
+        for chunk in export.stream_zip([1]):
+            total += len(chunk)
+            chunks += 1
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report: Dict[str, Any] = {
+        "docs": args.docs,
+        "zip_mb": total / (1024 * 1024),
+        "chunks": chunks,
+        "seconds": elapsed,
+        "mb_per_sec": total / (1024 * 1024) / elapsed,
+        # ru_maxrss está en KB en Linux
+        "peak_rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+# Benchmark de OCR de extremo a extremo con documentos sintéticos (INE y pólizas).
+#
+# Uso (desde el directorio backend, sin red; requiere Tesseract con el idioma "spa"):
+#     python -m benchmarks.ocr --output ocr.json
+#     python -m benchmarks.ocr --mode service --resolution 1mp --pages 1 --pages 5
+#     python -m benchmarks.ocr --mode endpoint --workers 4 --concurrency 8
+#
+# Modo "service": llama a OCRService en este proceso (un núcleo) e informa del tiempo
+# de cada etapa (preprocesado y motor) a partir de OCRService.last_timings.
+# Modo "endpoint": envía los documentos a /api/documents/ocr-direct a través de la
+# aplicación ASGI, con el pool de procesos de OCR y la caché desactivada.
+# Ambos informan p50/p95/p99, documentos por segundo por núcleo y RSS máximo en JSON.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks import synthetic
+
+# (nombre del caso, nombre del archivo enviado, contenido)
+Case = Tuple[str, str, bytes]
+
+
+def build_cases(resolutions: List[str], page_counts: List[int], include_ine: bool) -> List[Case]:
+    cases: List[Case] = []
+    for resolution in resolutions:
+        if include_ine:
+            cases.append((f"ine_{resolution}", "ine.jpg", synthetic.encode(synthetic.ine_image(resolution))))
+        cases.append((f"poliza_{resolution}", "poliza.jpg", synthetic.encode(synthetic.poliza_page(resolution))))
+        for pages in page_counts:
+            if pages > 1:
+                cases.append((
+                    f"poliza_{resolution}_{pages}p_pdf",
+                    "poliza.pdf",
+                    synthetic.poliza_multipage(resolution, pages, "PDF"),
+                ))
+                cases.append((
+                    f"poliza_{resolution}_{pages}p_tiff",
+                    "poliza.tif",
+                    synthetic.poliza_multipage(resolution, pages, "TIFF"),
+                ))
+    return cases
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        # Percentil por rango más cercano: con pocas muestras p99 es el máximo
+        index = max(0, min(len(ordered) - 1, round(q * len(ordered) + 0.5) - 1))
+        return ordered[index]
+
+    return {
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # En Linux ru_maxrss está en KiB; RUSAGE_CHILDREN incluye los procesos del pool ya terminados
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def run_service(cases: List[Case], repeat: int) -> Dict[str, Any]:
+    from app.services.ocr import metrics, processing
+    from app.services.ocr.service import OCRService
+
+    metrics.reset()
+    service = OCRService()
+    service.warm_up()
+    results: Dict[str, Any] = {}
+    for name, filename, contents in cases:
+        document_type = processing.normalize_document_type(filename.split(".")[0])
+        samples: List[float] = []
+        stages: Dict[str, List[float]] = {}
+        for _ in range(repeat):
+            run_stages: Dict[str, float] = {}
+            start = time.perf_counter()
+            if processing.is_paged(contents[:4]):
+                # Página a página para sumar las etapas de todas las páginas
+                page_results = []
+                for index in range(service.page_count(contents)):
+                    page_results.append(service.read_page(contents, index, document_type))
+                    for stage, ms in service.last_timings.items():
+                        run_stages[stage] = run_stages.get(stage, 0.0) + ms
+                result = service.merge_pages(document_type, page_results)
+            else:
+                result = getattr(service, processing.ocr_method_for(document_type))(contents)
+                run_stages = dict(service.last_timings)
+            samples.append((time.perf_counter() - start) * 1000)
+            for stage, ms in run_stages.items():
+                stages.setdefault(stage, []).append(ms)
+        if processing.is_error_result(result):
+            results[name] = {"error": result.get("error") if isinstance(result, dict) else result}
+            continue
+        latency = percentiles(samples)
+        results[name] = {
+            "bytes": len(contents),
+            "runs": repeat,
+            **latency,
+            "docs_per_sec_per_core": 1000 / latency["mean_ms"],
+            "stages_ms": {stage: statistics.fmean(values) for stage, values in stages.items()},
+        }
+    # Cuántos documentos resolvió cada camino de la cascada de motores
+    results["cascade"] = metrics.snapshot()
+    return results
+
+
+def run_endpoint(cases: List[Case], repeat: int, workers: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    from app.api import deps
+    from app.core.config import settings
+    from app.main import app
+    from app.services.ocr import processing
+    from app.services.ocr.engine import ocr_engine
+
+    # Cada petición debe llegar al OCR: sin caché, sin base de datos y sin JWT
+    settings.OCR_CACHE_ENABLED = False
+    ocr_engine.max_workers = workers
+
+    def no_db():
+        yield None
+
+    app.dependency_overrides[deps.get_db] = no_db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: SimpleNamespace(
+        id=1, is_active=True, is_agent=True
+    )
+
+    async def post(client: httpx.AsyncClient, filename: str, contents: bytes) -> float:
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/documents/ocr-direct", files={"file": (filename, contents)}
+        )
+        response.raise_for_status()
+        # Un error del motor (p. ej. EasyOCR sin instalar) llega con código 200
+        body = response.json()
+        if processing.is_error_result(body.get("data", body.get("text"))):
+            raise RuntimeError(str(body.get("data", body.get("text"))))
+        return (time.perf_counter() - start) * 1000
+
+    async def run_case(filename: str, contents: bytes) -> Tuple[List[float], float]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(client: httpx.AsyncClient) -> float:
+            async with semaphore:
+                return await post(client, filename, contents)
+
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+            # Una petición previa para que los procesos del pool arranquen y carguen los motores
+            await asyncio.gather(*(post(client, filename, contents) for _ in range(workers)))
+            start = time.perf_counter()
+            samples = await asyncio.gather(*(bounded(client) for _ in range(repeat)))
+            return list(samples), time.perf_counter() - start
+
+    results: Dict[str, Any] = {}
+    ocr_engine.start()
+    try:
+        for name, filename, contents in cases:
+            try:
+                samples, elapsed = asyncio.run(run_case(filename, contents))
+            except httpx.HTTPStatusError as e:
+                results[name] = {"error": f"{e.response.status_code} {e.response.text[:200]}"}
+                continue
+            except RuntimeError as e:
+                results[name] = {"error": str(e)}
+                continue
+            results[name] = {
+                "bytes": len(contents),
+                "runs": repeat,
+                **percentiles(samples),
+                "docs_per_sec": repeat / elapsed,
+                "docs_per_sec_per_core": repeat / elapsed / workers,
+            }
+    finally:
+        ocr_engine.shutdown()
+        # Se espera a los procesos del pool para que cuenten en RUSAGE_CHILDREN
+        for process in multiprocessing.active_children():
+            process.join(timeout=30)
+        app.dependency_overrides.clear()
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _tesseract_available() -> bool:
+    from app.services.ocr.tesseract import TESSERACT_PATH
+
+    return os.path.exists(TESSERACT_PATH) or shutil.which(TESSERACT_PATH) is not None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de OCR con documentos sintéticos")
+    parser.add_argument("--mode", choices=["service", "endpoint", "both"], default="both")
+    parser.add_argument("--resolution", action="append", choices=sorted(synthetic.RESOLUTIONS))
+    parser.add_argument("--pages", action="append", type=int, help="Páginas de los PDF/TIFF (se puede repetir)")
+    parser.add_argument("--repeat", type=int, default=5, help="Documentos procesados por caso")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos del pool en modo endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Peticiones simultáneas en modo endpoint")
+    parser.add_argument("--no-ine", action="store_true", help="Omitir la INE (requiere EasyOCR)")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    if not _tesseract_available():
+        print("No se encontró Tesseract; configure TESSERACT_PATH", file=sys.stderr)
+        return 1
+
+    cases = build_cases(args.resolution or ["1mp", "5mp"], args.pages or [1, 3], not args.no_ine)
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "endpoint": {"workers": args.workers, "concurrency": args.concurrency},
+        "modes": {},
+    }
+    runners: Dict[str, Callable[[], Dict[str, Any]]] = {
+        "service": lambda: run_service(cases, args.repeat),
+        "endpoint": lambda: run_endpoint(cases, args.repeat, args.workers, args.concurrency),
+    }
+    for mode in (["service", "endpoint"] if args.mode == "both" else [args.mode]):
+        report["modes"][mode] = runners[mode]()
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
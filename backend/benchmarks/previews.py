@@ -0,0 +1,81 @@
+# Mide la generación de miniaturas y vistas previas y lo que ahorran frente al original.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.previews --repeat 5 --output previews.json
+#
+# Para cada documento sintético (INE en JPEG a varias resoluciones y pólizas PDF de
+# varias páginas) informa el tiempo de generación en frío, el de una lectura ya en
+# caché y los bytes del original, la miniatura y la vista previa: lo que descarga una
+# fila de la lista de documentos antes y después.
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from app.services.storage.derivatives import DerivativeCache
+from benchmarks import synthetic
+
+
+def documents() -> Dict[str, bytes]:
+    docs = {}
+    for resolution in synthetic.RESOLUTIONS:
+        docs[f"ine_{resolution}.jpg"] = synthetic.encode(synthetic.ine_image(resolution), "JPEG")
+    docs["poliza_5mp_10p.pdf"] = synthetic.poliza_multipage("5mp", 10, "PDF")
+    return docs
+
+
+def measure(cache: DerivativeCache, name: str, path: str, repeat: int) -> Dict[str, Any]:
+    cold = []
+    for i in range(repeat):
+        key = f"{name}-{i}"
+        start = time.perf_counter()
+        cache.get(key, path, "thumb")
+        cold.append((time.perf_counter() - start) * 1000)
+    warm = []
+    for _ in range(repeat * 20):
+        start = time.perf_counter()
+        cache.get(f"{name}-0", path, "thumb")
+        warm.append((time.perf_counter() - start) * 1000)
+    return {
+        "original_bytes": os.path.getsize(path),
+        "thumb_bytes": os.path.getsize(cache.path_for(f"{name}-0", "thumb")),
+        "preview_bytes": os.path.getsize(cache.path_for(f"{name}-0", "preview")),
+        "cold_ms": statistics.median(cold),
+        "warm_ms": statistics.median(warm),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de miniaturas y vistas previas")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        cache = DerivativeCache(os.path.join(directory, "derivatives"), max_bytes=1024 ** 3)
+        report: Dict[str, Any] = {"documents": {}}
+        for name, contents in documents().items():
+            path = os.path.join(directory, name)
+            with open(path, "wb") as file:
+                file.write(contents)
+            report["documents"][name] = measure(cache, name, path, args.repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
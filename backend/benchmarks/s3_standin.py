@@ -0,0 +1,255 @@
+# Servidor compatible con S3 mínimo, para probar el driver S3 sin MinIO ni AWS.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.s3_standin --port 9000 --directory /tmp/s3
+#
+# Guarda los objetos como archivos en --directory/<bucket>/<clave> y atiende lo que usa
+# app.services.storage.s3: HEAD, GET (con Range), PUT, copia sobre sí mismo, DELETE,
+# subidas multiparte y ListObjectsV2 paginado. Comprueba la firma SigV4 de cada
+# petición (cabecera Authorization o URL firmada) con las credenciales dadas.
+
+import argparse
+import datetime
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+import xml.etree.ElementTree as ElementTree
+from email.utils import formatdate
+from typing import Iterator
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app.services.storage.s3 import Signer
+
+_CREDENTIAL = re.compile(r"Credential=([^/]+)/(\d{8})/([^/]+)/s3/aws4_request")
+_SIGNED_HEADERS = re.compile(r"SignedHeaders=([^,]+)")
+_SIGNATURE = re.compile(r"Signature=([0-9a-f]+)")
+_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+def _xml(body: str, status_code: int = 200) -> Response:
+    return Response(
+        f'<?xml version="1.0" encoding="UTF-8"?>{body}', status_code=status_code, media_type="application/xml"
+    )
+
+
+def _error(code: str, status_code: int) -> Response:
+    return _xml(f"<Error><Code>{code}</Code></Error>", status_code)
+
+
+def _iter_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(256 * 1024, length))
+            if not block:
+                return
+            length -= len(block)
+            yield block
+
+
+class S3StandIn:
+    def __init__(self, directory: str, access_key: str, secret_key: str, page_size: int = 1000):
+        self.directory = directory
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.page_size = page_size
+        self.requests = 0
+        self.app = Starlette(routes=[
+            Route("/{bucket}", self.bucket, methods=["GET"]),
+            Route("/{bucket}/", self.bucket, methods=["GET"]),
+            Route("/{bucket}/{key:path}", self.object, methods=["GET", "HEAD", "PUT", "POST", "DELETE"]),
+        ])
+
+    # Firma
+
+    def _authorized(self, request: Request) -> bool:
+        params = dict(request.query_params)
+        url = f"{request.url.scheme}://{request.headers['host']}{request.url.path}"
+        if "X-Amz-Signature" in params:
+            signature = params.pop("X-Amz-Signature")
+            credential = _CREDENTIAL.match("Credential=" + params["X-Amz-Credential"])
+            now = datetime.datetime.strptime(params["X-Amz-Date"], "%Y%m%dT%H%M%SZ")
+            if now + datetime.timedelta(seconds=int(params["X-Amz-Expires"])) < datetime.datetime.utcnow():
+                return False
+            signer = Signer(credential.group(1), self.secret_key, credential.group(3))
+            for name in ("X-Amz-Algorithm", "X-Amz-Credential", "X-Amz-Date", "X-Amz-Expires", "X-Amz-SignedHeaders"):
+                params.pop(name)
+            expected = signer.presign(request.method, url, int(request.query_params["X-Amz-Expires"]), params, now=now)
+            return credential.group(1) == self.access_key and (
+                parse_qs(urlsplit(expected).query)["X-Amz-Signature"][0] == signature
+            )
+
+        authorization = request.headers.get("authorization", "")
+        credential = _CREDENTIAL.search(authorization)
+        if not credential or credential.group(1) != self.access_key:
+            return False
+        names = _SIGNED_HEADERS.search(authorization).group(1).split(";")
+        headers = {
+            name: request.headers.get(name, "")
+            for name in names if name not in ("host", "x-amz-date", "x-amz-content-sha256")
+        }
+        now = datetime.datetime.strptime(request.headers["x-amz-date"], "%Y%m%dT%H%M%SZ")
+        signer = Signer(self.access_key, self.secret_key, credential.group(3))
+        expected = signer.sign_headers(
+            request.method, url, params, headers, request.headers["x-amz-content-sha256"], now=now
+        )["authorization"]
+        return _SIGNATURE.search(expected).group(1) == _SIGNATURE.search(authorization).group(1)
+
+    # Rutas
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.directory, bucket, *key.split("/"))
+
+    async def bucket(self, request: Request) -> Response:
+        self.requests += 1
+        if not self._authorized(request):
+            return _error("SignatureDoesNotMatch", 403)
+        root = os.path.join(self.directory, request.path_params["bucket"])
+        prefix = request.query_params.get("prefix", "")
+        after = request.query_params.get("continuation-token", "")
+        keys = []
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, "/")
+                if key.startswith(prefix) and key > after and not key.startswith(".uploads/"):
+                    keys.append(key)
+        keys.sort()
+        page, truncated = keys[:self.page_size], len(keys) > self.page_size
+        items = []
+        for key in page:
+            info = os.stat(os.path.join(root, *key.split("/")))
+            modified = datetime.datetime.utcfromtimestamp(info.st_mtime).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            items.append(
+                f"<Contents><Key>{escape(key)}</Key><Size>{info.st_size}</Size>"
+                f"<LastModified>{modified}</LastModified></Contents>"
+            )
+        token = f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>" if truncated else ""
+        return _xml(
+            f'<ListBucketResult xmlns="{_NS}"><KeyCount>{len(page)}</KeyCount>'
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>{token}{''.join(items)}</ListBucketResult>"
+        )
+
+    async def object(self, request: Request) -> Response:
+        self.requests += 1
+        if not self._authorized(request):
+            return _error("SignatureDoesNotMatch", 403)
+        bucket, key = request.path_params["bucket"], request.path_params["key"]
+        path = self._path(bucket, key)
+        params = request.query_params
+        uploads = os.path.join(self.directory, bucket, ".uploads")
+
+        if request.method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            os.makedirs(os.path.join(uploads, upload_id))
+            return _xml(f'<InitiateMultipartUploadResult xmlns="{_NS}"><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+        if request.method == "PUT" and "uploadId" in params:
+            part = os.path.join(uploads, params["uploadId"], params["partNumber"])
+            digest = hashlib.md5()
+            with open(part, "wb") as file:
+                async for chunk in request.stream():
+                    digest.update(chunk)
+                    file.write(chunk)
+            return Response(headers={"ETag": f'"{digest.hexdigest()}"'})
+        if request.method == "POST" and "uploadId" in params:
+            parts = [
+                element.text for element in ElementTree.fromstring(await request.body()).iter()
+                if element.tag.endswith("PartNumber")
+            ]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as target:
+                for number in parts:
+                    with open(os.path.join(uploads, params["uploadId"], number), "rb") as source:
+                        shutil.copyfileobj(source, target)
+            os.replace(path + ".tmp", path)
+            shutil.rmtree(os.path.join(uploads, params["uploadId"]))
+            return _xml(f'<CompleteMultipartUploadResult xmlns="{_NS}"><Key>{escape(key)}</Key></CompleteMultipartUploadResult>')
+        if request.method == "DELETE" and "uploadId" in params:
+            shutil.rmtree(os.path.join(uploads, params["uploadId"]), ignore_errors=True)
+            return Response(status_code=204)
+
+        if request.method == "PUT":
+            if "x-amz-copy-source" in request.headers:
+                if not os.path.exists(path):
+                    return _error("NoSuchKey", 404)
+                os.utime(path)
+                return _xml(f'<CopyObjectResult xmlns="{_NS}"></CopyObjectResult>')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                async for chunk in request.stream():
+                    file.write(chunk)
+            os.replace(path + ".tmp", path)
+            return Response()
+        if request.method == "DELETE":
+            if os.path.exists(path):
+                os.unlink(path)
+            return Response(status_code=204)
+
+        if not os.path.isfile(path):
+            return _error("NoSuchKey", 404)
+        info = os.stat(path)
+        headers = {
+            "ETag": f'"{info.st_size:x}-{int(info.st_mtime):x}"',
+            "Last-Modified": formatdate(info.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+        }
+        start, end = 0, info.st_size - 1
+        status_code = 200
+        match = re.match(r"bytes=(\d*)-(\d*)$", request.headers.get("range", ""))
+        if match:
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), end) if match.group(2) else end
+            else:
+                start = max(0, info.st_size - int(match.group(2)))
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{info.st_size}"
+        headers["Content-Length"] = str(max(0, end - start + 1))
+        for name in ("content-disposition", "content-type"):
+            if f"response-{name}" in params:
+                headers[name] = params[f"response-{name}"]
+        if request.method == "HEAD":
+            return Response(status_code=status_code, headers=headers)
+        return StreamingResponse(
+            _iter_range(path, start, end - start + 1), status_code=status_code, headers=headers
+        )
+
+
+def serve(directory: str, port: int, access_key: str, secret_key: str, page_size: int = 1000):
+    """Arranca el servidor en un hilo. Devuelve (stand-in, servidor de uvicorn)"""
+    import threading
+
+    import uvicorn
+
+    standin = S3StandIn(directory, access_key, secret_key, page_size=page_size)
+    server = uvicorn.Server(uvicorn.Config(standin.app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return standin, server
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor compatible con S3 para pruebas")
+    parser.add_argument("--directory", required=True)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default="standin")
+    parser.add_argument("--secret-key", default="standin-secret")
+    args = parser.parse_args()
+    standin = S3StandIn(args.directory, args.access_key, args.secret_key)
+    uvicorn.run(standin.app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Mide el tiempo de arranque y la memoria (RSS) de la API y de los workers de OCR.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.startup --repeat 5 --output startup.json
+#     python -m benchmarks.startup --max-api-seconds 2 --max-api-rss-mb 150
+#
+# Cada escenario se ejecuta en un proceso nuevo. El resultado es JSON para poder
+# compararlo entre commits; con los umbrales --max-* el script termina con código 1
+# si la API supera el tiempo o la memoria indicados o si importa un módulo de OCR.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pytesseract", "tesserocr", "numpy", "easyocr", "torch"]
+
+_MEASURE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+SCENARIOS = {
+    # API solo CRUD
+    "api_crud_only": ("import app.main", {"OCR_ENABLED": "false"}),
+    # API con OCR habilitado: los modelos no se cargan hasta el primer uso
+    "api_with_ocr": ("import app.main", {"OCR_ENABLED": "true"}),
+    # Coste que se paga una vez en cada proceso de OCR al calentarlo
+    "ocr_worker_warm_up": (
+        "from app.services.ocr.service import OCRService\nOCRService().warm_up()",
+        {},
+    ),
+}
+
+
+def run_scenario(body: str, env_overrides: dict) -> dict:
+    env = dict(os.environ, **env_overrides)
+    code = _MEASURE.format(body=body, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la API")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--max-api-seconds", type=float)
+    parser.add_argument("--max-api-rss-mb", type=float)
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "scenarios": {}}
+    for name in args.scenario or list(SCENARIOS):
+        body, env_overrides = SCENARIOS[name]
+        try:
+            runs = [run_scenario(body, env_overrides) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            report["scenarios"][name] = {"error": e.stderr.strip().splitlines()[-1]}
+            continue
+        report["scenarios"][name] = {
+            "seconds_median": statistics.median(r["seconds"] for r in runs),
+            "seconds_max": max(r["seconds"] for r in runs),
+            "max_rss_mb": max(r["max_rss_mb"] for r in runs),
+            "heavy_modules": runs[-1]["heavy_modules"],
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+
+    api = report["scenarios"].get("api_crud_only", {})
+    failures = []
+    if api.get("heavy_modules"):
+        failures.append(f"la API importa módulos de OCR: {api['heavy_modules']}")
+    if args.max_api_seconds and api.get("seconds_median", 0) > args.max_api_seconds:
+        failures.append(f"arranque de la API {api['seconds_median']:.2f}s > {args.max_api_seconds}s")
+    if args.max_api_rss_mb and api.get("max_rss_mb", 0) > args.max_api_rss_mb:
+        failures.append(f"RSS de la API {api['max_rss_mb']:.0f}MB > {args.max_api_rss_mb}MB")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Comprueba el driver S3 del almacén de documentos y mide subidas y descargas.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.storage --files 4 --size-mb 24 --output storage.json
+#
+# Sin --endpoint arranca benchmarks.s3_standin en un puerto local; con --endpoint usa
+# un servidor real (MinIO, por ejemplo) y las credenciales --access-key/--secret-key.
+# Verifica subida simple y multiparte (síncrona y asíncrona), deduplicación, lectura
+# completa y por rangos, URL firmada, listado paginado y borrado; después compara el
+# rendimiento con el driver local.
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import anyio
+import httpx
+
+from app.services.storage.backends import LocalBackend, S3Backend
+from app.services.storage.blobs import BlobStore
+from app.services.storage.s3 import S3Client
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def make_files(directory: str, count: int, size: int) -> List[str]:
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"origen-{i}.bin")
+        with open(path, "wb") as file:
+            file.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def verify_s3(store: BlobStore, sample: str) -> None:
+    """Recorre todas las operaciones que usan la API y los workers"""
+    with open(sample, "rb") as file:
+        data = file.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    location = store.path_for(sha256)
+
+    check(store.install_file(sample, sha256), "la primera subida debe crear el blob")
+    check(not store.install_file(sample, sha256), "la segunda subida debe deduplicarse")
+    check(store.exists(sha256), "el blob debe existir")
+    check(store.local_path(location) is None, "un blob en S3 no tiene ruta local")
+    check(store.size(location) == len(data), "tamaño incorrecto")
+    check(store.read_bytes(location) == data, "contenido incorrecto")
+    check(b"".join(store.iter_content(location, 10, 1000)) == data[10:1001], "rango incorrecto")
+
+    async def read_async() -> bytes:
+        # Cada anyio.run crea un event loop; el pool asíncrono se cierra con el suyo
+        try:
+            return b"".join([block async for block in store.aiter_content(location, 5, 99)])
+        finally:
+            await store.backend.client.aclose()
+
+    check(anyio.run(read_async) == data[5:100], "rango asíncrono incorrecto")
+
+    with store.local_copy(location) as path:
+        check(os.path.getsize(path) == len(data), "copia local incompleta")
+    check(not os.path.exists(path), "la copia local debe borrarse")
+
+    url = store.presigned_url(location, {"response-content-disposition": 'attachment; filename="a.bin"'})
+    response = httpx.get(url, headers={"Range": "bytes=0-99"})
+    check(response.status_code == 206 and response.content == data[:100], "URL firmada no válida")
+    check(httpx.get(url.replace("X-Amz-Expires=", "X-Amz-Expires=9")).status_code == 403,
+          "una URL alterada debe rechazarse")
+
+    store.touch(sha256)
+    check(any(sha == sha256 for sha, _, _ in store.iter_blobs()), "el listado debe incluir el blob")
+    store.backend.delete(store.key_for(sha256))
+    check(not store.exists(sha256), "el blob debe borrarse")
+    try:
+        store.read_bytes(location)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("leer un blob borrado debe dar FileNotFoundError")
+
+
+def measure(store: BlobStore, paths: List[str], use_async: bool) -> Dict[str, Any]:
+    hashes = [BlobStore.hash_file(path)[0] for path in paths]
+    total = sum(os.path.getsize(path) for path in paths)
+
+    start = time.perf_counter()
+    if use_async:
+        async def upload_all() -> None:
+            async with anyio.create_task_group() as group:
+                for path, sha256 in zip(paths, hashes):
+                    group.start_soon(store.ainstall_file, path, sha256)
+            await store.aclose()
+
+        anyio.run(upload_all)
+    else:
+        for path, sha256 in zip(paths, hashes):
+            store.install_file(path, sha256)
+    upload = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for sha256 in hashes:
+        for _ in store.iter_content(store.path_for(sha256)):
+            pass
+    download = time.perf_counter() - start
+
+    check(sum(1 for _ in store.iter_blobs()) >= len(paths), "faltan blobs en el listado")
+    for sha256 in hashes:
+        store.backend.delete(store.key_for(sha256))
+    return {
+        "upload_mb_per_sec": total / (1024 * 1024) / upload,
+        "download_mb_per_sec": total / (1024 * 1024) / download,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Comprobación y benchmark del almacenamiento S3")
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--size-mb", type=float, default=24)
+    parser.add_argument("--endpoint", help="Servidor S3 existente; por defecto el sustituto local")
+    parser.add_argument("--bucket", default="documentos")
+    parser.add_argument("--access-key", default="standin")
+    parser.add_argument("--secret-key", default="standin-secret")
+    parser.add_argument("--port", type=int, default=9555)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    server = standin = None
+    try:
+        endpoint = args.endpoint
+        if endpoint is None:
+            from benchmarks.s3_standin import serve
+
+            # Páginas de dos objetos para probar la paginación del listado
+            standin, server = serve(
+                os.path.join(directory, "s3"), args.port, args.access_key, args.secret_key, page_size=2
+            )
+            endpoint = f"http://127.0.0.1:{args.port}"
+
+        client = S3Client(
+            args.bucket, access_key=args.access_key, secret_key=args.secret_key,
+            endpoint_url=endpoint, part_size=5 * 1024 * 1024,
+        )
+        s3_store = BlobStore(os.path.join(directory, "s3-cache"), S3Backend(client, prefix="blobs/"))
+        local_store = BlobStore(os.path.join(directory, "local"), LocalBackend(os.path.join(directory, "local")))
+
+        files = make_files(directory, args.files, int(args.size_mb * 1024 * 1024))
+        verify_s3(s3_store, files[0])
+
+        report: Dict[str, Any] = {
+            "files": args.files,
+            "size_mb": args.size_mb,
+            "endpoint": args.endpoint or "sustituto local",
+            "checks": "ok",
+            "local": measure(local_store, files, use_async=False),
+            "s3_sync": measure(s3_store, files, use_async=False),
+            "s3_async_multipart": measure(s3_store, files, use_async=True),
+        }
+        if standin is not None:
+            report["s3_requests"] = standin.requests
+    finally:
+        if server is not None:
+            server.should_exit = True
+        shutil.rmtree(directory, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Genera documentos sintéticos (INE y pólizas) con Pillow para los benchmarks de OCR.
+
+import io
+import random
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Lado mayor en píxeles de cada resolución de prueba
+RESOLUTIONS = {
+    "1mp": 1200,
+    "5mp": 2600,
+    "12mp": 4000,
+}
+
+NOMBRES = ["JUAN", "MARIA", "JOSE LUIS", "ANA SOFIA", "PEDRO", "GUADALUPE"]
+APELLIDOS = ["PEREZ", "LOPEZ", "GARCIA", "HERNANDEZ", "MARTINEZ", "RAMIREZ"]
+CLAUSULAS = [
+    "CONDICIONES GENERALES DEL CONTRATO DE SEGURO",
+    "El asegurado debera notificar el siniestro en un plazo de 5 dias.",
+    "Cobertura amplia con deducible del 5% sobre el valor comercial.",
+    "Responsabilidad civil por danos a terceros hasta $3,000,000.00",
+    "Para cualquier aclaracion comuniquese al 800 000 0000.",
+]
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    for name in ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def ine_image(resolution: str, seed: int = 0) -> Image.Image:
+    """Anverso de una credencial con el diseño de la plantilla de regiones"""
+    rng = random.Random(seed)
+    width = RESOLUTIONS[resolution]
+    height = round(width * 54 / 85.6)
+    card = Image.new("RGB", (width, height), (236, 232, 240))
+    draw = ImageDraw.Draw(card)
+    unit = width / 1012
+    font = _font(round(26 * unit))
+    small = _font(round(18 * unit))
+
+    def text(x: float, y: float, value: str, font=font) -> None:
+        draw.text((round(x * unit), round(y * unit)), value, fill=(20, 20, 20), font=font)
+
+    text(300, 40, "INSTITUTO NACIONAL ELECTORAL", small)
+    text(300, 70, "CREDENCIAL PARA VOTAR", small)
+    draw.rectangle(
+        (round(40 * unit), round(150 * unit), round(260 * unit), round(450 * unit)),
+        fill=(70, 70, 80),
+    )
+    apellido = rng.choice(APELLIDOS)
+    text(290, 145, "NOMBRE", small)
+    text(290, 170, f"{apellido} {rng.choice(APELLIDOS)}")
+    text(290, 205, rng.choice(NOMBRES))
+    text(290, 280, "DOMICILIO", small)
+    text(290, 305, f"C ROBLE {rng.randint(1, 999)} COL CENTRO")
+    text(290, 340, "CUAUHTEMOC CDMX")
+    text(290, 400, f"CLAVE DE ELECTOR {apellido[:4]}RJ{rng.randint(10000000, 99999999)}H{rng.randint(100, 999)}")
+    text(290, 445, f"CURP {apellido[:4]}{rng.randint(500101, 991231)}HDFRRN{rng.randint(10, 99)}")
+    return card
+
+
+def poliza_page(resolution: str, page: int = 1, seed: int = 0) -> Image.Image:
+    """Página tamaño carta con los datos de la póliza en la primera página"""
+    rng = random.Random(seed * 1000 + page)
+    height = RESOLUTIONS[resolution]
+    width = round(height * 8.5 / 11)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    unit = height / 1100
+    font = _font(round(16 * unit))
+    y = 60 * unit
+
+    def line(value: str) -> None:
+        nonlocal y
+        draw.text((round(60 * unit), round(y)), value, fill="black", font=font)
+        y += 26 * unit
+
+    if page == 1:
+        line("SEGUROS DEMO S.A. DE C.V.")
+        line(f"PÓLIZA: AU-{rng.randint(100000, 999999)}")
+        line(f"ASEGURADO: {rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}")
+        line("VIGENCIA: 01/01/2024 AL 01/01/2025")
+        line(f"SUMA ASEGURADA: ${rng.randint(100, 999)},000.00")
+        line(f"PRIMA: ${rng.randint(1, 30)},{rng.randint(100, 999)}.00")
+    while y < height - 80 * unit:
+        line(rng.choice(CLAUSULAS))
+    return image
+
+
+def encode(image: Image.Image, format: str = "JPEG") -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format, quality=90) if format == "JPEG" else image.save(buffer, format)
+    return buffer.getvalue()
+
+
+def poliza_multipage(resolution: str, pages: int, format: str = "PDF", seed: int = 0) -> bytes:
+    """PDF o TIFF multipágina; Pillow escribe ambos sin dependencias externas"""
+    images: List[Image.Image] = [poliza_page(resolution, page, seed) for page in range(1, pages + 1)]
+    buffer = io.BytesIO()
+    if format == "PDF":
+        images[0].save(buffer, "PDF", save_all=True, append_images=images[1:], resolution=200)
+    else:
+        images[0].save(buffer, "TIFF", save_all=True, append_images=images[1:], compression="tiff_deflate")
+    return buffer.getvalue()
@@ -0,0 +1,94 @@
+# Compara los backends de Tesseract: un proceso por llamada (pytesseract) frente a
+# una instancia persistente de libtesseract (tesserocr).
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.tesseract --calls 50 --output tesseract.json
+#
+# Se mide en el mismo proceso y sobre las mismas imágenes ya preprocesadas: recortes
+# pequeños (una línea, como las regiones de la INE) y páginas completas de póliza.
+# El primer uso de cada backend (carga del modelo) se informa aparte.
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image
+
+from app.services.ocr import preprocessing
+from app.services.ocr.tesseract import create_backend
+from benchmarks import synthetic
+
+
+def build_images() -> List[Tuple[str, Image.Image]]:
+    page = synthetic.poliza_page("1mp")
+    line = page.crop((0, 0, page.width, round(page.height * 0.09)))
+    card = synthetic.ine_image("1mp")
+    field = card.crop((round(card.width * 0.28), round(card.height * 0.62), round(card.width * 0.8), round(card.height * 0.77)))
+    images = [("linea_poliza", line), ("region_ine", field), ("pagina_poliza_1mp", page)]
+    return [(name, preprocessing.preprocess(image)[0]) for name, image in images]
+
+
+def measure(backend, images: List[Tuple[str, Image.Image]], calls: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    backend.image_to_string(images[0][1])
+    results: Dict[str, Any] = {"first_call_ms": (time.perf_counter() - start) * 1000, "images": {}}
+    for name, image in images:
+        samples = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            text = backend.image_to_string(image)
+            samples.append((time.perf_counter() - start) * 1000)
+        results["images"][name] = {
+            "ms_median": statistics.median(samples),
+            "ms_min": min(samples),
+            "calls_per_sec": 1000 / statistics.fmean(samples),
+            "text": text.strip(),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de backends de Tesseract")
+    parser.add_argument("--calls", type=int, default=20, help="Llamadas por imagen")
+    parser.add_argument("--backend", action="append", choices=["subprocess", "api"])
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    images = build_images()
+    report: Dict[str, Any] = {"calls": args.calls, "backends": {}}
+    for name in args.backend or ["subprocess", "api"]:
+        try:
+            backend = create_backend(name)
+        except ImportError as e:
+            report["backends"][name] = {"error": f"No disponible: {e}"}
+            continue
+        try:
+            report["backends"][name] = measure(backend, images, args.calls)
+        finally:
+            backend.close()
+
+    subprocess_result = report["backends"].get("subprocess", {})
+    api_result = report["backends"].get("api", {})
+    if "images" in subprocess_result and "images" in api_result:
+        report["speedup"] = {
+            image: subprocess_result["images"][image]["ms_median"] / api_result["images"][image]["ms_median"]
+            for image in api_result["images"]
+        }
+        report["same_text"] = {
+            image: subprocess_result["images"][image]["text"] == api_result["images"][image]["text"]
+            for image in api_result["images"]
+        }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
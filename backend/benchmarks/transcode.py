@@ -0,0 +1,139 @@
+# Mide la recompresión de fotos al subirlas: bytes ahorrados, tiempo y resolución final.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.transcode --format jpeg --quality 85 --output transcode.json
+#     python -m benchmarks.transcode --ocr   # compara también el texto del OCR (requiere Tesseract)
+#
+# Para cada documento sintético (INE y póliza a varias resoluciones, con ruido de cámara
+# y en JPEG, PNG, BMP y TIFF) informa el tamaño original y recomprimido, el tiempo de la
+# etapa y si la imagen guardada conserva los píxeles que usa el preprocesado del OCR.
+
+import argparse
+import difflib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.storage import ingest
+from benchmarks import synthetic
+
+# Como las fotos de un móvil: JPEG de alta calidad con ruido del sensor
+CAMERA_QUALITY = 95
+
+
+def photo(image: Image.Image) -> Image.Image:
+    noise = Image.effect_noise(image.size, 12).convert("RGB")
+    return Image.blend(image.convert("RGB"), noise, 0.08)
+
+
+def encode(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    if format == "JPEG":
+        image.save(buffer, format, quality=CAMERA_QUALITY)
+    else:
+        image.save(buffer, format)
+    return buffer.getvalue()
+
+
+def documents() -> Dict[str, bytes]:
+    docs = {}
+    for resolution in synthetic.RESOLUTIONS:
+        docs[f"ine_{resolution}.jpg"] = encode(photo(synthetic.ine_image(resolution)), "JPEG")
+        docs[f"poliza_{resolution}.jpg"] = encode(photo(synthetic.poliza_page(resolution)), "JPEG")
+    docs["poliza_5mp.png"] = encode(synthetic.poliza_page("5mp"), "PNG")
+    docs["poliza_5mp.bmp"] = encode(synthetic.poliza_page("5mp"), "BMP")
+    docs["ine_5mp.tiff"] = encode(photo(synthetic.ine_image("5mp")), "TIFF")
+    return docs
+
+
+def ocr_similarity(service: Any, original: bytes, transcoded: bytes) -> float:
+    before = service.extract_text_from_image(original)
+    after = service.extract_text_from_image(transcoded)
+    return difflib.SequenceMatcher(None, before, after).ratio()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de recompresión de imágenes al subirlas")
+    parser.add_argument("--format", default="jpeg", choices=["jpeg", "webp"])
+    parser.add_argument("--quality", type=int, default=settings.UPLOAD_TRANSCODE_QUALITY)
+    parser.add_argument("--max-side", type=int, default=settings.UPLOAD_TRANSCODE_MAX_SIDE)
+    parser.add_argument("--ocr", action="store_true", help="Comparar el texto del OCR antes y después")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    settings.UPLOAD_TRANSCODE_FORMAT = args.format
+    settings.UPLOAD_TRANSCODE_QUALITY = args.quality
+    settings.UPLOAD_TRANSCODE_MAX_SIDE = args.max_side
+    service = None
+    if args.ocr:
+        from app.services.ocr.service import OCRService
+
+        service = OCRService()
+
+    directory = tempfile.mkdtemp()
+    results: Dict[str, Any] = {}
+    total_before = total_after = 0
+    try:
+        for name, data in documents().items():
+            source = os.path.join(directory, name)
+            with open(source, "wb") as file:
+                file.write(data)
+            start = time.perf_counter()
+            transcoded = ingest.transcode_image(source, name, len(data))
+            elapsed = (time.perf_counter() - start) * 1000
+            with Image.open(source) as image:
+                original_side = max(image.size)
+            entry: Dict[str, Any] = {"original_bytes": len(data), "ms": elapsed}
+            total_before += len(data)
+            if transcoded is None:
+                entry["stored"] = "original"
+                total_after += len(data)
+            else:
+                with Image.open(transcoded.path) as image:
+                    stored_side = max(image.size)
+                entry.update({
+                    "stored": transcoded.name,
+                    "stored_bytes": transcoded.size,
+                    "saving_pct": 100 * (1 - transcoded.size / len(data)),
+                    "side_px": [original_side, stored_side],
+                    # El OCR reduce a OCR_PREPROCESS_MAX_SIDE: con esto ve los mismos píxeles
+                    "ocr_resolution_kept": stored_side >= min(original_side, settings.OCR_PREPROCESS_MAX_SIDE),
+                })
+                if service is not None:
+                    with open(transcoded.path, "rb") as file:
+                        entry["ocr_text_similarity"] = ocr_similarity(service, data, file.read())
+                total_after += transcoded.size
+                os.unlink(transcoded.path)
+            results[name] = entry
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "format": args.format,
+        "quality": args.quality,
+        "max_side": max(args.max_side, settings.OCR_PREPROCESS_MAX_SIDE),
+        "total_original_mb": total_before / (1024 * 1024),
+        "total_stored_mb": total_after / (1024 * 1024),
+        "total_saving_pct": 100 * (1 - total_after / total_before),
+        "median_ms": statistics.median(entry["ms"] for entry in results.values()),
+        "documents": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# Mide el rendimiento de subidas concurrentes de documentos contra un servidor uvicorn real.
+#
+# Uso (desde el directorio backend):
+#     python -m benchmarks.upload --size-mb 20 --uploads 32 --concurrency 8 --output upload.json
+#
+# Compara el endpoint actual (/api/documents/upload, escritura en streaming) con la
+# implementación anterior (UploadFile + shutil.copyfileobj), montada solo para el
+# benchmark en /legacy-upload, y la subida reanudable (/api/documents/uploads) enviando
+# --chunk-mb por parte con --parallel-chunks partes a la vez. Mientras suben los
+# archivos se consulta "/" en bucle: su latencia muestra cuánto se bloquea el event
+# loop del servidor.
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+SINIESTRO_ID = 1
+
+
+def create_app():
+    """Fábrica para uvicorn: la API con usuario y base de datos de prueba y la ruta anterior"""
+    from types import SimpleNamespace
+
+    from fastapi import File, UploadFile
+
+    from app import models
+    from app.api import deps
+    from app.core.config import settings
+    from app.db import base  # noqa: F401
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.get(models.Siniestro, SINIESTRO_ID) is None:
+        db.add(models.Siniestro(id=SINIESTRO_ID, owner_id=1))
+        db.commit()
+    db.close()
+    app.dependency_overrides[deps.get_current_active_user] = lambda: SimpleNamespace(
+        id=1, is_active=True, is_agent=True
+    )
+
+    @app.post("/legacy-upload/{siniestro_id}")
+    async def legacy_upload(siniestro_id: int, file: UploadFile = File(...)) -> Dict[str, Any]:
+        # Implementación anterior: Starlette ya guardó el archivo en un temporal y
+        # la copia se hace en el event loop
+        directory = os.path.join(settings.UPLOAD_DIRECTORY, "legacy", str(siniestro_id))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, file.filename), "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        return {"name": file.filename}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[max(0, min(len(ordered) - 1, round(q * len(ordered) + 0.5) - 1))]
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": ordered[-1]}
+
+
+async def resumable_upload(client: httpx.AsyncClient, name: str, payload: bytes, chunk_size: int, parallel: int) -> None:
+    response = await client.post("/api/documents/uploads/", json={
+        "siniestro_id": SINIESTRO_ID, "document_type": "otro", "name": name, "size_bytes": len(payload),
+    })
+    response.raise_for_status()
+    session_id = response.json()["id"]
+    offsets = list(range(0, len(payload), chunk_size))
+
+    async def send() -> None:
+        while offsets:
+            offset = offsets.pop()
+            chunk = await client.put(
+                f"/api/documents/uploads/{session_id}",
+                params={"offset": offset},
+                content=payload[offset:offset + chunk_size],
+            )
+            chunk.raise_for_status()
+
+    await asyncio.gather(*(send() for _ in range(parallel)))
+    (await client.post(f"/api/documents/uploads/{session_id}/complete")).raise_for_status()
+
+
+async def run_mode(
+    base_url: str, path: str, payload: bytes, uploads: int, concurrency: int,
+    chunk_size: int = 0, parallel_chunks: int = 1,
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    pings: List[float] = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+
+        async def upload(index: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                if chunk_size:
+                    await resumable_upload(client, f"bench-{index}.bin", payload, chunk_size, parallel_chunks)
+                else:
+                    response = await client.post(
+                        path,
+                        params={"document_type": "otro"},
+                        files={"file": (f"bench-{index}.bin", payload)},
+                    )
+                    response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        async def ping() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                pings.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        pinger = asyncio.create_task(ping())
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(uploads)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await pinger
+
+    return {
+        "seconds": elapsed,
+        "mb_per_sec": len(payload) * uploads / elapsed / (1024 * 1024),
+        "uploads_per_sec": uploads / elapsed,
+        "latency": _percentiles(latencies),
+        "event_loop_ping": _percentiles(pings) if pings else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de subida de documentos")
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mode", action="append", choices=["streaming", "legacy", "resumable"])
+    parser.add_argument("--chunk-mb", type=float, default=4, help="Tamaño de parte en modo resumable")
+    parser.add_argument("--parallel-chunks", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(directory, 'upload.db')}",
+        UPLOAD_DIRECTORY=os.path.join(directory, "uploads"),
+        UPLOAD_MAX_BYTES=json.dumps({"default": int((args.size_mb + 1) * 1024 * 1024)}),
+        OCR_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.upload:create_app", "--factory",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        payload = os.urandom(int(args.size_mb * 1024 * 1024))
+        paths = {
+            "streaming": f"/api/documents/upload/{SINIESTRO_ID}",
+            "legacy": f"/legacy-upload/{SINIESTRO_ID}",
+            "resumable": "/api/documents/uploads/",
+        }
+        report: Dict[str, Any] = {
+            "size_mb": args.size_mb,
+            "uploads": args.uploads,
+            "concurrency": args.concurrency,
+            "modes": {},
+        }
+        for mode in args.mode or ["legacy", "streaming", "resumable"]:
+            chunk_size = int(args.chunk_mb * 1024 * 1024) if mode == "resumable" else 0
+            report["modes"][mode] = asyncio.run(
+                run_mode(base_url, paths[mode], payload, args.uploads, args.concurrency,
+                         chunk_size, args.parallel_chunks)
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
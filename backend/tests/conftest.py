@@ -0,0 +1,73 @@
+# Configuración común de las pruebas: base de datos SQLite temporal y cliente de la API.
+#
+# Las variables de entorno se fijan antes de importar la aplicación, que lee la
+# configuración al importarse. El OCR y la generación de vistas previas en segundo plano
+# se desactivan para que las pruebas no dependan de Tesseract ni de EasyOCR.
+
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator
+
+import pytest
+
+_directory = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ["OCR_ENABLED"] = "false"
+os.environ["DERIVATIVE_PREGENERATE"] = "false"
+os.environ["UPLOAD_DIRECTORY"] = os.path.join(_directory, "uploads")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db import base  # noqa: E402,F401
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import stats  # noqa: E402
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    engine.dispose()
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """Sesión sobre tablas vacías, recreadas en cada prueba"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    stats.clear()
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(db: Session) -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _user(db: Session, email: str, is_agent: bool) -> models.User:
+    return crud.user.create(db, obj_in=schemas.UserCreate(email=email, password="x", is_agent=is_agent))
+
+
+def auth_headers(user: models.User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+
+@pytest.fixture
+def agent(db: Session) -> models.User:
+    return _user(db, "agente@example.com", is_agent=True)
+
+
+@pytest.fixture
+def user(db: Session) -> models.User:
+    return _user(db, "usuario@example.com", is_agent=False)
+
+
+@pytest.fixture
+def other_user(db: Session) -> models.User:
+    return _user(db, "otro@example.com", is_agent=False)
@@ -0,0 +1,149 @@
+# Acceso a los documentos: permisos, documentos inexistentes y consultas por petición.
+
+import io
+import threading
+from typing import List
+
+import pytest
+from PIL import Image
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import crud, schemas
+from tests.conftest import auth_headers
+
+
+def _png(seed: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (seed % 256, 255, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _siniestro(db, owner) -> int:
+    return crud.siniestro.create_with_owner(
+        db,
+        obj_in=schemas.SiniestroCreate(numero_poliza="AU-1", asegurado="Asegurado", tipo_siniestro="Auto"),
+        owner_id=owner.id,
+    ).id
+
+
+def _upload(client, headers, siniestro_id: int, seed: int = 0) -> int:
+    response = client.post(
+        f"/api/documents/upload/{siniestro_id}",
+        files={"file": (f"doc-{seed}.png", _png(seed), "image/png")},
+        params={"document_type": "otro"},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL que llegan a cualquier motor (síncrono o asíncrono)"""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(Engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(Engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def documents(client, db, user, other_user):
+    """Un documento del usuario y otro de un siniestro ajeno"""
+    own = _upload(client, auth_headers(user), _siniestro(db, user), seed=1)
+    foreign = _upload(client, auth_headers(other_user), _siniestro(db, other_user), seed=2)
+    return own, foreign
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("GET", "/api/documents/download/{id}"),
+        ("HEAD", "/api/documents/download/{id}"),
+        ("GET", "/api/documents/preview/{id}"),
+        ("POST", "/api/documents/ocr-jobs/{id}"),
+    ],
+)
+def test_foreign_and_missing_documents(client, user, documents, method, path):
+    own, foreign = documents
+    headers = auth_headers(user)
+    assert client.request(method, path.format(id=foreign), headers=headers).status_code == 403
+    assert client.request(method, path.format(id=999999), headers=headers).status_code == 404
+    assert client.request(method, path.format(id=own), headers=headers).status_code in (200, 202)
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("GET", "/api/documents/download/{id}"),
+        ("HEAD", "/api/documents/download/{id}"),
+        ("GET", "/api/documents/preview/{id}"),
+    ],
+)
+@pytest.mark.parametrize("target, status", [("own", 200), ("foreign", 403), ("missing", 404)])
+def test_document_access_query_count(client, user, documents, method, path, target, status):
+    own, foreign = documents
+    document_id = {"own": own, "foreign": foreign, "missing": 999999}[target]
+    headers = auth_headers(user)
+    if path.startswith("/api/documents/preview") and target == "own":
+        # La vista previa se genera en la primera petición; se mide la siguiente
+        client.get(path.format(id=document_id), headers=headers)
+
+    with QueryCounter() as counter:
+        response = client.request(method, path.format(id=document_id), headers=headers)
+    assert response.status_code == status
+    # Usuario del token y documento con su siniestro (get_authorized_document)
+    assert len(counter.statements) <= 2, counter.statements
+
+
+def test_agent_can_read_any_document(client, agent, documents):
+    _, foreign = documents
+    response = client.get(f"/api/documents/download/{foreign}", headers=auth_headers(agent))
+    assert response.status_code == 200
+
+
+def test_ocr_job_permissions(client, user, other_user, documents):
+    _, foreign = documents
+    job = client.post(f"/api/documents/ocr-jobs/{foreign}", headers=auth_headers(other_user)).json()
+    assert client.get(f"/api/documents/ocr-jobs/{job['id']}", headers=auth_headers(user)).status_code == 403
+    assert client.get(f"/api/documents/ocr-jobs/{job['id']}", headers=auth_headers(other_user)).status_code == 200
+    assert client.get("/api/documents/ocr-jobs/999999", headers=auth_headers(user)).status_code == 404
+
+
+def test_ocr_job_of_deleted_document(client, db, user, documents):
+    own, _ = documents
+    job = client.post(f"/api/documents/ocr-jobs/{own}", headers=auth_headers(user)).json()
+    crud.document.remove(db, id=own)
+    response = client.get(f"/api/documents/ocr-jobs/{job['id']}", headers=auth_headers(user))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Documento no encontrado"
+
+
+def test_siniestro_detail_permissions(client, db, user, other_user):
+    foreign = _siniestro(db, other_user)
+    assert client.get(f"/api/siniestros/{foreign}/detail", headers=auth_headers(user)).status_code == 403
+    assert client.get("/api/siniestros/999999/detail", headers=auth_headers(user)).status_code == 404
+
+
+@pytest.mark.parametrize("count", [1, 10])
+def test_siniestro_detail_query_count(client, db, user, count):
+    headers = auth_headers(user)
+    siniestro_id = _siniestro(db, user)
+    uploaded = [_upload(client, headers, siniestro_id, seed=i) for i in range(count)]
+
+    with QueryCounter() as counter:
+        response = client.get(f"/api/siniestros/{siniestro_id}/detail", headers=headers)
+    assert response.status_code == 200
+    assert [document["id"] for document in response.json()["documentos"]] == uploaded
+    # Usuario del token, siniestro y sus documentos (selectinload), sin N+1
+    assert len(counter.statements) <= 3, counter.statements
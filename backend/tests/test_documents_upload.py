@@ -0,0 +1,50 @@
+# Subida de documentos en streaming: formularios mal formados y permisos.
+
+from app import crud, schemas
+from tests.conftest import auth_headers
+
+
+def _siniestro(db, owner) -> int:
+    return crud.siniestro.create_with_owner(
+        db,
+        obj_in=schemas.SiniestroCreate(numero_poliza="AU-1", asegurado="Asegurado", tipo_siniestro="Auto"),
+        owner_id=owner.id,
+    ).id
+
+
+def _post(client, headers, siniestro_id: int, body: bytes, boundary: str = "limite"):
+    return client.post(
+        f"/api/documents/upload/{siniestro_id}",
+        params={"document_type": "otro"},
+        content=body,
+        headers={**headers, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+
+
+def test_mismatched_boundary_is_rejected(client, db, user):
+    body = (
+        b"--otro\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+        b"Content-Type: text/plain\r\n\r\nhola\r\n--otro--\r\n"
+    )
+    response = _post(client, auth_headers(user), _siniestro(db, user), body)
+    assert response.status_code == 400
+
+
+def test_missing_file_part_is_rejected(client, db, user):
+    body = b'--limite\r\nContent-Disposition: form-data; name="nota"\r\n\r\nhola\r\n--limite--\r\n'
+    response = _post(client, auth_headers(user), _siniestro(db, user), body)
+    assert response.status_code == 400
+
+
+def test_upload_permissions(client, db, user, other_user):
+    body = (
+        b"--limite\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+        b"Content-Type: text/plain\r\n\r\nhola\r\n--limite--\r\n"
+    )
+    assert _post(client, auth_headers(user), _siniestro(db, other_user), body).status_code == 403
+    assert _post(client, auth_headers(user), 999999, body).status_code == 404
+    response = _post(client, auth_headers(user), _siniestro(db, user), body)
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "a.txt"
@@ -0,0 +1,183 @@
+# Listado de siniestros: combinaciones de filtros, orden y estabilidad del cursor.
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pytest
+from sqlalchemy import insert
+
+from app.crud.crud_siniestro import SORT_KEYS, sort_keys
+from app.models.siniestro import Siniestro
+from tests.conftest import auth_headers
+
+START = datetime(2024, 1, 1)
+ESTADOS = ["Nuevo", "En Proceso", "Resuelto"]
+PRIORIDADES = ["Alta", "Media", "Baja"]
+TIPOS = ["Auto", "Hogar", "Vida"]
+SORTS = [prefix + key for key in SORT_KEYS for prefix in ("", "-")]
+
+
+@pytest.fixture
+def rows(db, user, other_user) -> List[Dict[str, Any]]:
+    """
+    30 siniestros repartidos entre dos usuarios. Las fechas se repiten cada pocas
+    filas para que el orden dependa también del desempate por id.
+    """
+    values = []
+    for i in range(1, 31):
+        values.append({
+            "id": i,
+            "numero_poliza": f"AU-{i:03d}",
+            "asegurado": "Ana 100% López" if i % 7 == 0 else f"Asegurado {i}",
+            "tipo_siniestro": TIPOS[i % 3],
+            "estado": ESTADOS[i % 3],
+            "prioridad": PRIORIDADES[(i // 3) % 3],
+            "fecha_siniestro": START + timedelta(days=(i * 7) % 11),
+            "fecha_reporte": START + timedelta(days=i // 4),
+            "owner_id": user.id if i % 2 else other_user.id,
+        })
+    db.execute(insert(Siniestro), values)
+    db.commit()
+    return values
+
+
+def _list(client, headers, **params) -> List[Dict[str, Any]]:
+    response = client.get("/api/siniestros/", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _all_pages(client, headers, **params) -> List[int]:
+    """Recorre el listado siguiendo X-Next-Cursor y devuelve los ids en orden"""
+    ids: List[int] = []
+    cursor: Optional[str] = None
+    while True:
+        response = client.get(
+            "/api/siniestros/", params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+        ids.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+def _expected(rows, sort: str, predicate=lambda row: True) -> List[int]:
+    field = sort.lstrip("-")
+    selected = [row for row in rows if predicate(row)]
+    selected.sort(key=lambda row: (row[field], row["id"]), reverse=sort.startswith("-"))
+    return [row["id"] for row in selected]
+
+
+@pytest.mark.parametrize(
+    "params, predicate",
+    [
+        ({"estado": "Nuevo"}, lambda r: r["estado"] == "Nuevo"),
+        ({"estado": "Nuevo", "prioridad": "Alta"}, lambda r: r["estado"] == "Nuevo" and r["prioridad"] == "Alta"),
+        (
+            {"tipo_siniestro": "Hogar", "prioridad": "Baja"},
+            lambda r: r["tipo_siniestro"] == "Hogar" and r["prioridad"] == "Baja",
+        ),
+        (
+            {"fecha_reporte_desde": "2024-01-03T00:00:00", "fecha_reporte_hasta": "2024-01-05T00:00:00"},
+            lambda r: START + timedelta(days=2) <= r["fecha_reporte"] <= START + timedelta(days=4),
+        ),
+        (
+            {"fecha_siniestro_desde": "2024-01-05T00:00:00", "estado": "Resuelto"},
+            lambda r: r["fecha_siniestro"] >= START + timedelta(days=4) and r["estado"] == "Resuelto",
+        ),
+        ({"q": "au-01"}, lambda r: "AU-01" in r["numero_poliza"]),
+        # El % se busca literalmente, no como comodín de LIKE
+        ({"q": "100%"}, lambda r: "100%" in r["asegurado"]),
+        ({"q": "hogar", "prioridad": "Alta"}, lambda r: r["tipo_siniestro"] == "Hogar" and r["prioridad"] == "Alta"),
+    ],
+)
+def test_filter_combinations(client, agent, rows, params, predicate):
+    expected = _expected(rows, "-id", predicate)
+    assert expected, "el caso debe tener resultados"
+    assert [item["id"] for item in _list(client, auth_headers(agent), limit=500, **params)] == expected
+
+
+def test_user_only_sees_own_siniestros_with_filters(client, user, other_user, rows):
+    items = _list(client, auth_headers(user), estado="Nuevo", limit=500)
+    assert [item["id"] for item in items] == _expected(
+        rows, "-id", lambda r: r["estado"] == "Nuevo" and r["owner_id"] == user.id
+    )
+    # Un usuario no puede pedir los de otro
+    response = client.get("/api/siniestros/", params={"owner_id": other_user.id}, headers=auth_headers(user))
+    assert response.status_code == 403
+
+
+def test_agent_filters_by_owner(client, agent, other_user, rows):
+    items = _list(client, auth_headers(agent), owner_id=other_user.id, prioridad="Media", limit=500)
+    assert [item["id"] for item in items] == _expected(
+        rows, "-id", lambda r: r["owner_id"] == other_user.id and r["prioridad"] == "Media"
+    )
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_sort(client, agent, rows, sort):
+    items = _list(client, auth_headers(agent), sort=sort, limit=500)
+    assert [item["id"] for item in items] == _expected(rows, sort)
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_cursor_pages_cover_every_row_once(client, agent, rows, sort):
+    ids = _all_pages(client, auth_headers(agent), sort=sort, limit=4)
+    assert ids == _expected(rows, sort)
+
+
+@pytest.mark.parametrize("sort", ["-id", "fecha_reporte", "-fecha_siniestro"])
+def test_cursor_pages_with_filters(client, agent, rows, sort):
+    ids = _all_pages(client, auth_headers(agent), sort=sort, estado="En Proceso", limit=3)
+    assert ids == _expected(rows, sort, lambda r: r["estado"] == "En Proceso")
+
+
+def test_cursor_is_stable_when_rows_are_added(client, db, agent, user, rows):
+    headers = auth_headers(agent)
+    first = client.get("/api/siniestros/", params={"sort": "-fecha_reporte", "limit": 10}, headers=headers)
+    seen = [item["id"] for item in first.json()]
+    # Un siniestro nuevo que iría al principio no desplaza la página siguiente
+    db.execute(insert(Siniestro), [{
+        "id": 100, "numero_poliza": "AU-100", "owner_id": user.id,
+        "fecha_reporte": START + timedelta(days=365), "fecha_siniestro": START,
+    }])
+    db.commit()
+    cursor = first.headers["X-Next-Cursor"]
+    rest = _all_pages(client, headers, sort="-fecha_reporte", limit=10, cursor=cursor)
+    assert 100 not in rest
+    assert seen + rest == _expected(rows, "-fecha_reporte")
+
+
+def test_prev_cursor_returns_previous_page(client, agent, rows):
+    headers = auth_headers(agent)
+    first = client.get("/api/siniestros/", params={"sort": "fecha_siniestro", "limit": 5}, headers=headers)
+    second = client.get(
+        "/api/siniestros/",
+        params={"sort": "fecha_siniestro", "limit": 5, "cursor": first.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    back = client.get(
+        "/api/siniestros/",
+        params={"sort": "fecha_siniestro", "limit": 5, "cursor": second.headers["X-Prev-Cursor"]},
+        headers=headers,
+    )
+    assert [item["id"] for item in back.json()] == [item["id"] for item in first.json()]
+
+
+def test_invalid_sort_and_cursor(client, agent, rows):
+    headers = auth_headers(agent)
+    for sort in ("estado", "--id", "id-"):
+        assert client.get("/api/siniestros/", params={"sort": sort}, headers=headers).status_code == 422
+    assert client.get("/api/siniestros/", params={"cursor": "no-es-un-cursor"}, headers=headers).status_code == 400
+
+
+def test_sort_keys():
+    keys, descending = sort_keys("-fecha_reporte")
+    assert descending and keys == SORT_KEYS["fecha_reporte"]
+    keys, descending = sort_keys("id")
+    assert not descending and keys == SORT_KEYS["id"]
+    # Todos los órdenes terminan en el id para que el cursor sea único
+    assert all(keys[-1] is Siniestro.id for keys in SORT_KEYS.values())
+    with pytest.raises(ValueError):
+        sort_keys("--id")
@@ -0,0 +1,53 @@
+# Planes de consulta del listado de siniestros en SQLite: cada filtro y orden usa su
+# índice compuesto sin recorrer la tabla ni ordenar aparte. Mismos casos que
+# benchmarks/query_plans.py, con menos filas.
+
+import os
+import tempfile
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db.base_class import Base
+from benchmarks.query_plans import CASES, explain, full_scan, populate, temp_sort
+
+ROWS = 5000
+
+
+@pytest.fixture(scope="module")
+def plans_db() -> Iterator[Session]:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'plans.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate(engine, ROWS, batch=ROWS)
+        with Session(engine) as db:
+            yield db
+        engine.dispose()
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_list_query_uses_index(plans_db, name):
+    filters, sort, indexes = CASES[name]
+    plan = explain(plans_db, filters, sort)
+    assert not full_scan(plan), plan
+    assert not temp_sort(plan), plan
+    assert any(index in line for line in plan for index in indexes), plan
+
+
+def test_plan_check_detects_missing_index():
+    # Sin el índice compuesto el mismo listado recorre la tabla u ordena aparte
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'plans.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_siniestros_fecha_reporte_id"))
+        populate(engine, 1000, batch=1000)
+        try:
+            with Session(engine) as db:
+                filters, sort, _ = CASES["agente_fecha_reporte"]
+                plan = explain(db, filters, sort)
+            assert full_scan(plan) or temp_sort(plan), plan
+        finally:
+            engine.dispose()
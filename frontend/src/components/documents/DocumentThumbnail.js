@@ -0,0 +1,74 @@
+import React, { useState, useEffect } from 'react';
+import { Box, CircularProgress } from '@mui/material';
+import DescriptionIcon from '@mui/icons-material/Description';
+import apiClient from '../../services/api';
+
+// Miniatura o vista previa generada por el servidor. Se pide con apiClient (la ruta
+// necesita el token) y el navegador la guarda en caché: la respuesta es inmutable
+const DocumentThumbnail = ({ documentId, size = 'thumb', alt, fallback, sx }) => {
+  const [imageUrl, setImageUrl] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [failed, setFailed] = useState(false);
+
+  useEffect(() => {
+    let objectUrl = null;
+    let cancelled = false;
+
+    const fetchPreview = async () => {
+      setLoading(true);
+      setFailed(false);
+      try {
+        const response = await apiClient.get(`/api/documents/preview/${documentId}`, {
+          params: { size },
+          responseType: 'blob',
+        });
+        if (!cancelled) {
+          objectUrl = URL.createObjectURL(response.data);
+          setImageUrl(objectUrl);
+        }
+      } catch (err) {
+        if (!cancelled) {
+          setFailed(true);
+        }
+      } finally {
+        if (!cancelled) {
+          setLoading(false);
+        }
+      }
+    };
+
+    if (documentId) {
+      fetchPreview();
+    }
+
+    return () => {
+      cancelled = true;
+      if (objectUrl) {
+        URL.revokeObjectURL(objectUrl);
+      }
+    };
+  }, [documentId, size]);
+
+  if (loading) {
+    return (
+      <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', ...sx }}>
+        <CircularProgress size={size === 'thumb' ? 20 : 40} />
+      </Box>
+    );
+  }
+
+  if (failed || !imageUrl) {
+    return fallback || <DescriptionIcon sx={{ color: 'text.secondary' }} />;
+  }
+
+  return (
+    <Box
+      component="img"
+      src={imageUrl}
+      alt={alt || 'Vista previa'}
+      sx={{ objectFit: 'contain', display: 'block', ...sx }}
+    />
+  );
+};
+
+export default DocumentThumbnail;
@@ -10,6 +10,7 @@ import {
 import PictureAsPdfIcon from '@mui/icons-material/PictureAsPdf';
 import ImageIcon from '@mui/icons-material/Image';
 import DescriptionIcon from '@mui/icons-material/Description';
+import DocumentThumbnail from './DocumentThumbnail';
 
 // Tipos MIME para imágenes
 const IMAGE_MIME_TYPES = [
@@ -108,6 +109,30 @@ const DocumentViewer = ({ documentId, documentUrl, documentName, documentType })
     );
   }
   
+  // Documento guardado: se muestra la vista previa del servidor (primera página en
+  // PDF) en lugar de descargar el original completo
+  if (!documentUrl && documentId && (isPdf || isImage)) {
+    return (
+      <Paper elevation={1} sx={{ overflow: 'hidden', borderRadius: 2, p: 2, textAlign: 'center' }}>
+        <DocumentThumbnail
+          documentId={documentId}
+          size="preview"
+          alt={documentName || 'Document'}
+          sx={{ maxWidth: '100%', maxHeight: 500, mx: 'auto' }}
+        />
+        <Button
+          variant="text"
+          sx={{ mt: 2 }}
+          component="a"
+          href={contentUrl}
+          target="_blank"
+        >
+          Abrir original
+        </Button>
+      </Paper>
+    );
+  }
+  
   // Renderizar según el tipo de documento
   return (
     <Paper elevation={1} sx={{ overflow: 'hidden', borderRadius: 2 }}>
@@ -20,22 +20,18 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        // En un MVP, podemos simular estadísticas si la API aún no las proporciona
-        // Idealmente, habría un endpoint específico para esto en la API
+        // Conteos por estado y prioridad calculados por el servidor
+        const response = await apiClient.get('/api/siniestros/stats');
+        const { total, por_estado: porEstado, por_prioridad: porPrioridad } = response.data;
         
-        // Obtener siniestros
-        const response = await apiClient.get('/api/siniestros/');
-        const siniestros = response.data;
-        
-        // Calcular estadísticas
         const stats = {
-          total: siniestros.length,
-          nuevos: siniestros.filter(s => s.estado === 'Nuevo').length,
-          enProceso: siniestros.filter(s => s.estado === 'En Proceso').length,
-          resueltos: siniestros.filter(s => s.estado === 'Resuelto').length,
-          alta: siniestros.filter(s => s.prioridad === 'Alta').length,
-          media: siniestros.filter(s => s.prioridad === 'Media').length,
-          baja: siniestros.filter(s => s.prioridad === 'Baja').length
+          total,
+          nuevos: porEstado['Nuevo'] || 0,
+          enProceso: porEstado['En Proceso'] || 0,
+          resueltos: porEstado['Resuelto'] || 0,
+          alta: porPrioridad['Alta'] || 0,
+          media: porPrioridad['Media'] || 0,
+          baja: porPrioridad['Baja'] || 0
         };
         
         setStats(stats);
@@ -11,6 +11,7 @@ import CheckCircleIcon from '@mui/icons-material/CheckCircle';
 import CancelIcon from '@mui/icons-material/Cancel';
 import TextSnippetIcon from '@mui/icons-material/TextSnippet';
 import apiClient from '../../services/api';
+import DocumentThumbnail from '../../components/documents/DocumentThumbnail';
 
 const DocumentDetail = () => {
   const { documentId } = useParams();
@@ -157,7 +158,13 @@ const getFileIcon = () => {
               minHeight: 200,
               justifyContent: 'center'
             }}>
-              {getFileIcon()}
+              <DocumentThumbnail
+                documentId={documentId}
+                size="preview"
+                alt={document?.name}
+                fallback={getFileIcon()}
+                sx={{ maxWidth: '100%', maxHeight: 400 }}
+              />
               <Typography variant="body2" sx={{ mt: 2, textAlign: 'center' }}>
                 {document?.name || 'Documento'}
               </Typography>
@@ -171,6 +178,17 @@ const getFileIcon = () => {
               >
                 Ver / Descargar
               </Button>
+              {document?.original_kept && (
+                <Button
+                  variant="text"
+                  sx={{ mt: 1 }}
+                  component="a"
+                  href={`/api/documents/download/${documentId}?original=true`}
+                  target="_blank"
+                >
+                  Descargar original
+                </Button>
+              )}
             </Box>
           </Grid>
           
@@ -12,6 +12,7 @@ import SearchIcon from '@mui/icons-material/Search';
 import CheckCircleIcon from '@mui/icons-material/CheckCircle';
 import CancelIcon from '@mui/icons-material/Cancel';
 import apiClient from '../../services/api';
+import DocumentThumbnail from '../../components/documents/DocumentThumbnail';
 
 const DocumentsList = () => {
   const [documents, setDocuments] = useState([]);
@@ -21,6 +22,8 @@ const DocumentsList = () => {
   const [rowsPerPage, setRowsPerPage] = useState(10);
   const [searchTerm, setSearchTerm] = useState('');
   const [totalDocuments, setTotalDocuments] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   const navigate = useNavigate();
   const location = useLocation();
@@ -51,6 +54,7 @@ const DocumentsList = () => {
         
         setDocuments(response.data);
         setTotalDocuments(response.data.length);
+        setNextCursor(response.headers['x-next-cursor'] || null);
         setLoading(false);
       } catch (err) {
         console.error('Error al cargar documentos:', err);
@@ -62,6 +66,24 @@ const DocumentsList = () => {
     fetchDocuments();
   }, [siniestroId]);
   
+  // Añadir la siguiente página del servidor a la lista
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await apiClient.get(`/api/documents/by-siniestro/${siniestroId}`, {
+        params: { cursor: nextCursor }
+      });
+      setDocuments((current) => [...current, ...response.data]);
+      setTotalDocuments((total) => total + response.data.length);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error('Error al cargar más documentos:', err);
+      setError('No se pudieron cargar más documentos');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+  
   // Manejadores de paginación
   const handleChangePage = (event, newPage) => {
     setPage(newPage);
@@ -157,6 +179,7 @@ const DocumentsList = () => {
         <Table sx={{ minWidth: 650 }} aria-label="tabla de documentos">
           <TableHead>
             <TableRow>
+              <TableCell>Vista</TableCell>
               <TableCell>Nombre</TableCell>
               <TableCell>Tipo</TableCell>
               <TableCell>Fecha de Subida</TableCell>
@@ -168,13 +191,20 @@ const DocumentsList = () => {
           <TableBody>
             {paginatedDocuments.length === 0 ? (
               <TableRow>
-                <TableCell colSpan={6} align="center">
+                <TableCell colSpan={7} align="center">
                   No se encontraron documentos
                 </TableCell>
               </TableRow>
             ) : (
               paginatedDocuments.map((doc) => (
                 <TableRow key={doc.id}>
+                  <TableCell>
+                    <DocumentThumbnail
+                      documentId={doc.id}
+                      alt={doc.name}
+                      sx={{ width: 64, height: 48 }}
+                    />
+                  </TableCell>
                   <TableCell>{doc.name}</TableCell>
                   <TableCell>{doc.document_type}</TableCell>
                   <TableCell>{formatDate(doc.upload_date)}</TableCell>
@@ -231,6 +261,14 @@ const DocumentsList = () => {
             labelDisplayedRows={({ from, to, count }) => `${from}-${to} de ${count}`}
             />
 
+            {siniestroId && nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+            <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? 'Cargando...' : 'Cargar más documentos'}
+            </Button>
+            </Box>
+            )}
+
             {siniestroId && (
             <Box sx={{ mt: 3 }}>
             <Button 
@@ -2,11 +2,17 @@ import React, { useState, useEffect } from 'react';
 import {
   Typography, Box, Paper, Button, FormControl,
   InputLabel, Select, MenuItem, CircularProgress,
-  Alert, TextField, Divider
+  Alert, TextField, Divider, LinearProgress
 } from '@mui/material';
 import { useNavigate, useParams } from 'react-router-dom';
 import UploadFileIcon from '@mui/icons-material/UploadFile';
 import apiClient from '../../services/api';
+import { uploadResumable } from '../../services/resumableUpload';
+
+// A partir de este tamaño el archivo se sube por partes y la subida se puede reanudar
+const RESUMABLE_THRESHOLD = 8 * 1024 * 1024;
+
+const formatMegabytes = (bytes) => `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
 
 const UploadDocument = () => {
   const { siniestroId } = useParams();
@@ -17,6 +23,7 @@ const UploadDocument = () => {
   const [siniestro, setSiniestro] = useState(null);
   const [loading, setLoading] = useState(false);
   const [submitting, setSubmitting] = useState(false);
+  const [progress, setProgress] = useState(null);
   const [errorMessage, setErrorMessage] = useState('');
   const [successMessage, setSuccessMessage] = useState('');
   
@@ -81,19 +88,34 @@ const UploadDocument = () => {
     setSuccessMessage('');
     setSubmitting(true);
     
-    // Crear FormData para enviar el archivo
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('document_type', documentType);
-    
     try {
-      await apiClient.post(`/api/documents/upload/${siniestroId}`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data'
-        }
-      });
+      let uploaded = null;
+      if (file.size >= RESUMABLE_THRESHOLD) {
+        await uploadResumable(siniestroId, documentType, file, setProgress);
+      } else {
+        // Crear FormData para enviar el archivo
+        const formData = new FormData();
+        formData.append('file', file);
+        
+        // El tipo va en la URL: el servidor lo necesita para el límite de tamaño
+        // antes de empezar a recibir el archivo
+        const response = await apiClient.post(`/api/documents/upload/${siniestroId}`, formData, {
+          params: { document_type: documentType },
+          headers: {
+            'Content-Type': 'multipart/form-data'
+          }
+        });
+        uploaded = response.data;
+      }
       
-      setSuccessMessage('Documento subido correctamente');
+      // Las fotos se pueden guardar recomprimidas: se indica cuánto se ahorró
+      if (uploaded?.original_size_bytes) {
+        setSuccessMessage(
+          `Documento subido correctamente (imagen optimizada: ${formatMegabytes(uploaded.original_size_bytes)} → ${formatMegabytes(uploaded.size_bytes)})`
+        );
+      } else {
+        setSuccessMessage('Documento subido correctamente');
+      }
       
       // Redirigir después de un breve retraso
       setTimeout(() => {
@@ -102,9 +124,15 @@ const UploadDocument = () => {
       
     } catch (err) {
       console.error('Error al subir documento:', err);
-      setErrorMessage(err.response?.data?.detail || 'Error al subir el documento');
+      setErrorMessage(
+        err.response?.data?.detail ||
+        (file.size >= RESUMABLE_THRESHOLD
+          ? 'Se interrumpió la subida. Vuelve a intentarlo para continuar donde se quedó'
+          : 'Error al subir el documento')
+      );
     } finally {
       setSubmitting(false);
+      setProgress(null);
     }
   };
   
@@ -185,6 +213,10 @@ const UploadDocument = () => {
                 Archivo seleccionado: {file.name}
               </Typography>
             )}
+            
+            {progress !== null && (
+              <LinearProgress variant="determinate" value={progress * 100} sx={{ mt: 2 }} />
+            )}
           </Box>
           
           <Divider sx={{ my: 3 }} />
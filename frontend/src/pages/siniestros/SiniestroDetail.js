@@ -9,6 +9,7 @@ import DescriptionIcon from '@mui/icons-material/Description';
 import VisibilityIcon from '@mui/icons-material/Visibility';
 import AddIcon from '@mui/icons-material/Add';
 import EditIcon from '@mui/icons-material/Edit';
+import DownloadIcon from '@mui/icons-material/Download';
 import apiClient from '../../services/api';
 
 const SiniestroDetail = () => {
@@ -20,42 +21,55 @@ const SiniestroDetail = () => {
   const [loading, setLoading] = useState(true);
   const [loadingDocuments, setLoadingDocuments] = useState(false);
   const [error, setError] = useState(null);
+  const [exporting, setExporting] = useState(false);
+  const [exportError, setExportError] = useState(null);
   
-  // Cargar datos del siniestro
+  // Descargar todos los documentos en un ZIP (con manifiesto de datos de OCR)
+  // Descarga nativa del navegador: el ZIP va directo a disco sin pasar por memoria.
+  // Un enlace no puede enviar la cabecera Authorization, así que se pide antes un
+  // token de descarga de corta duración para esta ruta
+  const handleExport = async () => {
+    setExporting(true);
+    setExportError(null);
+    try {
+      const path = `/api/documents/export/${siniestroId}`;
+      const response = await apiClient.post('/api/documents/download-token', { path });
+      const link = document.createElement('a');
+      link.href = `${apiClient.defaults.baseURL}${path}?token=${encodeURIComponent(response.data.token)}`;
+      link.download = `siniestro-${siniestroId}.zip`;
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+    } catch (err) {
+      console.error('Error al exportar documentos:', err);
+      setExportError('No se pudieron exportar los documentos');
+    } finally {
+      setExporting(false);
+    }
+  };
+  
+  // Cargar el siniestro junto con sus documentos (una sola petición)
   useEffect(() => {
     const fetchSiniestro = async () => {
+      if (!siniestroId) return;
+      
       setLoading(true);
+      setLoadingDocuments(true);
       try {
-        const response = await apiClient.get(`/api/siniestros/${siniestroId}`);
-        setSiniestro(response.data);
+        const response = await apiClient.get(`/api/siniestros/${siniestroId}/detail`);
+        const { documentos, ...datos } = response.data;
+        setSiniestro(datos);
+        setDocuments(documentos);
       } catch (err) {
         console.error('Error al cargar siniestro:', err);
         setError('No se pudo cargar la información del siniestro');
       } finally {
         setLoading(false);
-      }
-    };
-    
-    fetchSiniestro();
-  }, [siniestroId]);
-  
-  // Cargar documentos del siniestro
-  useEffect(() => {
-    const fetchDocuments = async () => {
-      if (!siniestroId) return;
-      
-      setLoadingDocuments(true);
-      try {
-        const response = await apiClient.get(`/api/documents/by-siniestro/${siniestroId}`);
-        setDocuments(response.data);
-      } catch (err) {
-        console.error('Error al cargar documentos:', err);
-      } finally {
         setLoadingDocuments(false);
       }
     };
     
-    fetchDocuments();
+    fetchSiniestro();
   }, [siniestroId]);
   
   // Formatear fecha
@@ -248,16 +262,33 @@ const SiniestroDetail = () => {
       <Paper elevation={3} sx={{ p: 3, mt: 3 }}>
         <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 2 }}>
           <Typography variant="h6">Documentos</Typography>
-          <Button 
-            variant="outlined" 
-            size="small"
-            startIcon={<AddIcon />}
-            onClick={() => navigate(`/siniestros/${siniestroId}/documentos/subir`)}
-          >
-            Subir Documento
-          </Button>
+          <Box sx={{ display: 'flex', gap: 1 }}>
+            <Button 
+              variant="outlined" 
+              size="small"
+              startIcon={exporting ? <CircularProgress size={16} /> : <DownloadIcon />}
+              onClick={handleExport}
+              disabled={exporting || documents.length === 0}
+            >
+              Exportar ZIP
+            </Button>
+            <Button 
+              variant="outlined" 
+              size="small"
+              startIcon={<AddIcon />}
+              onClick={() => navigate(`/siniestros/${siniestroId}/documentos/subir`)}
+            >
+              Subir Documento
+            </Button>
+          </Box>
         </Box>
         
+        {exportError && (
+          <Alert severity="error" sx={{ mb: 2 }}>
+            {exportError}
+          </Alert>
+        )}
+        
         {loadingDocuments ? (
           <Box sx={{ display: 'flex', justifyContent: 'center', my: 2 }}>
             <CircularProgress size={24} />
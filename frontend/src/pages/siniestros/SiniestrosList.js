@@ -1,8 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import {
   Typography, Box, Paper, Table, TableBody, TableCell,
   TableContainer, TableHead, TableRow, TablePagination,
-  Chip, IconButton, Button, TextField, InputAdornment
+  Chip, IconButton, Button, TextField, InputAdornment, MenuItem
 } from '@mui/material';
 import { useNavigate } from 'react-router-dom';
 import EditIcon from '@mui/icons-material/Edit';
@@ -18,14 +18,38 @@ const SiniestrosList = () => {
   const [page, setPage] = useState(0);
   const [rowsPerPage, setRowsPerPage] = useState(10);
   const [searchTerm, setSearchTerm] = useState('');
+  // Filtros y orden que aplica el servidor
+  const [search, setSearch] = useState('');
+  const [estado, setEstado] = useState('');
+  const [prioridad, setPrioridad] = useState('');
+  const [sort, setSort] = useState('-id');
+  // Cursor de la siguiente página del servidor (null si no hay más)
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   const navigate = useNavigate();
   
+  // Esperar a que el usuario deje de escribir antes de buscar
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+  
+  // Parámetros de la consulta; los filtros vacíos no se envían
+  const queryParams = useCallback(() => ({
+    sort,
+    ...(search && { q: search }),
+    ...(estado && { estado }),
+    ...(prioridad && { prioridad }),
+  }), [search, estado, prioridad, sort]);
+  
   useEffect(() => {
     const fetchSiniestros = async () => {
       try {
-        const response = await apiClient.get('/api/siniestros/');
+        const response = await apiClient.get('/api/siniestros/', { params: queryParams() });
         setSiniestros(response.data);
+        setNextCursor(response.headers['x-next-cursor'] || null);
+        setPage(0);
         setLoading(false);
       } catch (err) {
         console.error('Error al cargar siniestros:', err);
@@ -35,7 +59,24 @@ const SiniestrosList = () => {
     };
     
     fetchSiniestros();
-  }, []);
+  }, [queryParams]);
+  
+  // Añadir la siguiente página del servidor a la lista (mismos filtros y orden)
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await apiClient.get('/api/siniestros/', {
+        params: { ...queryParams(), cursor: nextCursor }
+      });
+      setSiniestros((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error('Error al cargar más siniestros:', err);
+      setError('No se pudieron cargar más siniestros');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
   
   // Manejadores de paginación
   const handleChangePage = (event, newPage) => {
@@ -47,15 +88,8 @@ const SiniestrosList = () => {
     setPage(0);
   };
   
-  // Filtrado de siniestros
-  const filteredSiniestros = siniestros.filter((siniestro) => 
-    siniestro.numero_poliza.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    siniestro.asegurado.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    siniestro.tipo_siniestro.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-  
-  // Siniestros paginados
-  const paginatedSiniestros = filteredSiniestros
+  // Siniestros paginados (ya vienen filtrados y ordenados del servidor)
+  const paginatedSiniestros = siniestros
     .slice(page * rowsPerPage, page * rowsPerPage + rowsPerPage);
   
   // Color del chip según estado
@@ -116,7 +150,7 @@ const SiniestrosList = () => {
         </Button>
       </Box>
       
-      <Box sx={{ mb: 3 }}>
+      <Box sx={{ display: 'flex', gap: 2, mb: 3 }}>
         <TextField
           fullWidth
           variant="outlined"
@@ -131,6 +165,43 @@ const SiniestrosList = () => {
             ),
           }}
         />
+        <TextField
+          select
+          label="Estado"
+          value={estado}
+          onChange={(e) => setEstado(e.target.value)}
+          sx={{ minWidth: 150 }}
+        >
+          <MenuItem value="">Todos</MenuItem>
+          <MenuItem value="Nuevo">Nuevo</MenuItem>
+          <MenuItem value="En Proceso">En Proceso</MenuItem>
+          <MenuItem value="Resuelto">Resuelto</MenuItem>
+        </TextField>
+        <TextField
+          select
+          label="Prioridad"
+          value={prioridad}
+          onChange={(e) => setPrioridad(e.target.value)}
+          sx={{ minWidth: 150 }}
+        >
+          <MenuItem value="">Todas</MenuItem>
+          <MenuItem value="Alta">Alta</MenuItem>
+          <MenuItem value="Media">Media</MenuItem>
+          <MenuItem value="Baja">Baja</MenuItem>
+        </TextField>
+        <TextField
+          select
+          label="Ordenar por"
+          value={sort}
+          onChange={(e) => setSort(e.target.value)}
+          sx={{ minWidth: 220 }}
+        >
+          <MenuItem value="-id">Más recientes</MenuItem>
+          <MenuItem value="-fecha_siniestro">Fecha de siniestro (reciente)</MenuItem>
+          <MenuItem value="fecha_siniestro">Fecha de siniestro (antigua)</MenuItem>
+          <MenuItem value="-fecha_reporte">Fecha de reporte (reciente)</MenuItem>
+          <MenuItem value="fecha_reporte">Fecha de reporte (antigua)</MenuItem>
+        </TextField>
       </Box>
       
       <TableContainer component={Paper}>
@@ -198,7 +269,7 @@ const SiniestrosList = () => {
       <TablePagination
         rowsPerPageOptions={[5, 10, 25]}
         component="div"
-        count={filteredSiniestros.length}
+        count={siniestros.length}
         rowsPerPage={rowsPerPage}
         page={page}
         onPageChange={handleChangePage}
@@ -206,6 +277,14 @@ const SiniestrosList = () => {
         labelRowsPerPage="Filas por página:"
         labelDisplayedRows={({ from, to, count }) => `${from}-${to} de ${count}`}
       />
+      
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? 'Cargando...' : 'Cargar más siniestros'}
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 };
@@ -0,0 +1,83 @@
+import apiClient from './api';
+
+// Subida reanudable por partes: si la conexión se corta solo se reenvían las partes
+// que faltan, también después de recargar la página (la sesión se recuerda en localStorage)
+const CHUNK_SIZE = 4 * 1024 * 1024;
+const PARALLEL_CHUNKS = 3;
+const MAX_RETRIES = 5;
+
+const storageKey = (siniestroId, file) =>
+  `upload:${siniestroId}:${file.name}:${file.size}:${file.lastModified}`;
+
+const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const getOrCreateSession = async (siniestroId, documentType, file) => {
+  const key = storageKey(siniestroId, file);
+  const savedId = localStorage.getItem(key);
+  if (savedId) {
+    try {
+      const response = await apiClient.get(`/api/documents/uploads/${savedId}`);
+      if (response.data.status === 'activa') {
+        return response.data;
+      }
+    } catch (err) {
+      // La sesión caducó o ya no existe: se empieza otra
+    }
+    localStorage.removeItem(key);
+  }
+  const response = await apiClient.post('/api/documents/uploads/', {
+    siniestro_id: Number(siniestroId),
+    document_type: documentType,
+    name: file.name,
+    size_bytes: file.size,
+  });
+  localStorage.setItem(key, response.data.id);
+  return response.data;
+};
+
+const putChunk = async (sessionId, file, offset, end) => {
+  for (let attempt = 0; ; attempt += 1) {
+    try {
+      await apiClient.put(`/api/documents/uploads/${sessionId}`, file.slice(offset, end), {
+        params: { offset },
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      return;
+    } catch (err) {
+      // Los errores de la petición (4xx) no se arreglan reintentando
+      const status = err.response?.status;
+      if ((status && status < 500) || attempt >= MAX_RETRIES) {
+        throw err;
+      }
+      await wait(1000 * 2 ** attempt);
+    }
+  }
+};
+
+export const uploadResumable = async (siniestroId, documentType, file, onProgress) => {
+  const session = await getOrCreateSession(siniestroId, documentType, file);
+
+  // Partes pendientes según el servidor
+  const pending = [];
+  session.missing_ranges.forEach(([start, end]) => {
+    for (let offset = start; offset < end; offset += CHUNK_SIZE) {
+      pending.push([offset, Math.min(end, offset + CHUNK_SIZE)]);
+    }
+  });
+
+  let sent = session.received_bytes;
+  onProgress?.(sent / file.size);
+  const worker = async () => {
+    while (pending.length) {
+      const [offset, end] = pending.shift();
+      await putChunk(session.id, file, offset, end);
+      sent += end - offset;
+      onProgress?.(sent / file.size);
+    }
+  };
+  await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+
+  const response = await apiClient.post(`/api/documents/uploads/${session.id}/complete`);
+  localStorage.removeItem(storageKey(siniestroId, file));
+  return response.data;
+};